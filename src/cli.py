@@ -0,0 +1,371 @@
+# Command-line batch export.
+# Exports the clips of one or many (video, tags.json) pairs without Qt or VLC, so
+# exports can run unattended on a render server. Progress is written to stdout as
+# JSON lines; log messages go to stderr. The benchmark command measures every encoder
+# profile on a source. Tag files can also be imported into a project database, whose
+# tags are then queried and exported across matches.
+#
+#   python src/cli.py export match1.mp4 match1_tags.json match2.mp4 match2_tags.json -o clips/ --jobs 2
+#   python src/cli.py benchmark match1.mp4 --duration 20 --quality
+#   python src/cli.py import project.db match1.mp4 match1_tags.json match2.mp4 match2_tags.json
+#   python src/cli.py query project.db --category "Balón parado" --last 20
+#   python src/cli.py export --project project.db --category "Balón parado" --last 20 -o clips/
+#   python src/cli.py convert season_tags.json season_tags.vtags
+#   python src/cli.py stats match1_tags.json -o match1_stats.csv
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.export.engine import ClipExporter, DEFAULT_THREADS_PER_PROCESS, default_max_workers
+from src.export.smart_cut import MODE_REENCODE, MODE_SMART, MODE_KEYFRAME
+from src.export.pipeline import MODE_SINGLE_PASS
+from src.export.planner import MODE_COALESCE
+from src.export.profiles import DEFAULT_PROFILE, PROFILES
+from src.export.benchmark import DEFAULT_BENCHMARK_SECONDS, benchmark_profile
+from src.tag_manager import TagManager
+from src.project_db import ProjectDB
+from src.tag_file import TagFile, is_tag_file
+from src.tag_stats import BUCKET_SECONDS, DEFAULT_SECOND_HALF, TagStats
+from src.utils.logger import AppLogger
+
+MODES = [MODE_REENCODE, MODE_SMART, MODE_KEYFRAME, MODE_SINGLE_PASS, MODE_COALESCE]
+
+
+class ProgressWriter:
+    """Writes progress events as JSON lines (one object per line) to a stream"""
+
+    def __init__(self, stream=None, enabled=True):
+        self.stream = stream or sys.stdout
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def write(self, event, **fields):
+        if not self.enabled:
+            return
+        line = json.dumps(dict(event=event, **fields))
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def parse_pairs(values):
+    """Split the positional arguments into (video, tags) pairs"""
+    if len(values) % 2:
+        raise ValueError("expected VIDEO TAGS pairs, got an odd number of paths")
+    return [(values[k], values[k + 1]) for k in range(0, len(values), 2)]
+
+
+def output_dir_for(base_dir, video_path, per_video):
+    """Folder named after the video inside base_dir when per_video, else base_dir itself"""
+    if not per_video:
+        return base_dir
+    return os.path.join(base_dir, os.path.splitext(os.path.basename(video_path))[0])
+
+
+def output_dirs(base_dir, video_paths):
+    """Export folder of each video: its own folder unless a single video is exported.
+
+    Videos with the same name in different folders (a/match.mp4 and b/match.mp4) would
+    write their clips into the same folder, so the later ones get match_2, match_3...
+    """
+    per_video = len(video_paths) > 1
+    dirs = []
+    used = set()
+    for video_path in video_paths:
+        output_dir = named = output_dir_for(base_dir, video_path, per_video)
+        number = 1
+        # casefold: Match.mp4 and match.mp4 are the same folder on Windows and macOS
+        while per_video and output_dir.casefold() in used:
+            number += 1
+            output_dir = f"{named}_{number}"
+        used.add(output_dir.casefold())
+        dirs.append(output_dir)
+    return dirs
+
+
+def load_tags_file(tags_path, category=None):
+    """Tags of a JSON or .vtags file (only those of category if given)"""
+    if category is not None and is_tag_file(tags_path):
+        # Only the tags of the category are read from the file
+        with TagFile(tags_path) as tag_file:
+            return tag_file.category(category)
+    manager = TagManager()
+    manager.load_tags(tags_path)
+    if category is None:
+        return manager.get_tags()
+    return [dict(tag) for tag in manager.get_tags() if tag["category"] == category]
+
+
+def export_video(video_path, tags, output_dir, options, writer):
+    """Export the clips of one video. Returns True when every clip succeeded."""
+    os.makedirs(output_dir, exist_ok=True)
+    writer.write("start", video=video_path, output_dir=output_dir,
+                 clips=sum(1 for tag in tags if tag["end"] is not None))
+
+    state = {"percent": None, "eta": None}
+
+    def on_eta(batch_seconds, clips):
+        state["eta"] = round(batch_seconds)
+
+    def on_progress(percent):
+        # Overall progress is re-sent with every clip update; only report changes
+        if state["percent"] != percent:
+            state["percent"] = percent
+            writer.write("progress", video=video_path, percent=percent, eta=state["eta"])
+
+    exporter = ClipExporter(
+        tags, video_path, output_dir, "clip",
+        on_progress=on_progress,
+        on_eta=on_eta,
+        on_clip_finished=lambda i, ok: writer.write("clip", video=video_path, clip=i, success=ok),
+        **options
+    )
+    results = exporter.run()
+    failed = sorted(i for i, ok in results.items() if not ok)
+    writer.write("done", video=video_path, failed=failed)
+    return not failed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export tagged clips without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_export = commands.add_parser("export", help="export the clips of (video, tags) pairs")
+    parser_export.add_argument("pairs", nargs="*", metavar="VIDEO TAGS",
+                               help="video file followed by its tags file, .json or .vtags (repeatable)")
+    parser_export.add_argument("--project", help="export tags of a project database instead of pairs")
+    add_selection_arguments(parser_export)
+    parser_export.add_argument("-o", "--output", required=True, help="output directory")
+    parser_export.add_argument("--mode", choices=MODES, default=MODE_REENCODE, help="export mode")
+    parser_export.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE,
+                               help="encoder profile")
+    parser_export.add_argument("--jobs", type=int, default=1, help="videos exported at the same time")
+    parser_export.add_argument("--workers", type=int, default=None,
+                               help="ffmpeg processes per video (default: cores / threads / jobs)")
+    parser_export.add_argument("--threads", type=int, default=None,
+                               help="threads per ffmpeg process (default: from the profile)")
+    parser_export.add_argument("--merge-gap", type=float, default=None,
+                               help="merge same-category tags closer than this many seconds")
+    parser_export.add_argument("--no-incremental", action="store_true", help="re-render unchanged clips")
+    parser_export.add_argument("--resume", action="store_true", help="continue interrupted exports")
+    parser_export.add_argument("--shortest-first", action="store_true",
+                               help="export the shortest clips first")
+    parser_export.add_argument("--quiet", action="store_true", help="no JSON progress on stdout")
+    parser_export.add_argument("-v", "--verbose", action="store_true", help="log debug messages to stderr")
+
+    parser_bench = commands.add_parser("benchmark", help="measure every encoder profile on a source")
+    parser_bench.add_argument("video", help="source video")
+    parser_bench.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES),
+                              help="profiles to measure (default: all)")
+    parser_bench.add_argument("--start", type=float, default=0.0, help="start of the excerpt (s)")
+    parser_bench.add_argument("--duration", type=float, default=DEFAULT_BENCHMARK_SECONDS,
+                              help="length of the excerpt (s)")
+    parser_bench.add_argument("--quality", action="store_true", help="also measure PSNR against the source")
+    parser_bench.add_argument("--json", action="store_true", help="one JSON object per profile")
+    parser_bench.add_argument("-v", "--verbose", action="store_true", help="log debug messages to stderr")
+
+    parser_import = commands.add_parser("import", help="import (video, tags) pairs into a project database")
+    parser_import.add_argument("project", help="project database (created if missing)")
+    parser_import.add_argument("pairs", nargs="+", metavar="VIDEO TAGS",
+                               help="video file followed by its tags file, .json or .vtags (repeatable)")
+    parser_import.add_argument("-v", "--verbose", action="store_true", help="log debug messages to stderr")
+
+    parser_query = commands.add_parser("query", help="list tags of a project database as JSON lines")
+    parser_query.add_argument("project", help="project database")
+    add_selection_arguments(parser_query)
+    parser_query.add_argument("-v", "--verbose", action="store_true", help="log debug messages to stderr")
+
+    parser_convert = commands.add_parser("convert", help="convert a tag file between JSON and .vtags")
+    parser_convert.add_argument("source", help="tag file to read (.json or .vtags)")
+    parser_convert.add_argument("target", help="tag file to write; the format follows the extension")
+    parser_convert.add_argument("-v", "--verbose", action="store_true", help="log debug messages to stderr")
+
+    parser_stats = commands.add_parser("stats", help="tag statistics per category of a tags file")
+    parser_stats.add_argument("tags", help="tags file (.json or .vtags)")
+    parser_stats.add_argument("-o", "--output", help="write CSV or JSON (by extension) instead of JSON to stdout")
+    parser_stats.add_argument("--bucket-minutes", type=float, default=BUCKET_SECONDS / 60,
+                              help="length of the match time buckets (min)")
+    parser_stats.add_argument("--second-half", type=float, default=DEFAULT_SECOND_HALF / 60,
+                              help="start of the second half in video time (min)")
+    parser_stats.add_argument("-v", "--verbose", action="store_true", help="log debug messages to stderr")
+    return parser
+
+
+def add_selection_arguments(parser):
+    """Options choosing the tags of a project database"""
+    parser.add_argument("--category", help="only tags of this category")
+    parser.add_argument("--last", type=int, default=None,
+                        help="only the videos most recently added to the project")
+
+
+def query_project(args):
+    """{video: [tags]} of the finished project tags selected by args"""
+    if not os.path.exists(args.project):
+        raise ValueError(f"no project database at {args.project}")
+    with ProjectDB(args.project) as project:
+        tags = project.query(category=args.category, last=args.last)
+    videos = {}
+    for tag in tags:
+        videos.setdefault(tag.pop("video_path"), []).append(tag)
+    return videos
+
+
+def run_export(args, logger):
+    try:
+        if args.project:
+            if args.pairs:
+                raise ValueError("give either VIDEO TAGS pairs or --project, not both")
+            pairs = list(query_project(args).items())
+        else:
+            if not args.pairs:
+                raise ValueError("expected VIDEO TAGS pairs or --project")
+            pairs = parse_pairs(args.pairs)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    jobs = max(1, args.jobs)
+    threads = args.threads or PROFILES[args.profile].threads or DEFAULT_THREADS_PER_PROCESS
+    options = {
+        "mode": args.mode,
+        "profile": args.profile,
+        "threads_per_process": threads,
+        "max_workers": args.workers or max(1, default_max_workers(threads) // jobs),
+        "merge_gap": args.merge_gap,
+        "incremental": not args.no_incremental,
+        "resume": args.resume,
+        "shortest_first": args.shortest_first,
+    }
+    writer = ProgressWriter(enabled=not args.quiet)
+
+    def run(pair, output_dir):
+        video_path, tags = pair
+        try:
+            if isinstance(tags, str):
+                tags = load_tags_file(tags, args.category)
+            return export_video(video_path, tags, output_dir, options, writer)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not export {video_path}: {e}")
+            writer.write("error", video=video_path, message=str(e))
+            return False
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(run, pairs, output_dirs(args.output, [video_path for video_path, _ in pairs])))
+    return 0 if all(results) else 1
+
+
+def format_benchmark(results):
+    """Plain-text table of benchmark results"""
+    lines = [f"{'profile':<14}{'fps':>8}{'speed':>8}{'size (MB)':>11}{'kbit/s':>9}{'PSNR':>7}"]
+    for result in results:
+        if "error" in result:
+            lines.append(f"{result['profile']:<14}failed: {result['error']}")
+            continue
+        psnr = result.get("psnr")
+        lines.append(
+            f"{result['profile']:<14}{result['fps']:>8.1f}{result['speed']:>7.2f}x"
+            f"{result['size_bytes'] / 1e6:>11.2f}{result['bitrate_kbps']:>9.0f}"
+            f"{f'{psnr:.1f}' if psnr is not None else '-':>7}"
+        )
+    return "\n".join(lines)
+
+
+def run_benchmark(args, logger):
+    results = []
+    # Profiles run one after the other so they do not compete for the CPU
+    for name in args.profiles:
+        logger.info(f"Benchmarking profile {name} on {args.video}")
+        result = benchmark_profile(args.video, name, args.start, args.duration, quality=args.quality)
+        results.append(result)
+        if args.json:
+            print(json.dumps(result), flush=True)
+    if not args.json:
+        print(format_benchmark(results))
+    return 0 if all("error" not in result for result in results) else 1
+
+
+def run_import(args, logger):
+    try:
+        pairs = parse_pairs(args.pairs)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    try:
+        with ProjectDB(args.project) as project:
+            imported = project.import_json(pairs)
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        logger.error(f"Could not import into {args.project}: {e}")
+        return 1
+    logger.info(f"Imported {imported} tags of {len(pairs)} videos into {args.project}")
+    return 0
+
+
+def run_query(args, logger):
+    try:
+        videos = query_project(args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    for video_path, tags in videos.items():
+        for tag in tags:
+            print(json.dumps(dict(tag, video=video_path)))
+    return 0
+
+
+def run_convert(args, logger):
+    manager = TagManager()
+    try:
+        manager.load_tags(args.source)
+        manager.save_tags(args.target)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not convert {args.source}: {e}")
+        return 1
+    logger.info(f"Wrote {len(manager.get_tags())} tags to {args.target}")
+    return 0
+
+
+def run_stats(args, logger):
+    manager = TagManager()
+    try:
+        manager.load_tags(args.tags)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not read {args.tags}: {e}")
+        return 1
+    stats = TagStats(manager, bucket_seconds=args.bucket_minutes * 60, second_half=args.second_half * 60)
+    if args.output:
+        stats.write(args.output)
+    else:
+        print(json.dumps(stats.to_dict(), ensure_ascii=False))
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Keep stderr readable; the log file still gets everything
+    logger = AppLogger.get_logger()
+    for handler in logger.handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+
+    if args.command == "benchmark":
+        return run_benchmark(args, logger)
+    if args.command == "import":
+        return run_import(args, logger)
+    if args.command == "query":
+        return run_query(args, logger)
+    if args.command == "convert":
+        return run_convert(args, logger)
+    if args.command == "stats":
+        return run_stats(args, logger)
+    return run_export(args, logger)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,4 +14,13 @@ def load_categories(path=None):
             return json.load(f)
     except Exception as e:
         print(f"Error loading categories: {e}")
-        return ["General"]
\ No newline at end of file
+        return ["General"]
+
+
+# Directory for data derived from videos (media metadata, proxies, thumbnails...).
+# It can be relocated with the VIDEO_TAGGER_CACHE environment variable.
+def get_cache_dir(*parts):
+    base = os.environ.get("VIDEO_TAGGER_CACHE") or os.path.join(os.path.expanduser("~"), ".video_tagger", "cache")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
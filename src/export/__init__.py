@@ -0,0 +1 @@
+# FFmpeg export helpers used by the exporter
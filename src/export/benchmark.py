@@ -0,0 +1,98 @@
+# Encoder profile benchmark.
+# Encodes the same excerpt of a source with every profile and reports encode speed
+# (frames per second and multiple of real time), output size and bitrate, and
+# optionally the PSNR against the source, so profiles can be chosen from numbers
+# measured on the actual hardware and footage.
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+from src.export.profiles import get_profile
+from src.export.progress import PROGRESS_ARGS, ProgressParser, run_ffmpeg
+
+# Length of the excerpt encoded by default
+DEFAULT_BENCHMARK_SECONDS = 30.0
+
+
+def build_benchmark_command(video_path, profile, start, duration, output_path, threads=None):
+    """Encode [start, start + duration] of video_path with the profile's settings"""
+    profile = get_profile(profile)
+    command = [
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{start:.6f}",
+        "-i", video_path,
+        "-t", f"{duration:.6f}",
+    ]
+    if profile.scale_filter():
+        command += ["-vf", profile.scale_filter()]
+    command += profile.video_args() + profile.audio_args()
+    threads = threads or profile.threads
+    if threads:
+        command += ["-threads", str(threads)]
+    return command + ["-f", "mp4", *PROGRESS_ARGS, output_path]
+
+
+def measure_psnr(video_path, start, duration, encoded_path):
+    """Average PSNR (dB) of an encode against the source excerpt (None if unavailable).
+
+    The encode is scaled back to the source size first, so scaled profiles are
+    compared on what a viewer would see at full size.
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-v", "info", "-nostats",
+        "-ss", f"{start:.6f}", "-t", f"{duration:.6f}", "-i", video_path,
+        "-i", encoded_path,
+        "-lavfi", "[1:v][0:v]scale2ref[enc][ref];[enc][ref]psnr",
+        "-f", "null", "-"
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    match = re.search(r"PSNR .*average:([0-9.]+|inf)", result.stderr)
+    if result.returncode != 0 or not match:
+        return None
+    return float(match.group(1))
+
+
+def benchmark_profile(video_path, profile, start=0.0, duration=DEFAULT_BENCHMARK_SECONDS,
+                      quality=False, threads=None, clock=time.monotonic):
+    """Encode an excerpt with one profile and return its measurements as a dict.
+
+    Speed and bitrate are measured against the length actually encoded, which is shorter
+    than duration when the excerpt runs past the end of the source.
+    """
+    profile = get_profile(profile)
+    frames = [0]
+    encoded = [0.0]
+
+    def on_block(block):
+        try:
+            frames[0] = int(block.get("frame", frames[0]))
+        except ValueError:
+            pass
+        encoded[0] = max(encoded[0], ProgressParser.out_time(block) or 0.0)
+
+    with tempfile.TemporaryDirectory(prefix="video_tagger_bench_") as tmp_dir:
+        output_path = os.path.join(tmp_dir, f"{profile.name}.mp4")
+        command = build_benchmark_command(video_path, profile, start, duration, output_path, threads)
+        began = clock()
+        success, messages = run_ffmpeg(command, on_block=on_block)
+        elapsed = max(clock() - began, 1e-6)
+        if not success:
+            return {"profile": profile.name, "error": " | ".join(messages) or "ffmpeg failed"}
+
+        size = os.path.getsize(output_path)
+        # Without any progress report, assume the whole excerpt was encoded
+        encoded_seconds = encoded[0] or duration
+        result = {
+            "profile": profile.name,
+            "seconds": round(elapsed, 3),
+            "frames": frames[0],
+            "fps": round(frames[0] / elapsed, 1),
+            "speed": round(encoded_seconds / elapsed, 2),
+            "size_bytes": size,
+            "bitrate_kbps": round(size * 8 / encoded_seconds / 1000, 1) if encoded_seconds > 0 else None,
+        }
+        if quality:
+            result["psnr"] = measure_psnr(video_path, start, duration, output_path)
+        return result
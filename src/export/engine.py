@@ -0,0 +1,706 @@
+# Headless export engine.
+# Plain Python classes that plan and run the ffmpeg jobs of an export, reporting
+# progress through callbacks. They depend on neither Qt nor VLC, so they can be used
+# from the GUI (through the QThread adapters in src/exporter.py) as well as from the
+# command line on a render server (src/cli.py). The jobs of an export are coroutines
+# on a single event loop; their ffmpeg processes are run by a ProcessSupervisor.
+import asyncio
+import subprocess
+import tempfile
+import threading
+import time
+import os
+from src.export.smart_cut import (
+    MODE_REENCODE, MODE_SMART, MODE_KEYFRAME, plan_segments,
+    build_segment_command, write_concat_list, build_concat_command, smart_cut_problem
+)
+from src.export.pipeline import (
+    MODE_SINGLE_PASS, DEFAULT_CLIPS_PER_PASS, plan_passes, pass_range, build_single_pass_command
+)
+from src.export.reel import (
+    ORDER_TIME, select_segments, segments_compatible, write_reel_list,
+    build_reel_copy_command, build_reel_reencode_command
+)
+from src.export.progress import DEFAULT_PROGRESS_RATE, PROGRESS_ARGS, ProgressThrottle, run_ffmpeg
+from src.export.manifest import ExportManifest, clip_key
+from src.export.planner import (
+    MODE_COALESCE, coalesce_intervals, merge_nearby, build_span_command, build_slice_command
+)
+from src.export.journal import (
+    STATE_RUNNING, STATE_DONE, STATE_FAILED, ExportJournal, partial_path, finalize_output,
+    discard_partial, register_pending, unregister_pending
+)
+from src.export.profiles import DEFAULT_PROFILE, get_profile
+from src.export.eta import SpeedModel, blended_speed, schedule_eta, get_speed_model
+from src.export.supervisor import DEFAULT_STALL_TIMEOUT, ProcessSupervisor
+from src.media.keyframes import get_keyframe_index
+from src.media.media_info import get_media_info, file_fingerprint
+from src.utils.logger import AppLogger
+
+# Threads given to each ffmpeg process. The worker pool size is derived from it
+# so that N processes x threads per process roughly matches the core count.
+DEFAULT_THREADS_PER_PROCESS = 2
+
+
+def _ignore(*args):
+    """Callback used when the caller is not interested in an event"""
+
+
+def default_max_workers(threads_per_process=DEFAULT_THREADS_PER_PROCESS):
+    """Number of concurrent ffmpeg processes for this machine"""
+    cores = os.cpu_count() or 1
+    return max(1, cores // max(1, threads_per_process))
+
+
+class ClipExporter:
+
+    """Exports one clip per finished tag of a video.
+
+    Progress is reported through optional callbacks, called from the thread running run():
+    on_progress(percent), on_clip_progress(clip_index, percent),
+    on_clip_finished(clip_index, success) and on_eta(batch_seconds, {clip_index: seconds}).
+    """
+
+    def __init__(self, tags, video_path, output_dir, filename_base,
+                 max_workers=None, threads_per_process=None, profile=DEFAULT_PROFILE,
+                 mode=MODE_REENCODE, clips_per_pass=DEFAULT_CLIPS_PER_PASS,
+                 progress_rate=DEFAULT_PROGRESS_RATE, incremental=True, merge_gap=None, resume=False,
+                 shortest_first=False, speed_model=None,
+                 stall_timeout=DEFAULT_STALL_TIMEOUT, job_timeout=None,
+                 on_progress=None, on_clip_progress=None, on_clip_finished=None, on_eta=None):
+        self.on_progress = on_progress or _ignore
+        self.on_clip_progress = on_clip_progress or _ignore
+        self.on_clip_finished = on_clip_finished or _ignore
+        self.on_eta = on_eta or _ignore
+        # Plain copies: the caller's tags (e.g. TagManager's store) may change during the export
+        self.tags = [dict(tag) for tag in tags]
+        self.video_path = video_path
+        self.output_dir = output_dir
+        self.filename_base = filename_base
+        self.profile = get_profile(profile)
+        self.threads_per_process = threads_per_process or self.profile.threads or DEFAULT_THREADS_PER_PROCESS
+        self.max_workers = max_workers or default_max_workers(self.threads_per_process)
+        self.mode = mode
+        self.clips_per_pass = clips_per_pass
+        self.incremental = incremental
+        self.merge_gap = merge_gap
+        self.resume = resume
+        self.shortest_first = shortest_first
+        self.speed_model = speed_model
+        self.supervisor = ProcessSupervisor(stall_timeout, job_timeout)
+        self.journal = None
+        self.jobs = {}  # clip_index -> tag actually exported (after merging)
+        self.members = {}  # clip_index -> tag indices covered by that clip
+        self.manifest = None
+        self.clip_keys = {}  # clip_index -> manifest key
+        self.keyframes = []
+        self.media_info = None
+        self.logger = AppLogger.get_logger()
+
+        # Per-clip state shared between worker threads
+        self.results = {}  # clip_index -> success
+        self._clip_percent = {}  # clip_index -> progress 0-100
+        self._lock = threading.Lock()
+        self._throttle = ProgressThrottle(progress_rate)
+
+        # Work units for the ETA: unit -> {"indices", "duration", "started", "finished"}
+        self._units = {}
+        self._media_finished = 0.0  # Media seconds of finished units
+        self._wall_finished = 0.0  # Process wall seconds spent on them
+
+    def encoder_settings(self):
+        """Settings that change the content of an exported clip"""
+        return dict(self.profile.settings(), mode=self.mode)
+
+    def export_settings(self):
+        """Constructor settings stored in the journal so an export can be resumed"""
+        return {"mode": self.mode, "profile": self.profile.name, "clips_per_pass": self.clips_per_pass,
+                "incremental": self.incremental, "merge_gap": self.merge_gap,
+                "shortest_first": self.shortest_first}
+
+    def output_path(self, i, tag):
+        """Path of the exported file for the i-th tag"""
+        return os.path.join(self.output_dir, f"{tag['category']}_{i+1}.mp4")
+
+    def render_path(self, i, tag):
+        """Temporary path the i-th clip is written to until it is complete"""
+        return partial_path(self.output_path(i, tag))
+
+    def build_command(self, tag, output_path):
+        """Build the ffmpeg command line for a single clip"""
+        command = [
+            "ffmpeg", "-y", "-v", "error",
+            "-i", self.video_path,
+            "-ss", str(tag["start"]),
+            "-to", str(tag["end"]),
+        ]
+        if self.profile.scale_filter():
+            command += ["-vf", self.profile.scale_filter()]
+        return command + [
+            *self.profile.video_args(),
+            *self.profile.audio_args(),
+            "-threads", str(self.threads_per_process),
+            "-f", "mp4",
+            *PROGRESS_ARGS,
+            output_path
+        ]
+
+    def run(self):
+        """Export every clip and return {clip_index: success}"""
+        jobs = [(i, tag) for i, tag in enumerate(self.tags) if tag["end"]]
+        self.results = {}
+        self.members = {}
+        if self.merge_gap:
+            jobs, self.members = merge_nearby(jobs, self.merge_gap)
+            self.logger.info(f"Merged same-category tags closer than {self.merge_gap}s into {len(jobs)} clips")
+        self.jobs = dict(jobs)
+        self._clip_percent = {i: 0 for i, _ in jobs}
+        self.on_progress(0)
+        jobs = self.open_journal(jobs)
+
+        try:
+            self.media_info = get_media_info(self.video_path)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            self.logger.warning(f"Could not probe {self.video_path} ({e}), assuming 25fps with audio")
+            self.media_info = None
+
+        if self.mode in (MODE_SMART, MODE_KEYFRAME) and self.profile.max_height:
+            # Copied GOPs keep the source resolution, so a scaling profile needs a full encode
+            self.logger.warning(f"Profile {self.profile.name} scales the output, using full re-encode")
+            self.mode = MODE_REENCODE
+
+        if self.mode == MODE_SMART:
+            problem = smart_cut_problem(self.media_info, self.profile)
+            if problem:
+                self.logger.warning(f"Smart cut needs matching h264 edges ({problem}), using full re-encode")
+                self.mode = MODE_REENCODE
+
+        if self.mode in (MODE_SMART, MODE_KEYFRAME):
+            try:
+                self.keyframes = get_keyframe_index(self.video_path).tolist()
+            except (OSError, subprocess.CalledProcessError) as e:
+                self.logger.warning(f"Could not read keyframes ({e}), falling back to full re-encode")
+                self.mode = MODE_REENCODE
+
+        if self.incremental:
+            jobs = self.skip_unchanged(jobs)
+
+        # A unit of work is one ffmpeg job producing one or more clips
+        if self.mode == MODE_SINGLE_PASS:
+            units = [(self.export_pass, (batch,), [i for i, _ in batch])
+                     for batch in plan_passes(jobs, self.clips_per_pass)]
+        elif self.mode == MODE_COALESCE:
+            units = []
+            for _, _, indices in coalesce_intervals([(tag["start"], tag["end"], i) for i, tag in jobs]):
+                if len(indices) == 1:
+                    units.append((self.export_clip, (indices[0], self.jobs[indices[0]], len(self.tags)), indices))
+                else:
+                    units.append((self.export_span, ([(i, self.jobs[i]) for i in indices],), indices))
+        else:
+            units = [(self.export_clip, (i, tag, len(self.tags)), [i]) for i, tag in jobs]
+
+        # The pool starts jobs in submission order, so sorting is the scheduling policy
+        if self.shortest_first:
+            units.sort(key=lambda unit: self.unit_duration(unit[2]))
+        self._units = {
+            n: {"indices": indices, "duration": self.unit_duration(indices), "started": None, "finished": False}
+            for n, (_, _, indices) in enumerate(units)
+        }
+        self._media_finished = self._wall_finished = 0.0
+        if self.speed_model is None:
+            self.speed_model = get_speed_model()
+        self._speed_key = SpeedModel.key(self.mode, self.profile.name)
+
+        self._workers = workers = min(self.max_workers, len(units)) or 1
+        self.logger.info(f"Exporting {len(jobs)} clips in {len(units)} jobs with {workers} parallel ffmpeg processes")
+
+        asyncio.run(self._run_units(units))
+
+        failed = [i for i, ok in self.results.items() if not ok]
+        if self.cancelled:
+            # The journal stays open-ended so the export can be resumed later
+            self.logger.warning("Export cancelled")
+            if self.journal is not None:
+                self.journal.close()
+        else:
+            self.close_journal()
+        try:
+            self.speed_model.save()
+        except OSError as e:
+            self.logger.warning(f"Could not save encode speed: {e}")
+
+        if self.cancelled:
+            return self.results
+
+        # Final progress update
+        self.on_progress(100)
+        if failed:
+            self.logger.warning(f"Export completed with {len(failed)} failed clips: {sorted(i + 1 for i in failed)}")
+        else:
+            self.logger.info("Export completed successfully")
+        return self.results
+
+    def open_journal(self, jobs):
+        """Start (or, when resuming, continue) the journal of this export.
+
+        Returns the jobs still to be exported: when resuming, clips the journal
+        records as done and that are still on disk are reported and skipped.
+        """
+        try:
+            self.journal = ExportJournal(self.output_dir)
+            session = self.journal.load() if self.resume else None
+            if session is None:
+                self.journal.begin(self.video_path, self.tags, self.export_settings(), [i for i, _ in jobs])
+            else:
+                self.journal.resume()
+            register_pending(self.output_dir)
+        except OSError as e:
+            self.logger.warning(f"Export journal disabled: {e}")
+            self.journal = None
+            return jobs
+        if session is None:
+            return jobs
+
+        done = set(session.done)
+        remaining = []
+        for i, tag in jobs:
+            if i in done and os.path.exists(self.output_path(i, tag)):
+                self._clip_percent[i] = 100
+                self.on_clip_progress(i, 100)
+                self._finish_clip(i, True)
+            else:
+                discard_partial(self.output_path(i, tag))
+                remaining.append((i, tag))
+        self.logger.info(f"Resuming export: {len(jobs) - len(remaining)} clips already done, {len(remaining)} left")
+        return remaining
+
+    def close_journal(self):
+        """Mark the export as run to completion so it is not offered for resuming"""
+        if self.journal is None:
+            return
+        try:
+            self.journal.finish()
+            unregister_pending(self.output_dir)
+        except OSError as e:
+            self.logger.warning(f"Could not close export journal: {e}")
+
+    def _mark(self, i, state):
+        if self.journal is None:
+            return
+        try:
+            self.journal.mark(i, state)
+        except OSError as e:
+            self.logger.warning(f"Could not update export journal: {e}")
+
+    @property
+    def cancelled(self):
+        return self.supervisor.cancelled
+
+    def cancel(self):
+        """Stop the export: running ffmpeg jobs are killed and queued ones never start"""
+        self.supervisor.cancel()
+
+    async def _run_units(self, units):
+        """Run the units with at most self._workers at a time, in list order"""
+        # Semaphore waiters are served in FIFO order, so the list order is kept
+        slots = asyncio.Semaphore(self._workers)
+
+        async def run(n, func, args, indices):
+            async with slots:
+                if self.cancelled:
+                    return
+                try:
+                    outcome = await self._run_unit(n, func, args, indices)
+                except Exception as e:
+                    self.logger.error(f"Clips {[i + 1 for i in indices]} failed: {e}")
+                    outcome = dict.fromkeys(indices, False)
+            if self.cancelled:
+                for i in indices:
+                    discard_partial(self.output_path(i, self.jobs[i]))
+                return
+            for i in indices:
+                clip_ok = outcome[i] and self._finalize_clip(i)
+                if clip_ok:
+                    self.record_clip(i)
+                else:
+                    discard_partial(self.output_path(i, self.jobs[i]))
+                self._mark(i, STATE_DONE if clip_ok else STATE_FAILED)
+                self._finish_clip(i, clip_ok)
+
+        await asyncio.gather(*(run(n, *unit) for n, unit in enumerate(units)))
+
+    def unit_duration(self, indices):
+        """Media seconds an ffmpeg job processes for the given clips"""
+        tags = [self.jobs[i] for i in indices]
+        return max(tag["end"] for tag in tags) - min(tag["start"] for tag in tags)
+
+    async def _run_unit(self, n, func, args, indices):
+        """Run one unit and return {clip_index: success}.
+
+        func returns whether the whole unit succeeded, or that dict when its clips
+        can fail one by one.
+        """
+        for i in indices:
+            self._mark(i, STATE_RUNNING)
+        with self._lock:
+            unit = self._units[n]
+            unit["started"] = time.monotonic()
+        outcome = dict.fromkeys(indices, False)
+        try:
+            result = await func(*args)
+            outcome = result if isinstance(result, dict) else dict.fromkeys(indices, result)
+            return outcome
+        finally:
+            # Failed, cancelled or killed runs say nothing about the encode speed
+            measured = all(outcome.values()) and not self.cancelled
+            with self._lock:
+                elapsed = time.monotonic() - unit["started"]
+                unit["finished"] = True
+                if measured:
+                    self._media_finished += unit["duration"]
+                    self._wall_finished += elapsed
+            if measured:
+                self.speed_model.observe(self._speed_key, unit["duration"], elapsed)
+
+    def _estimate(self):
+        """Current ETA as (batch seconds, {clip_index: seconds}). Call with the lock held."""
+        now = time.monotonic()
+        media_done, wall_elapsed = self._media_finished, self._wall_finished
+        running, queued = {}, []
+        for n, unit in self._units.items():
+            if unit["finished"]:
+                continue
+            if unit["started"] is None:
+                queued.append((n, unit["duration"]))
+                continue
+            fraction = sum(self._clip_percent.get(i, 0) for i in unit["indices"]) / (100 * len(unit["indices"]))
+            media_done += unit["duration"] * fraction
+            wall_elapsed += now - unit["started"]
+            running[n] = unit["duration"] * (1 - fraction)
+
+        speed = blended_speed(self.speed_model.speed(self._speed_key), media_done, wall_elapsed)
+        finish, batch = schedule_eta(running, queued, self._workers, speed)
+        clips = {i: finish[n] for n in finish for i in self._units[n]["indices"]}
+        return batch, clips
+
+    def _finalize_clip(self, i):
+        """Rename a finished clip from its temporary name into place"""
+        try:
+            finalize_output(self.output_path(i, self.jobs[i]))
+            return True
+        except OSError as e:
+            self.logger.error(f"Could not finalize clip {i+1}: {e}")
+            return False
+
+    def skip_unchanged(self, jobs):
+        """Drop the jobs whose output already exists with the same inputs.
+
+        Clips found in the manifest under another name are moved or copied into
+        place. Returns the jobs that still have to be rendered.
+        """
+        try:
+            fingerprint = self.media_info.fingerprint if self.media_info else file_fingerprint(self.video_path)
+            self.manifest = ExportManifest(self.output_dir)
+            settings = self.encoder_settings()
+            self.clip_keys = {
+                i: clip_key(fingerprint, tag["start"], tag["end"], settings) for i, tag in jobs
+            }
+            targets = {os.path.basename(self.output_path(i, tag)): self.clip_keys[i] for i, tag in jobs}
+            satisfied = self.manifest.prepare(targets)
+            self.manifest.save()
+        except OSError as e:
+            self.logger.warning(f"Incremental export disabled: {e}")
+            self.manifest = None
+            return jobs
+
+        remaining = []
+        for i, tag in jobs:
+            if os.path.basename(self.output_path(i, tag)) in satisfied:
+                self._mark(i, STATE_DONE)
+                self._clip_percent[i] = 100
+                self.on_clip_progress(i, 100)
+                self._finish_clip(i, True)
+            else:
+                remaining.append((i, tag))
+        if len(remaining) < len(jobs):
+            self.logger.info(f"Skipping {len(jobs) - len(remaining)} unchanged clips")
+        return remaining
+
+    def _finish_clip(self, i, success):
+        """Store and report the result of clip i for every tag it covers"""
+        for member in self.members.get(i, [i]):
+            self.results[member] = success
+            self.on_clip_finished(member, success)
+
+    def record_clip(self, i):
+        """Add a freshly exported clip to the manifest"""
+        if self.manifest is None or i not in self.clip_keys:
+            return
+        tag = self.jobs[i]
+        try:
+            self.manifest.record(
+                os.path.basename(self.output_path(i, tag)), self.clip_keys[i],
+                start=tag["start"], end=tag["end"], source=self.video_path,
+                settings=self.encoder_settings())
+            self.manifest.save()
+        except OSError as e:
+            self.logger.warning(f"Could not update export manifest: {e}")
+
+    async def export_clip(self, i, tag, total_clips):
+        """Run ffmpeg for one clip. Returns True when ffmpeg exited cleanly."""
+        start_time = tag["start"]
+        end_time = tag["end"]
+        output_path = self.output_path(i, tag)
+        output_filename = os.path.basename(output_path)
+
+        # Log the current clip being processed
+        self.logger.info(f"Processing clip {i+1}/{total_clips}: {output_filename}")
+
+        if self.mode in (MODE_SMART, MODE_KEYFRAME):
+            return await self.export_clip_segments(i, tag, output_path)
+
+        duration = end_time - start_time
+        self._update_progress(i, 0)
+
+        def on_position(seconds):
+            if duration > 0:
+                self._update_progress(i, min(99, int(100 * seconds / duration)))
+
+        success, messages = await self.supervisor.run(self.build_command(tag, self.render_path(i, tag)), on_position)
+
+        # Ensure 100% progress is emitted for this clip
+        self._update_progress(i, 100)
+        if success:
+            self.logger.info(f"Completed clip {i+1}: {output_filename}")
+        else:
+            self.logger.error(f"ffmpeg failed on clip {i+1} ({output_filename}): {' | '.join(messages)}")
+        return success
+
+    async def export_clip_segments(self, i, tag, output_path):
+        """Export one clip by stream-copying whole GOPs and re-encoding only the edges"""
+        start_time, end_time = tag["start"], tag["end"]
+        duration = end_time - start_time
+        segments = plan_segments(start_time, end_time, self.keyframes, self.mode)
+        copied = sum(e - s for kind, s, e in segments if kind == "copy")
+        self.logger.debug(f"Clip {i+1}: copying {copied:.2f}s of {duration:.2f}s in {len(segments)} segments")
+        self._update_progress(i, 0)
+
+        with tempfile.TemporaryDirectory(prefix=".smartcut_", dir=self.output_dir) as tmp_dir:
+            segment_paths = []
+            done = 0.0
+            for n, (kind, seg_start, seg_end) in enumerate(segments):
+                segment_path = os.path.join(tmp_dir, f"{n}.ts")
+                command = build_segment_command(
+                    self.video_path, kind, seg_start, seg_end, segment_path, self.threads_per_process, self.profile)
+                success, messages = await self.supervisor.run(command)
+                if not success:
+                    self.logger.error(f"ffmpeg failed on clip {i+1} segment {n}: {' | '.join(messages)}")
+                    return False
+                segment_paths.append(segment_path)
+                done += seg_end - seg_start
+                # Leave the last few percent for the join
+                self._update_progress(i, min(95, int(95 * done / duration)) if duration > 0 else 95)
+
+            list_path = write_concat_list(segment_paths, os.path.join(tmp_dir, "segments.txt"))
+            command = build_concat_command(list_path, partial_path(output_path))
+            success, messages = await self.supervisor.run(command)
+            if not success:
+                self.logger.error(f"ffmpeg failed joining clip {i+1}: {' | '.join(messages)}")
+                return False
+
+        self._update_progress(i, 100)
+        self.logger.info(f"Completed clip {i+1}: {os.path.basename(output_path)}")
+        return True
+
+    async def export_span(self, batch):
+        """Encode the span covered by overlapping (index, tag) clips once and
+        stream-copy every clip out of it.
+
+        Returns {clip_index: success}: a failed slice only fails its own clip.
+        """
+        span_start = min(tag["start"] for _, tag in batch)
+        span_end = max(tag["end"] for _, tag in batch)
+        span = span_end - span_start
+        cut_points = [t for _, tag in batch for t in (tag["start"], tag["end"])]
+        tagged = sum(tag["end"] - tag["start"] for _, tag in batch)
+        self.logger.info(f"Encoding {span:.2f}s once for {len(batch)} overlapping clips ({tagged:.2f}s tagged)")
+        for i, _ in batch:
+            self._update_progress(i, 0)
+
+        def on_position(seconds):
+            span_progress = min(90, int(90 * seconds / span)) if span > 0 else 90
+            for i, _ in batch:
+                self._update_progress(i, span_progress)
+
+        with tempfile.TemporaryDirectory(prefix=".coalesce_", dir=self.output_dir) as tmp_dir:
+            span_path = os.path.join(tmp_dir, "span.mp4")
+            command = build_span_command(
+                self.video_path, span_start, span_end, cut_points, span_path, self.threads_per_process, self.profile)
+            success, messages = await self.supervisor.run(command, on_position)
+            if not success:
+                self.logger.error(f"ffmpeg failed encoding span {span_start:.2f}s-{span_end:.2f}s: {' | '.join(messages)}")
+                return {i: False for i, _ in batch}
+
+            frame_time = 1.0 / (self.media_info.fps if self.media_info else 25)
+            results = {}
+            for i, tag in batch:
+                output_path = self.output_path(i, tag)
+                command = build_slice_command(
+                    span_path, tag["start"] - span_start, tag["end"] - tag["start"], self.render_path(i, tag),
+                    frame_time)
+                success, messages = await self.supervisor.run(command)
+                results[i] = success
+                if not success and self.cancelled:
+                    return {i: False for i, _ in batch}
+                if not success:
+                    self.logger.error(f"ffmpeg failed slicing clip {i+1}: {' | '.join(messages)}")
+                    continue
+                self._update_progress(i, 100)
+                self.logger.info(f"Completed clip {i+1}: {os.path.basename(output_path)}")
+        return results
+
+    async def export_pass(self, batch):
+        """Export a batch of (index, tag) clips from a single decode of the source"""
+        clips = [(tag["start"], tag["end"], self.render_path(i, tag)) for i, tag in batch]
+        seek, end = pass_range(clips)
+        span = end - seek
+        self.logger.info(f"Processing {len(clips)} clips in one pass over {seek:.2f}s-{end:.2f}s")
+
+        for i, _ in batch:
+            self._update_progress(i, 0)
+
+        def on_position(seconds):
+            pass_progress = min(99, int(100 * seconds / span)) if span > 0 else 99
+            for i, _ in batch:
+                self._update_progress(i, pass_progress)
+
+        command = build_single_pass_command(
+            self.video_path, clips,
+            has_audio=self.media_info.has_audio if self.media_info else True,
+            threads=self.threads_per_process,
+            profile=self.profile)
+        success, messages = await self.supervisor.run(command, on_position)
+        for i, _ in batch:
+            self._update_progress(i, 100)
+        if success:
+            self.logger.info(f"Completed pass with clips {[i + 1 for i, _ in batch]}")
+        else:
+            self.logger.error(f"ffmpeg failed on pass with clips {[i + 1 for i, _ in batch]}: {' | '.join(messages)}")
+        return success
+
+    def _update_progress(self, i, clip_progress):
+        """Record progress for one clip and emit per-clip and overall progress.
+
+        Clips finish out of order, so overall progress is the mean of every
+        clip's own progress rather than the index of the clip being processed.
+        Updates from all workers are merged to at most progress_rate signals per
+        second; the start and the end of a clip are always emitted.
+        """
+        with self._lock:
+            forced = clip_progress in (0, 100)
+            if self._clip_percent.get(i) == clip_progress and not forced:
+                return
+            self._clip_percent[i] = clip_progress
+            changes = self._throttle.update(i, clip_progress, force=forced)
+            if changes is None:
+                return
+            overall_progress = int(sum(self._clip_percent.values()) / len(self._clip_percent))
+            # Emitting under the lock keeps overall progress monotonic across workers
+            for clip_index, value in changes.items():
+                self.on_clip_progress(clip_index, value)
+            if self._units:
+                self.on_eta(*self._estimate())
+            self.on_progress(overall_progress)
+        self.logger.debug(f"Progress - Clip {i+1}: {clip_progress}%, Overall: {overall_progress}%")
+
+
+class ReelExporter:
+
+    """Joins the selected tags into a single highlight reel.
+
+    on_progress(percent) is called as the reel is written.
+    """
+
+    def __init__(self, tags, video_path, output_path, categories=None, order=ORDER_TIME,
+                 category_order=None, threads_per_process=None, profile=DEFAULT_PROFILE, on_progress=None):
+        self.on_progress = on_progress or _ignore
+        self.segments = select_segments(tags, video_path, categories, order, category_order)
+        self.output_path = output_path
+        self.profile = get_profile(profile)
+        self.threads_per_process = threads_per_process or self.profile.threads
+        self.success = False
+        self.stream_copy = False
+        self.logger = AppLogger.get_logger()
+
+    def run(self):
+        """Build the reel and return whether it was written"""
+        if not self.segments:
+            self.logger.warning("No tags selected for the highlight reel")
+            return False
+
+        sources = list(dict.fromkeys(video_path for video_path, _, _, _ in self.segments))
+        infos = {}
+        for video_path in sources:
+            try:
+                infos[video_path] = get_media_info(video_path)
+            except (OSError, ValueError, subprocess.CalledProcessError) as e:
+                self.logger.warning(f"Could not probe {video_path}: {e}")
+
+        # A single source is always compatible with itself. A profile that scales the
+        # sources down can only be honoured by re-encoding.
+        max_height = self.profile.max_height
+        scaled = bool(max_height) and len(infos) == len(sources) and any(
+            info.height > max_height for info in infos.values())
+        self.stream_copy = not scaled and (len(sources) == 1 or (
+            len(infos) == len(sources) and segments_compatible(infos.values())))
+        if not self.stream_copy and len(infos) < len(sources):
+            # The re-encode needs the size, frame rate and audio of every source
+            self.logger.error(f"Cannot re-encode the highlight reel: could not probe "
+                              f"{', '.join(path for path in sources if path not in infos)}")
+            self.on_progress(100)
+            return False
+        total = sum(end - start for _, start, end, _ in self.segments)
+        self.logger.info(f"Building a {total:.1f}s highlight reel from {len(self.segments)} tags "
+                         f"({'stream copy' if self.stream_copy else 're-encode'})")
+
+        def on_position(seconds):
+            self.on_progress(min(99, int(100 * seconds / total)) if total > 0 else 99)
+
+        output_dir = os.path.dirname(os.path.abspath(self.output_path))
+        with tempfile.TemporaryDirectory(prefix=".reel_", dir=output_dir) as tmp_dir:
+            if self.stream_copy:
+                keyframes = {}
+                for video_path in sources:
+                    try:
+                        keyframes[video_path] = get_keyframe_index(video_path).tolist()
+                    except (OSError, subprocess.CalledProcessError) as e:
+                        self.logger.warning(f"Could not read keyframes of {video_path}: {e}")
+                list_path = write_reel_list(self.segments, os.path.join(tmp_dir, "reel.txt"), keyframes)
+                command = build_reel_copy_command(list_path, partial_path(self.output_path))
+            else:
+                first = infos[sources[0]]
+                width, height = first.width, first.height
+                if max_height and height > max_height:
+                    width, height = 2 * round(width * max_height / height / 2), max_height
+                command = build_reel_reencode_command(
+                    self.segments, partial_path(self.output_path),
+                    has_audio=all(info.has_audio for info in infos.values()),
+                    target=(width, height, first.fps),
+                    threads=self.threads_per_process,
+                    profile=self.profile)
+            self.success, messages = run_ffmpeg(command, on_position)
+            try:
+                if self.success:
+                    finalize_output(self.output_path)
+                else:
+                    discard_partial(self.output_path)
+            except OSError as e:
+                messages = [str(e)]
+                self.success = False
+
+        if self.success:
+            self.logger.info(f"Highlight reel exported to {self.output_path}")
+        else:
+            self.logger.error(f"ffmpeg failed building the highlight reel: {' | '.join(messages)}")
+        self.on_progress(100)
+        return self.success
@@ -0,0 +1,102 @@
+# Export time estimates.
+# Encode speed is measured in seconds of media per wall-clock second of one ffmpeg
+# process. A small model remembers the speed seen for each (mode, profile) pair across
+# sessions, so the first estimate of a new export is already sensible; during an export
+# the model's value is refined with the speed of the jobs actually running. The ETA of
+# each clip comes from replaying the queue on the worker pool at that speed.
+import heapq
+import json
+import os
+import threading
+
+from src.config import get_cache_dir
+
+# Speed assumed before anything was measured for a mode/profile (real time)
+DEFAULT_SPEED = 1.0
+
+# Weight of a new measurement in the persisted moving average
+SMOOTHING = 0.3
+
+# Wall seconds of measurements the persisted speed is worth when it is combined with
+# the speed measured in the current export
+PRIOR_WEIGHT = 10.0
+
+
+class SpeedModel:
+    """Per (mode, profile) encode speed, persisted as JSON in the cache directory"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir(), "export_speed.json")
+        self._lock = threading.Lock()
+        self._speeds = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return {key: float(value) for key, value in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def save(self):
+        with self._lock:
+            data = dict(self._speeds)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def key(mode, profile_name):
+        return f"{mode}/{profile_name}"
+
+    def speed(self, key):
+        with self._lock:
+            return self._speeds.get(key, DEFAULT_SPEED)
+
+    def observe(self, key, media_seconds, wall_seconds):
+        """Fold the speed of one finished job into the moving average"""
+        if media_seconds <= 0 or wall_seconds <= 0:
+            return
+        measured = media_seconds / wall_seconds
+        with self._lock:
+            previous = self._speeds.get(key)
+            self._speeds[key] = measured if previous is None else (
+                (1 - SMOOTHING) * previous + SMOOTHING * measured)
+
+
+def blended_speed(prior_speed, media_done, wall_elapsed):
+    """Speed estimate mixing the persisted speed with what this export measured so far"""
+    return (media_done + prior_speed * PRIOR_WEIGHT) / (wall_elapsed + PRIOR_WEIGHT)
+
+
+def schedule_eta(running, queued, workers, speed):
+    """Replay the remaining work on the worker pool.
+
+    running: {unit: media seconds left} for jobs in progress; queued: [(unit, media
+    seconds)] in the order the pool will start them. Returns ({unit: seconds until it
+    finishes}, seconds until everything finishes).
+    """
+    speed = max(speed, 1e-6)
+    finish = {unit: left / speed for unit, left in running.items()}
+    free_at = list(finish.values()) + [0.0] * max(0, workers - len(running))
+    if not free_at:
+        free_at = [0.0]
+    heapq.heapify(free_at)
+    for unit, media_seconds in queued:
+        start = heapq.heappop(free_at)
+        finish[unit] = start + media_seconds / speed
+        heapq.heappush(free_at, finish[unit])
+    return finish, max(finish.values(), default=0.0)
+
+
+_default_model = None
+_default_model_lock = threading.Lock()
+
+
+def get_speed_model():
+    """Speed model shared by every export of the application"""
+    global _default_model
+    with _default_model_lock:
+        if _default_model is None:
+            _default_model = SpeedModel()
+    return _default_model
@@ -0,0 +1,189 @@
+# Crash-safe export journal.
+# Every export appends its events to a JSONL file in the output directory: a session
+# record with everything needed to run the export again (source, tags and settings)
+# followed by one record per clip state change (queued, running, done, failed). Lines
+# are flushed and fsynced as they are written, so after a crash or a forced close the
+# journal tells which clips were finished and the export can be resumed from there.
+# Clips are rendered under a temporary name and renamed into place when complete, so
+# a half-written file is never taken for a finished clip.
+import json
+import os
+import threading
+
+from src.config import get_cache_dir
+
+JOURNAL_NAME = ".export_journal.jsonl"
+
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+
+def partial_path(output_path):
+    """Temporary name a clip is rendered under before it is renamed into place"""
+    directory, name = os.path.split(output_path)
+    return os.path.join(directory, f".{name}.part")
+
+
+def finalize_output(output_path):
+    """Atomically move a finished clip from its temporary name to output_path"""
+    os.replace(partial_path(output_path), output_path)
+
+
+def discard_partial(output_path):
+    """Remove the temporary file of a clip that did not finish"""
+    try:
+        os.remove(partial_path(output_path))
+    except OSError:
+        pass
+
+
+class ExportSession:
+    """State of one export replayed from its journal"""
+
+    def __init__(self, output_dir, video_path=None, tags=None, settings=None):
+        self.output_dir = output_dir
+        self.video_path = video_path
+        self.tags = tags or []
+        self.settings = settings or {}
+        self.states = {}  # clip_index -> state
+        self.complete = False
+
+    @property
+    def pending(self):
+        """Clip indices that were not exported yet"""
+        return sorted(i for i, state in self.states.items() if state != STATE_DONE)
+
+    @property
+    def done(self):
+        return sorted(i for i, state in self.states.items() if state == STATE_DONE)
+
+    @property
+    def resumable(self):
+        return not self.complete and bool(self.pending)
+
+
+class ExportJournal:
+    """Append-only journal of the clip states of an export"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, JOURNAL_NAME)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _append(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def begin(self, video_path, tags, settings, clips):
+        """Start a new journal for an export of the given clip indices"""
+        self.close()
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+        self._append({"event": "session", "video_path": video_path, "tags": tags, "settings": settings})
+        for i in clips:
+            self.mark(i, STATE_QUEUED)
+
+    def resume(self):
+        """Continue the journal of an interrupted export"""
+        self._append({"event": "resume"})
+
+    def mark(self, i, state):
+        self._append({"clip": i, "state": state})
+
+    def finish(self):
+        """Record that the export ran to the end (with or without failed clips)"""
+        self._append({"event": "complete"})
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def load(self):
+        """Replay the journal into an ExportSession (None when there is none).
+
+        A crash can leave the last line half-written; unreadable lines are ignored.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+
+        session = None
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            event = record.get("event")
+            if event == "session":
+                session = ExportSession(self.output_dir, record.get("video_path"),
+                                        record.get("tags"), record.get("settings"))
+            elif session is None:
+                continue
+            elif event == "complete":
+                session.complete = True
+            elif event == "resume":
+                session.complete = False
+            elif "clip" in record:
+                session.states[record["clip"]] = record.get("state")
+        return session
+
+
+# Output directories with an export in progress, so that an interrupted export
+# can be offered for resuming the next time the application starts
+def _pending_registry_path():
+    return os.path.join(get_cache_dir(), "pending_exports.json")
+
+
+def _load_pending():
+    try:
+        with open(_pending_registry_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _save_pending(directories):
+    path = _pending_registry_path()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(directories, f)
+    os.replace(tmp_path, path)
+
+
+def register_pending(output_dir):
+    directories = _load_pending()
+    output_dir = os.path.abspath(output_dir)
+    if output_dir not in directories:
+        _save_pending(directories + [output_dir])
+
+
+def unregister_pending(output_dir):
+    output_dir = os.path.abspath(output_dir)
+    directories = _load_pending()
+    if output_dir in directories:
+        _save_pending([d for d in directories if d != output_dir])
+
+
+def find_resumable():
+    """Interrupted exports (ExportSession) found in the registered output directories"""
+    sessions = []
+    for output_dir in _load_pending():
+        session = ExportJournal(output_dir).load()
+        if session is not None and session.resumable:
+            sessions.append(session)
+        else:
+            unregister_pending(output_dir)
+    return sessions
@@ -0,0 +1,114 @@
+# Content-addressed export manifest.
+# A JSON file stored next to the exported clips records, per output file, a key derived
+# from everything that determines its content: source fingerprint, start, end and
+# encoder settings. A re-export only renders clips whose key is not on disk yet. Clips
+# whose key exists under another file name (for example after a tag was removed and
+# the numbering shifted) are moved or copied instead of being encoded again.
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+MANIFEST_NAME = ".export_manifest.json"
+
+
+def clip_key(source_fingerprint, start, end, settings):
+    """Content key of an exported clip"""
+    payload = json.dumps({
+        "source": source_fingerprint,
+        "start": round(float(start), 3),
+        "end": round(float(end), 3),
+        "settings": settings,
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ExportManifest:
+    """Manifest of the clips exported to one output directory"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.entries = self._load()  # output_name -> {"key", "size", "mtime", "start", "end", ...}
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("clips", {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({"version": 1, "clips": self.entries}, indent=2)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def _is_valid(self, name, entry):
+        """True when the file recorded for name is still the one that was exported"""
+        try:
+            stat = os.stat(os.path.join(self.output_dir, name))
+        except OSError:
+            return False
+        return stat.st_size == entry.get("size") and stat.st_mtime_ns == entry.get("mtime")
+
+    def is_current(self, name, key):
+        entry = self.entries.get(name)
+        return entry is not None and entry["key"] == key and self._is_valid(name, entry)
+
+    def record(self, name, key, **info):
+        """Record that name now holds the clip with the given key"""
+        stat = os.stat(os.path.join(self.output_dir, name))
+        with self._lock:
+            self.entries[name] = dict(info, key=key, size=stat.st_size, mtime=stat.st_mtime_ns)
+
+    def prepare(self, targets):
+        """Satisfy as many {output_name: key} targets as possible from existing files.
+
+        Targets already on disk are kept; targets whose key exists under another
+        name are moved there (or copied when the file is needed more than once).
+        Returns the set of output names that do not need rendering.
+        """
+        by_key = {}
+        for name, entry in self.entries.items():
+            if self._is_valid(name, entry):
+                by_key.setdefault(entry["key"], name)
+
+        satisfied = {name for name, key in targets.items() if self.is_current(name, key)}
+        reuse = {name: by_key[key] for name, key in targets.items()
+                 if name not in satisfied and key in by_key}
+        if not reuse:
+            return satisfied
+
+        # Stage every source first so that moving a file never overwrites another
+        # source that is still needed under its old name
+        staged = {}
+        for source in set(reuse.values()):
+            staged_path = os.path.join(self.output_dir, f".{source}.reuse")
+            if source in satisfied:
+                shutil.copy2(os.path.join(self.output_dir, source), staged_path)
+            else:
+                os.replace(os.path.join(self.output_dir, source), staged_path)
+            staged[source] = (staged_path, dict(self.entries[source]))
+            if source not in satisfied:
+                self.entries.pop(source, None)
+
+        # The last user of a staged file takes it, the others get a copy
+        remaining = {}
+        for source in reuse.values():
+            remaining[source] = remaining.get(source, 0) + 1
+        for name, source in reuse.items():
+            staged_path, entry = staged[source]
+            target_path = os.path.join(self.output_dir, name)
+            remaining[source] -= 1
+            if remaining[source]:
+                shutil.copy2(staged_path, target_path)
+            else:
+                os.replace(staged_path, target_path)
+            self.entries[name] = entry
+            satisfied.add(name)
+        return satisfied
@@ -0,0 +1,72 @@
+# Single-decode multi-clip export.
+# Instead of one ffmpeg per clip (each decoding the source from the start), clips are
+# grouped into passes. Every pass seeks once to its first clip, decodes the source in
+# order up to its last clip, and a generated split/trim filter graph writes every
+# clip of the pass to its own output. Total decode work then grows with the video
+# length instead of with the number of clips.
+from src.export.progress import PROGRESS_ARGS
+from src.export.profiles import get_profile
+
+MODE_SINGLE_PASS = "single_pass"
+
+# Clips written by one ffmpeg process. Every clip has its own encoder instance, so
+# this bounds the memory used by a pass; passes themselves run in the worker pool.
+DEFAULT_CLIPS_PER_PASS = 8
+
+
+def plan_passes(jobs, clips_per_pass=DEFAULT_CLIPS_PER_PASS):
+    """Group (index, tag) jobs into passes of clips that are close in time.
+
+    Jobs are sorted by start time so that each pass decodes a compact range.
+    """
+    ordered = sorted(jobs, key=lambda job: (job[1]["start"], job[1]["end"]))
+    size = max(1, clips_per_pass)
+    return [ordered[n:n + size] for n in range(0, len(ordered), size)]
+
+
+def pass_range(clips):
+    """Source range [seek, end] decoded by a pass over (start, end, output_path) clips"""
+    return min(c[0] for c in clips), max(c[1] for c in clips)
+
+
+def build_filter_graph(clips, seek=0.0, has_audio=True, scale=None):
+    """Build the -filter_complex graph splitting one decode into len(clips) trimmed outputs.
+
+    clips: list of (start, end, output_path) in source time; seek is the input seek point,
+    which becomes timestamp 0 of the decoded stream. scale: optional filter applied
+    to every video output.
+    """
+    n = len(clips)
+    video_labels = "".join(f"[v{k}]" for k in range(n))
+    parts = [f"[0:v]split={n}{video_labels}"]
+    scale = f",{scale}" if scale else ""
+    for k, (start, end, _) in enumerate(clips):
+        parts.append(f"[v{k}]trim=start={start - seek:.6f}:end={end - seek:.6f},setpts=PTS-STARTPTS{scale}[ov{k}]")
+    if has_audio:
+        audio_labels = "".join(f"[a{k}]" for k in range(n))
+        parts.append(f"[0:a]asplit={n}{audio_labels}")
+        for k, (start, end, _) in enumerate(clips):
+            parts.append(f"[a{k}]atrim=start={start - seek:.6f}:end={end - seek:.6f},asetpts=PTS-STARTPTS[oa{k}]")
+    return ";".join(parts)
+
+
+def build_single_pass_command(video_path, clips, has_audio=True, threads=None, profile=None):
+    """ffmpeg command writing every (start, end, output_path) clip from a single decode"""
+    profile = get_profile(profile)
+    seek, end = pass_range(clips)
+    command = [
+        "ffmpeg", "-y", "-v", "error", *PROGRESS_ARGS,
+        "-ss", f"{seek:.6f}",
+        "-to", f"{end:.6f}",
+        "-i", video_path,
+        "-filter_complex", build_filter_graph(clips, seek, has_audio, profile.scale_filter()),
+    ]
+    for k, (_, _, output_path) in enumerate(clips):
+        command += ["-map", f"[ov{k}]"]
+        if has_audio:
+            command += ["-map", f"[oa{k}]"]
+        command += profile.video_args() + profile.audio_args()
+        if threads:
+            command += ["-threads", str(threads)]
+        command += ["-f", "mp4", output_path]
+    return command
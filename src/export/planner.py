@@ -0,0 +1,104 @@
+# Overlap-aware export planning.
+# Analysts often tag the same play under several categories, so the same seconds of
+# video would be encoded once per tag. A sweep over the sorted tag intervals finds
+# groups of overlapping or adjacent tags; each group (span) is encoded once, with
+# keyframes forced on every tag boundary, and the per-tag outputs are stream-copied
+# slices of that encode. Same-category tags separated by a short gap can optionally
+# be merged into a single clip.
+from src.export.progress import PROGRESS_ARGS
+from src.export.profiles import get_profile
+
+MODE_COALESCE = "coalesce"
+
+# Intervals closer than this are considered adjacent and share a span
+ADJACENT_TOLERANCE = 0.05
+
+
+def coalesce_intervals(intervals, tolerance=ADJACENT_TOLERANCE):
+    """Sweep-line union of (start, end, key) intervals.
+
+    Returns [(span_start, span_end, [keys])] with the spans in time order; every
+    span is a maximal group of intervals that overlap or touch within tolerance.
+    """
+    spans = []
+    for start, end, key in sorted(intervals, key=lambda item: (item[0], item[1])):
+        if spans and start <= spans[-1][1] + tolerance:
+            span = spans[-1]
+            span[1] = max(span[1], end)
+            span[2].append(key)
+        else:
+            spans.append([start, end, [key]])
+    return [(start, end, keys) for start, end, keys in spans]
+
+
+def merge_nearby(jobs, max_gap):
+    """Merge same-category (index, tag) jobs separated by less than max_gap seconds.
+
+    Returns (jobs, members) where every merged job keeps the index of its first tag
+    and members maps that index to all tag indices it covers.
+    """
+    by_category = {}
+    for i, tag in jobs:
+        by_category.setdefault(tag["category"], []).append((i, tag))
+
+    merged, members = [], {}
+    for category_jobs in by_category.values():
+        category_jobs.sort(key=lambda job: job[1]["start"])
+        current_index, current = None, None
+        for i, tag in category_jobs:
+            if current is not None and tag["start"] - current["end"] < max_gap:
+                current["end"] = max(current["end"], tag["end"])
+                members[current_index].append(i)
+                continue
+            current_index, current = i, dict(tag)
+            merged.append((current_index, current))
+            members[current_index] = [i]
+    merged.sort(key=lambda job: job[0])
+    return merged, members
+
+
+def build_span_command(video_path, span_start, span_end, cut_points, output_path, threads=None, profile=None):
+    """Encode [span_start, span_end] once with IDR frames forced at every cut point"""
+    profile = get_profile(profile)
+    forced = ",".join(f"{t - span_start:.6f}" for t in sorted(set(cut_points)) if span_start < t < span_end)
+    command = [
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{span_start:.6f}",
+        "-i", video_path,
+        "-t", f"{span_end - span_start:.6f}",
+        "-map", "0:v:0", "-map", "0:a?",
+    ]
+    if profile.scale_filter():
+        command += ["-vf", profile.scale_filter()]
+    command += profile.video_args()
+    if forced:
+        command += ["-force_key_frames", forced, "-forced-idr", "1"]
+    if threads:
+        command += ["-threads", str(threads)]
+    command += profile.audio_args()
+    command += [
+        "-f", "mp4",
+        *PROGRESS_ARGS,
+        output_path
+    ]
+    return command
+
+
+def build_slice_command(span_path, offset, duration, output_path, frame_time=0.04):
+    """Stream-copy [offset, offset + duration] of an encoded span into its own clip.
+
+    The forced keyframe for a cut lands on the first frame at or after the cut, so
+    the seek target is moved forward by one frame to select that keyframe.
+    """
+    return [
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{offset + frame_time if offset > 0 else 0:.6f}",
+        "-i", span_path,
+        "-t", f"{duration:.6f}",
+        "-map", "0",
+        "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        "-f", "mp4",
+        *PROGRESS_ARGS,
+        output_path
+    ]
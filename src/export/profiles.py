@@ -0,0 +1,79 @@
+# Named encoder profiles.
+# A profile groups the encode settings of an export: x264 preset and CRF, an optional
+# maximum output height, the audio bitrate, the threads given to each ffmpeg
+# process and the pixel format (by default the encoder keeps the source's).
+# The "default" profile leaves everything to ffmpeg's own defaults, which is
+# what exports used before profiles existed.
+
+
+class EncoderProfile:
+    """Encode settings applied to every re-encoded clip of an export"""
+
+    def __init__(self, name, label, preset=None, crf=None, max_height=None, audio_bitrate=None,
+                 threads=None, video_codec="libx264", audio_codec="aac", pixel_format=None):
+        self.name = name
+        self.label = label
+        self.preset = preset
+        self.crf = crf
+        self.max_height = max_height
+        self.audio_bitrate = audio_bitrate
+        self.threads = threads
+        self.video_codec = video_codec
+        self.audio_codec = audio_codec
+        self.pixel_format = pixel_format
+
+    def video_args(self):
+        args = ["-c:v", self.video_codec]
+        if self.preset:
+            args += ["-preset", self.preset]
+        if self.crf is not None:
+            args += ["-crf", str(self.crf)]
+        if self.pixel_format:
+            args += ["-pix_fmt", self.pixel_format]
+        return args
+
+    def audio_args(self):
+        args = ["-c:a", self.audio_codec]
+        if self.audio_bitrate:
+            args += ["-b:a", self.audio_bitrate]
+        return args
+
+    def scale_filter(self):
+        """Filter limiting the output height (None when the source size is kept)"""
+        if not self.max_height:
+            return None
+        # -2 keeps the aspect ratio with an even width; smaller sources are not upscaled
+        return f"scale=-2:'min({self.max_height},ih)'"
+
+    def settings(self):
+        """Settings that change the content of an encode (used in export manifests)"""
+        settings = {"video_codec": self.video_codec, "audio_codec": self.audio_codec}
+        for key in ("preset", "crf", "max_height", "audio_bitrate", "pixel_format"):
+            value = getattr(self, key)
+            if value is not None:
+                settings[key] = value
+        return settings
+
+
+DEFAULT_PROFILE = "default"
+
+PROFILES = {
+    profile.name: profile for profile in [
+        EncoderProfile(DEFAULT_PROFILE, "Default"),
+        EncoderProfile("fast_preview", "Fast preview", preset="ultrafast", crf=28, max_height=480,
+                       audio_bitrate="96k", threads=1),
+        EncoderProfile("social_720p", "Social 720p", preset="veryfast", crf=23, max_height=720,
+                       audio_bitrate="128k", threads=2),
+        EncoderProfile("archive", "Archive", preset="slow", crf=18, audio_bitrate="192k", threads=4),
+    ]
+}
+
+
+def get_profile(profile):
+    """Resolve a profile name (or pass an EncoderProfile through)"""
+    if isinstance(profile, EncoderProfile):
+        return profile
+    try:
+        return PROFILES[profile or DEFAULT_PROFILE]
+    except KeyError:
+        raise ValueError(f"Unknown encoder profile: {profile}") from None
@@ -0,0 +1,130 @@
+# Machine-readable ffmpeg progress.
+# ffmpeg is run with "-progress pipe:1 -nostats", which writes blocks of key=value
+# lines to stdout, each block terminated by "progress=continue" or "progress=end".
+# Progress is computed from out_time against the real clip duration, and updates are
+# merged by a throttle before they cross into the GUI thread.
+import subprocess
+import threading
+import time
+from collections import deque
+
+# Maximum rate (Hz) at which progress signals are emitted to the GUI
+DEFAULT_PROGRESS_RATE = 10
+
+# Arguments that switch ffmpeg to the structured progress stream on stdout
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+
+# Error lines kept per ffmpeg run (a verbose run can print thousands)
+MAX_MESSAGES = 50
+
+
+class ProgressParser:
+    """Incremental parser for ffmpeg -progress output.
+
+    feed() returns a dict with the block's values each time a block completes,
+    otherwise None. Lines that are not key=value pairs (for example error messages
+    when stderr is merged into stdout) are kept in `messages`, the last MAX_MESSAGES.
+    """
+
+    def __init__(self):
+        self._block = {}
+        self.messages = deque(maxlen=MAX_MESSAGES)
+
+    def feed(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        key, sep, value = line.partition("=")
+        if not sep or " " in key:
+            self.messages.append(line)
+            return None
+        self._block[key] = value
+        if key != "progress":
+            return None
+        block, self._block = self._block, {}
+        return block
+
+    @staticmethod
+    def out_time(block):
+        """Output position in seconds from a progress block (None if unknown)"""
+        # out_time_ms is in microseconds too (long-standing ffmpeg quirk)
+        for key in ("out_time_us", "out_time_ms"):
+            value = block.get(key)
+            if value not in (None, "", "N/A"):
+                try:
+                    return max(0.0, int(value) / 1_000_000)
+                except ValueError:
+                    pass
+        return None
+
+    @staticmethod
+    def is_end(block):
+        return block.get("progress") == "end"
+
+
+class ProgressThrottle:
+    """Merges progress updates from many workers into at most `rate` emissions per second.
+
+    update() records the latest value per key and returns the merged changes when an
+    emission is due (or forced), None otherwise. Keys not yet emitted are kept pending,
+    so the final state is never lost as long as the last update is forced.
+    """
+
+    def __init__(self, rate=DEFAULT_PROGRESS_RATE, clock=time.monotonic):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.clock = clock
+        self._pending = {}
+        self._last_emit = None
+        self._lock = threading.Lock()
+
+    def update(self, key, value, force=False):
+        with self._lock:
+            self._pending[key] = value
+            now = self.clock()
+            if not force and self._last_emit is not None and now - self._last_emit < self.interval:
+                return None
+            self._last_emit = now
+            changes, self._pending = self._pending, {}
+            return changes
+
+    def flush(self):
+        """Return the pending updates regardless of the rate"""
+        with self._lock:
+            changes, self._pending = self._pending, {}
+            return changes
+
+
+def run_ffmpeg(command, on_position=None, on_block=None, on_start=None):
+    """Run an ffmpeg command that writes -progress blocks to stdout.
+
+    stderr is merged into stdout so there is a single pipe to drain; the lines
+    that are not progress keys are ffmpeg's error messages. on_position is called
+    with the output position in seconds after every progress block, on_block with
+    the raw block (frame count, speed...), on_start with the Popen once ffmpeg runs
+    (to stop it from another thread).
+    Returns (success, last error messages).
+    """
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        bufsize=1
+    )
+    if on_start is not None:
+        on_start(process)
+    parser = ProgressParser()
+    for line in process.stdout:
+        block = parser.feed(line)
+        if block is None:
+            continue
+        if on_block is not None:
+            on_block(block)
+        if on_position is None:
+            continue
+        seconds = parser.out_time(block)
+        if seconds is not None:
+            on_position(seconds)
+
+    returncode = process.wait()
+    return returncode == 0, list(parser.messages)[-5:]
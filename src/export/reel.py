@@ -0,0 +1,119 @@
+# Highlight reel export.
+# The reel is built straight from the tag list: segments are filtered by category,
+# ordered by time or by category, and joined with ffmpeg's concat demuxer using
+# inpoint/outpoint directives and stream copy, so nothing is re-encoded. Only when
+# the sources are not stream-compatible (different codecs, resolution or frame
+# rate) is the reel rendered with a single re-encoding pass of the concat filter.
+import bisect
+import os
+
+from src.export.progress import PROGRESS_ARGS
+from src.export.profiles import get_profile
+
+ORDER_TIME = "time"
+ORDER_CATEGORY = "category"
+
+
+def select_segments(tags, video_path, categories=None, order=ORDER_TIME, category_order=None):
+    """Pick the closed tags of the reel as (video_path, start, end, category) segments.
+
+    categories: iterable of categories to keep (None keeps all).
+    order: ORDER_TIME for match order, ORDER_CATEGORY to group by category
+    (following category_order when given) and by time inside each category.
+    """
+    wanted = set(categories) if categories is not None else None
+    segments = [
+        (tag.get("video_path", video_path), tag["start"], tag["end"], tag["category"])
+        for tag in tags
+        if tag["end"] is not None and (wanted is None or tag["category"] in wanted)
+    ]
+    if order == ORDER_CATEGORY:
+        rank = {category: n for n, category in enumerate(category_order or [])}
+        segments.sort(key=lambda seg: (rank.get(seg[3], len(rank)), seg[3], seg[1]))
+    else:
+        segments.sort(key=lambda seg: (seg[0], seg[1]))
+    return segments
+
+
+def segments_compatible(media_infos):
+    """True when every source can be stream-copied into the same output"""
+    signatures = {
+        (info.video_codec, info.audio_codec, info.width, info.height, round(info.fps, 3))
+        for info in media_infos
+    }
+    return len(signatures) <= 1
+
+
+def snap_to_keyframe(time_sec, keyframes):
+    """Previous keyframe at or before time_sec (time_sec itself when unknown)"""
+    i = bisect.bisect_right(keyframes or [], time_sec) - 1
+    return keyframes[i] if i >= 0 else time_sec
+
+
+def write_reel_list(segments, list_path, keyframes=None):
+    """Write an ffconcat playlist cutting every segment out of its source.
+
+    keyframes: optional {video_path: sorted keyframe times}; inpoints are moved
+    back to the previous keyframe so the copied segments start cleanly.
+    """
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        for video_path, start, end, _ in segments:
+            inpoint = snap_to_keyframe(start, (keyframes or {}).get(video_path))
+            # The list lives in a temporary directory, against which relative entries resolve
+            escaped = os.path.abspath(video_path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+            f.write(f"inpoint {inpoint:.6f}\n")
+            f.write(f"outpoint {end:.6f}\n")
+    return list_path
+
+
+def build_reel_copy_command(list_path, output_path):
+    """Join the playlist into the reel without re-encoding"""
+    return [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "concat", "-safe", "0",
+        "-i", list_path,
+        "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        "-f", "mp4",
+        *PROGRESS_ARGS,
+        output_path
+    ]
+
+
+def build_reel_reencode_command(segments, output_path, has_audio=True, target=None, threads=None, profile=None):
+    """Render the reel in one re-encoding pass with the concat filter.
+
+    Every segment is opened as its own input with input seeking, so only the
+    tagged ranges are decoded. target: optional (width, height, fps) every
+    segment is conformed to when the sources differ.
+    """
+    profile = get_profile(profile)
+    command = ["ffmpeg", "-y", "-v", "error"]
+    for video_path, start, end, _ in segments:
+        command += ["-ss", f"{start:.6f}", "-to", f"{end:.6f}", "-i", video_path]
+
+    parts, concat_inputs = [], ""
+    for k in range(len(segments)):
+        video_filter = "setpts=PTS-STARTPTS"
+        if target:
+            width, height, fps = target
+            video_filter = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},{video_filter}")
+        parts.append(f"[{k}:v]{video_filter}[v{k}]")
+        concat_inputs += f"[v{k}]"
+        if has_audio:
+            parts.append(f"[{k}:a]aresample=48000,aformat=channel_layouts=stereo,asetpts=PTS-STARTPTS[a{k}]")
+            concat_inputs += f"[a{k}]"
+    outputs = "[v][a]" if has_audio else "[v]"
+    parts.append(f"{concat_inputs}concat=n={len(segments)}:v=1:a={1 if has_audio else 0}{outputs}")
+
+    command += ["-filter_complex", ";".join(parts), "-map", "[v]"]
+    if has_audio:
+        command += ["-map", "[a]"]
+    command += profile.video_args() + profile.audio_args()
+    if threads:
+        command += ["-threads", str(threads)]
+    command += ["-f", "mp4", *PROGRESS_ARGS, output_path]
+    return command
@@ -0,0 +1,145 @@
+# Keyframe-aware "smart cut" export.
+# The bulk of a clip (from the first to the last keyframe inside it) is stream-copied and
+# only the partial GOPs at the edges are re-encoded. The pieces are written as MPEG-TS
+# segments, which carry codec parameters in-band, and joined with the concat demuxer.
+import bisect
+import os
+import subprocess
+
+from src.export.profiles import get_profile
+from src.export.progress import PROGRESS_ARGS
+
+# Export modes understood by the exporter
+MODE_REENCODE = "reencode"  # Re-encode the whole clip (slowest, always accurate)
+MODE_SMART = "smart"        # Re-encode only the partial GOPs at the edges, copy the rest
+MODE_KEYFRAME = "keyframe"  # Snap the start back to the previous keyframe and copy everything
+EXPORT_MODES = (MODE_REENCODE, MODE_SMART, MODE_KEYFRAME)
+
+# Edges shorter than this are not worth a separate encode
+MIN_SEGMENT = 0.05
+
+# 8-bit formats libx264 encodes as they come, so re-encoded edges and copied GOPs agree
+SPLICE_PIXEL_FORMATS = ("yuv420p", "yuvj420p", "yuv422p", "yuvj422p", "yuv444p", "yuvj444p")
+
+
+def smart_cut_problem(media_info, profile=None):
+    """Why the re-encoded edges could not be joined to the source's copied GOPs (None if they can)"""
+    profile = get_profile(profile)
+    if media_info is None:
+        return "the source could not be probed"
+    if media_info.video_codec != "h264":
+        return f"the source is {media_info.video_codec or 'not video'}, not h264"
+    if profile.video_codec != "libx264":
+        return f"profile {profile.name} encodes {profile.video_codec}"
+    pixel_format = profile.pixel_format or media_info.pixel_format
+    if media_info.pixel_format not in SPLICE_PIXEL_FORMATS or pixel_format != media_info.pixel_format:
+        return f"profile {profile.name} encodes {pixel_format} and the source is {media_info.pixel_format}"
+    return None
+
+
+def probe_keyframes(video_path):
+    """Return the sorted keyframe timestamps (seconds) of the first video stream.
+
+    Reads packet flags only, so nothing is decoded.
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        video_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    keyframes.sort()
+    return keyframes
+
+
+def plan_segments(start, end, keyframes, mode=MODE_SMART):
+    """Split [start, end] into ("encode" | "copy", seg_start, seg_end) pieces.
+
+    MODE_SMART re-encodes from start to the first keyframe and from the last keyframe
+    to end, copying the GOPs in between. MODE_KEYFRAME moves start back to the previous
+    keyframe and copies the whole clip.
+    """
+    if mode == MODE_KEYFRAME:
+        i = bisect.bisect_right(keyframes, start) - 1
+        snapped = keyframes[i] if i >= 0 else start
+        return [("copy", snapped, end)]
+
+    # First keyframe at or after start and last keyframe at or before end
+    first = bisect.bisect_left(keyframes, start)
+    last = bisect.bisect_right(keyframes, end) - 1
+    if first >= len(keyframes) or last < first or keyframes[last] - keyframes[first] < MIN_SEGMENT:
+        # No complete GOP inside the clip
+        return [("encode", start, end)]
+
+    head, tail = keyframes[first], keyframes[last]
+    segments = []
+    # Edges shorter than MIN_SEGMENT are absorbed by the copied part
+    if head - start >= MIN_SEGMENT:
+        segments.append(("encode", start, head))
+    if end - tail >= MIN_SEGMENT:
+        segments += [("copy", head, tail), ("encode", tail, end)]
+    else:
+        segments.append(("copy", head, end))
+    return segments
+
+
+def build_segment_command(video_path, kind, start, end, output_path, threads=None, profile=None):
+    """ffmpeg command that writes one segment as MPEG-TS.
+
+    Input seeking (-ss before -i) makes copied segments start on the keyframe and
+    keeps re-encoded edges frame-accurate. Audio is always re-encoded to AAC so
+    every segment shares the same audio codec. The encoder profile's preset and
+    CRF apply to the re-encoded edges; scaling does not, since edges and copied
+    GOPs must share the source resolution.
+    """
+    profile = get_profile(profile)
+    command = [
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{start:.6f}",
+        "-i", video_path,
+        "-t", f"{end - start:.6f}",
+        "-map", "0:v:0", "-map", "0:a?",
+    ]
+    if kind == "copy":
+        command += ["-c:v", "copy"]
+    else:
+        command += profile.video_args()
+        if threads:
+            command += ["-threads", str(threads)]
+    command += profile.audio_args()
+    command += [
+        "-avoid_negative_ts", "make_zero",
+        "-f", "mpegts",
+        *PROGRESS_ARGS,
+        output_path
+    ]
+    return command
+
+
+def write_concat_list(segment_paths, list_path):
+    """Write a concat demuxer playlist for the given files"""
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    return list_path
+
+
+def build_concat_command(list_path, output_path):
+    """ffmpeg command that joins the segments listed in list_path without re-encoding"""
+    return [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "concat", "-safe", "0",
+        "-i", list_path,
+        "-c", "copy",
+        "-f", "mp4",
+        *PROGRESS_ARGS,
+        output_path
+    ]
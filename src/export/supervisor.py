@@ -0,0 +1,126 @@
+# ffmpeg process supervisor.
+# Every ffmpeg child of an export runs as an asyncio subprocess on one event loop,
+# instead of each process tying up a Python thread blocked on its pipe. stdout (the
+# -progress stream) and stderr (error messages) are drained concurrently, so neither
+# pipe can fill up and block the child. A watchdog kills jobs that exceed their time
+# limit or stop producing output, and cancel() kills every running job at once.
+# asyncio subprocesses work with the default event loop on both Linux and Windows.
+import asyncio
+import subprocess
+
+from src.export.progress import ProgressParser
+
+# A job that writes nothing on either pipe for this long is considered stalled.
+# ffmpeg's -progress output arrives about twice per second while it works.
+DEFAULT_STALL_TIMEOUT = 60.0
+
+# How often the watchdog checks running jobs
+WATCHDOG_INTERVAL = 0.5
+
+
+class ProcessSupervisor:
+    """Runs ffmpeg commands as subprocesses of the calling event loop"""
+
+    def __init__(self, stall_timeout=DEFAULT_STALL_TIMEOUT, job_timeout=None):
+        self.stall_timeout = stall_timeout
+        self.job_timeout = job_timeout
+        self.cancelled = False
+        self._processes = set()
+        self._loop = None
+
+    async def run(self, command, on_position=None, timeout=None):
+        """Run one ffmpeg command to completion.
+
+        on_position is called with the output position in seconds for every
+        -progress block. timeout (or the supervisor's job_timeout) bounds the
+        whole run. Returns (success, last error messages), like run_ffmpeg.
+        """
+        if self.cancelled:
+            return False, ["cancelled"]
+        loop = self._loop = asyncio.get_running_loop()
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        self._processes.add(process)
+        if self.cancelled:
+            # cancel() came while the process was being spawned, before it could be killed
+            self._kill(process)
+        parser = ProgressParser()
+        started = last_output = loop.time()
+
+        async def drain(stream, is_progress):
+            nonlocal last_output
+            while True:
+                try:
+                    line = await stream.readline()
+                except ValueError:  # Line longer than the stream limit
+                    continue
+                if not line:
+                    return
+                last_output = loop.time()
+                text = line.decode("utf-8", errors="replace")
+                if not is_progress:
+                    if text.strip():
+                        parser.messages.append(text.strip())
+                    continue
+                block = parser.feed(text)
+                if block is not None and on_position is not None:
+                    seconds = parser.out_time(block)
+                    if seconds is not None:
+                        on_position(seconds)
+
+        async def watchdog():
+            limit = timeout or self.job_timeout
+            while True:
+                await asyncio.sleep(WATCHDOG_INTERVAL)
+                now = loop.time()
+                if self.stall_timeout and now - last_output > self.stall_timeout:
+                    return f"stalled (no output for {self.stall_timeout:.0f}s)"
+                if limit and now - started > limit:
+                    return f"timed out after {limit:.0f}s"
+
+        drains = asyncio.ensure_future(asyncio.gather(drain(process.stdout, True), drain(process.stderr, False)))
+        guard = asyncio.ensure_future(watchdog())
+        try:
+            await asyncio.wait({drains, guard}, return_when=asyncio.FIRST_COMPLETED)
+            reason = guard.result() if guard.done() else None
+            if reason:
+                self._kill(process)
+            # Once killed the pipes close, so the drains end as well
+            await drains
+            returncode = await process.wait()
+        finally:
+            guard.cancel()
+            self._processes.discard(process)
+
+        messages = list(parser.messages)[-5:]
+        if self.cancelled:
+            return False, messages + ["cancelled"]
+        if reason:
+            return False, messages + [f"ffmpeg {reason}"]
+        return returncode == 0, messages
+
+    @staticmethod
+    def _kill(process):
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+    def cancel(self):
+        """Kill every running job and refuse new ones. Safe to call from any thread."""
+        self.cancelled = True
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._kill_all)
+        except RuntimeError:  # The loop stopped in the meantime
+            pass
+
+    def _kill_all(self):
+        for process in list(self._processes):
+            self._kill(process)
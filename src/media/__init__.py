@@ -0,0 +1 @@
+# Media analysis helpers (ffprobe metadata and derived caches)
@@ -0,0 +1,100 @@
+# Keyframe index.
+# Keyframe timestamps of the first video stream are read once from packet metadata
+# (ffprobe decodes nothing) and kept as a sorted float64 NumPy array. The array is
+# saved as .npy in the cache directory, keyed by source fingerprint, and every lookup
+# is a binary search. The index is used to snap tag edges and player seeks to
+# keyframes, and gives exports their copy-safe cut points.
+import os
+import threading
+
+import numpy as np
+
+from src.config import get_cache_dir
+from src.export.smart_cut import probe_keyframes
+from src.media.media_info import file_fingerprint
+from src.utils.logger import AppLogger
+
+SNAP_PREVIOUS = "previous"
+SNAP_NEXT = "next"
+SNAP_NEAREST = "nearest"
+
+
+class KeyframeIndex:
+    """Sorted keyframe times (seconds) with O(log n) lookups"""
+
+    def __init__(self, times):
+        self.times = np.sort(np.asarray(times, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.times)
+
+    def previous(self, seconds):
+        """Last keyframe at or before seconds (None if there is none)"""
+        i = int(np.searchsorted(self.times, seconds, side="right")) - 1
+        return float(self.times[i]) if i >= 0 else None
+
+    def next(self, seconds):
+        """First keyframe at or after seconds (None if there is none)"""
+        i = int(np.searchsorted(self.times, seconds, side="left"))
+        return float(self.times[i]) if i < len(self.times) else None
+
+    def nearest(self, seconds):
+        candidates = [t for t in (self.previous(seconds), self.next(seconds)) if t is not None]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda t: abs(t - seconds))
+
+    def snap(self, seconds, direction=SNAP_NEAREST):
+        """Keyframe next to seconds in the given direction (seconds itself when there is none)"""
+        lookup = {SNAP_PREVIOUS: self.previous, SNAP_NEXT: self.next, SNAP_NEAREST: self.nearest}[direction]
+        snapped = lookup(seconds)
+        return seconds if snapped is None else snapped
+
+    def tolist(self):
+        return self.times.tolist()
+
+    def save(self, path):
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, self.times, allow_pickle=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Index saved by save(); None if the file is missing or unreadable"""
+        try:
+            return cls(np.load(path, allow_pickle=False))
+        except (OSError, ValueError):
+            return None
+
+
+def keyframe_index_path(fingerprint):
+    return os.path.join(get_cache_dir("keyframes"), f"{fingerprint}.npy")
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_keyframe_index(video_path, fingerprint=None):
+    """Keyframe index of the video, built with ffprobe the first time and cached.
+
+    Raises OSError or subprocess.CalledProcessError when ffprobe cannot read the file.
+    """
+    fingerprint = fingerprint or file_fingerprint(video_path)
+    with _indexes_lock:
+        index = _indexes.get(fingerprint)
+    if index is not None:
+        return index
+
+    path = keyframe_index_path(fingerprint)
+    index = KeyframeIndex.load(path)
+    if index is None:
+        AppLogger.get_logger().info(f"Indexing keyframes of {video_path}")
+        index = KeyframeIndex(probe_keyframes(video_path))
+        try:
+            index.save(path)
+        except OSError as e:
+            AppLogger.get_logger().warning(f"Could not cache keyframe index {path}: {e}")
+    with _indexes_lock:
+        _indexes[fingerprint] = index
+    return index
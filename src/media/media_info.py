@@ -0,0 +1,197 @@
+# ffprobe-backed media metadata service.
+# Each file is probed once (duration, frame rate, codecs, keyframe count, stream layout)
+# and the result is stored in an on-disk JSON cache keyed by a cheap file fingerprint,
+# so reopening a known file, even after it was moved or renamed, costs no probing.
+import hashlib
+import json
+import os
+import subprocess
+import threading
+
+from src.config import get_cache_dir
+from src.utils.logger import AppLogger
+
+# Bytes hashed from the head and the tail of the file for the fingerprint
+FINGERPRINT_CHUNK = 64 * 1024
+
+
+def file_fingerprint(path):
+    """Cheap content fingerprint: file size plus a hash of its first and last 64 KiB"""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_CHUNK))
+        if size > FINGERPRINT_CHUNK:
+            f.seek(max(FINGERPRINT_CHUNK, size - FINGERPRINT_CHUNK))
+            digest.update(f.read(FINGERPRINT_CHUNK))
+    return digest.hexdigest()
+
+
+def _parse_rate(rate):
+    """Parse an ffprobe rational such as '50/1' or '30000/1001'"""
+    try:
+        num, _, den = rate.partition("/")
+        value = float(num) / float(den or 1)
+        return value if value > 0 else None
+    except (ValueError, ZeroDivisionError, AttributeError):
+        return None
+
+
+class MediaInfo:
+    """Probed metadata of a media file"""
+
+    def __init__(self, fingerprint, duration=0.0, fps=25.0, width=0, height=0,
+                 video_codec=None, audio_codec=None, keyframe_count=0, streams=None, path=None,
+                 pixel_format=None):
+        self.fingerprint = fingerprint
+        self.duration = duration
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.video_codec = video_codec
+        self.audio_codec = audio_codec
+        self.pixel_format = pixel_format
+        self.keyframe_count = keyframe_count
+        self.streams = streams or []  # [{"index", "type", "codec"}]
+        self.path = path
+
+    @property
+    def has_audio(self):
+        return any(stream["type"] == "audio" for stream in self.streams)
+
+    @property
+    def total_frames(self):
+        return int(self.duration * self.fps)
+
+    def to_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "duration": self.duration,
+            "fps": self.fps,
+            "width": self.width,
+            "height": self.height,
+            "video_codec": self.video_codec,
+            "audio_codec": self.audio_codec,
+            "pixel_format": self.pixel_format,
+            "keyframe_count": self.keyframe_count,
+            "streams": self.streams,
+        }
+
+    @classmethod
+    def from_dict(cls, data, path=None):
+        return cls(path=path, **data)
+
+    @classmethod
+    def from_ffprobe(cls, fingerprint, probe, keyframe_count=0, path=None):
+        """Build from the JSON output of ffprobe -show_format -show_streams"""
+        streams = []
+        video = audio = None
+        for stream in probe.get("streams", []):
+            codec_type = stream.get("codec_type")
+            streams.append({"index": stream.get("index"), "type": codec_type, "codec": stream.get("codec_name")})
+            if codec_type == "video" and video is None:
+                video = stream
+            elif codec_type == "audio" and audio is None:
+                audio = stream
+
+        fps = None
+        if video:
+            fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+        return cls(
+            fingerprint,
+            duration=float(probe.get("format", {}).get("duration") or 0.0),
+            fps=fps or 25.0,
+            width=int(video.get("width", 0)) if video else 0,
+            height=int(video.get("height", 0)) if video else 0,
+            video_codec=video.get("codec_name") if video else None,
+            audio_codec=audio.get("codec_name") if audio else None,
+            pixel_format=video.get("pix_fmt") if video else None,
+            keyframe_count=keyframe_count,
+            streams=streams,
+            path=path,
+        )
+
+
+def probe_media(path):
+    """Run ffprobe on path and return the parsed JSON"""
+    command = [
+        "ffprobe", "-v", "error",
+        "-show_format", "-show_streams",
+        "-of", "json",
+        path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def count_keyframes(path, fingerprint=None):
+    """Number of video keyframes, from the cached keyframe index (built on first use)"""
+    # Imported here: the keyframe index uses file_fingerprint from this module
+    from src.media.keyframes import get_keyframe_index
+    return len(get_keyframe_index(path, fingerprint))
+
+
+class MediaInfoCache:
+    """Thread-safe fingerprint -> MediaInfo cache persisted as JSON"""
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.path.join(get_cache_dir(), "media_info.json")
+        self.logger = AppLogger.get_logger()
+        self._lock = threading.Lock()
+        self._by_path = {}  # (path, mtime, size) -> MediaInfo
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def get(self, path):
+        """Return the MediaInfo for path, probing it only if it is not cached"""
+        stat = os.stat(path)
+        path_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if path_key in self._by_path:
+                return self._by_path[path_key]
+
+        fingerprint = file_fingerprint(path)
+        with self._lock:
+            data = self._entries.get(fingerprint)
+        # Entries cached before the pixel format was probed are probed again
+        if data is not None and "pixel_format" in data:
+            info = MediaInfo.from_dict(data, path=path)
+        else:
+            self.logger.info(f"Probing media file {path}")
+            info = MediaInfo.from_ffprobe(fingerprint, probe_media(path), count_keyframes(path, fingerprint),
+                                          path=path)
+            with self._lock:
+                self._entries[fingerprint] = info.to_dict()
+                try:
+                    self._save()
+                except OSError as e:
+                    self.logger.warning(f"Could not write media cache: {e}")
+
+        with self._lock:
+            self._by_path[path_key] = info
+        return info
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_media_info(path):
+    """Metadata for path from the shared application cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MediaInfoCache()
+    return _default_cache.get(path)
@@ -0,0 +1,153 @@
+# Low-resolution editing proxies.
+# Decoding 4K/50p long-GOP video is what makes seeking and pause/play sluggish on
+# laptops. For large sources a 540p copy with a keyframe every few frames is
+# transcoded in the background and used by the player only. The proxy covers the
+# whole source at the same frame rate, so its timestamps are source time: tags are
+# recorded against it unchanged, and exports always read the original file.
+# Proxies are cached by source fingerprint and reused the next time it is opened.
+import os
+import threading
+
+from src.config import get_cache_dir
+from src.export.progress import PROGRESS_ARGS, run_ffmpeg
+from src.utils.logger import AppLogger
+
+# Height of the proxy picture
+PROXY_HEIGHT = 540
+
+# Frames between keyframes: a seek decodes at most this many frames
+PROXY_GOP = 10
+
+# Sources up to this height play well enough without a proxy
+MIN_SOURCE_HEIGHT = 720
+
+_in_progress = set()
+_in_progress_lock = threading.Lock()
+
+
+class ProxyJob:
+    """Handle of a background proxy transcode: cancel() stops it from any thread"""
+
+    def __init__(self):
+        self.cancelled = False
+        self._process = None
+        self._lock = threading.Lock()
+        self._idle = threading.Event()  # Cleared while ffmpeg runs for this job
+        self._idle.set()
+
+    def _begin(self):
+        """Mark the transcode as running; False when the job was already cancelled"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._idle.clear()
+            return True
+
+    def _started(self, process):
+        with self._lock:
+            self._process = process
+            if self.cancelled:
+                process.terminate()
+
+    def _finished(self):
+        with self._lock:
+            self._process = None
+            self._idle.set()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._process is not None and self._process.poll() is None:
+                self._process.terminate()
+
+    def wait(self, timeout=None):
+        """Wait until ffmpeg exited and its partial output was removed"""
+        return self._idle.wait(timeout)
+
+
+def proxy_path(info, height=PROXY_HEIGHT):
+    """Cache path of the proxy for the source described by info (a MediaInfo)"""
+    return os.path.join(get_cache_dir("proxies"), f"{info.fingerprint}_{height}p.mp4")
+
+
+def needs_proxy(info, min_height=MIN_SOURCE_HEIGHT):
+    return info.height > min_height
+
+
+def find_proxy(info, height=PROXY_HEIGHT):
+    """Path of an existing proxy for the source, None when there is none yet"""
+    path = proxy_path(info, height)
+    return path if os.path.exists(path) else None
+
+
+def build_proxy_command(source_path, output_path, height=PROXY_HEIGHT, gop=PROXY_GOP):
+    """Transcode the whole source to a small, fast-seeking H.264 file"""
+    return [
+        "ffmpeg", "-y", "-v", "error",
+        "-i", source_path,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"scale=-2:{height}",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "26", "-tune", "fastdecode",
+        "-g", str(gop), "-keyint_min", str(gop), "-bf", "0",
+        "-c:a", "aac", "-b:a", "96k",
+        "-movflags", "+faststart",
+        "-f", "mp4",
+        *PROGRESS_ARGS,
+        output_path
+    ]
+
+
+def create_proxy(source_path, info, on_progress=None, height=PROXY_HEIGHT, job=None):
+    """Return the proxy of source_path, transcoding it first when it is not cached.
+
+    Blocks until the proxy exists; meant to run off the GUI thread. on_progress is
+    called with 0-100 while transcoding; job (a ProxyJob) lets another thread stop
+    it. Returns None when the transcode failed or was cancelled, or another thread
+    is already creating the same proxy.
+    """
+    path = proxy_path(info, height)
+    if os.path.exists(path):
+        return path
+    job = job or ProxyJob()
+    with _in_progress_lock:
+        if path in _in_progress:
+            return None
+        _in_progress.add(path)
+    if not job._begin():
+        with _in_progress_lock:
+            _in_progress.discard(path)
+        return None
+
+    logger = AppLogger.get_logger()
+    logger.info(f"Creating {height}p proxy for {source_path}")
+    # Written under a temporary name so an interrupted transcode is never reused
+    tmp_path = path + ".part"
+
+    def on_position(seconds):
+        if on_progress is not None and info.duration > 0:
+            on_progress(min(99, int(100 * seconds / info.duration)))
+
+    try:
+        success, messages = run_ffmpeg(build_proxy_command(source_path, tmp_path, height), on_position,
+                                       on_start=job._started)
+        if not success:
+            if job.cancelled:
+                logger.info(f"Proxy transcode cancelled for {source_path}")
+            else:
+                logger.error(f"Proxy transcode failed for {source_path}: {' | '.join(messages)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.error(f"Could not create proxy for {source_path}: {e}")
+        return None
+    finally:
+        with _in_progress_lock:
+            _in_progress.discard(path)
+        job._finished()
+
+    if on_progress is not None:
+        on_progress(100)
+    logger.info(f"Proxy ready: {path}")
+    return path
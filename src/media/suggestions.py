@@ -0,0 +1,288 @@
+# Automatic tag suggestions.
+# A background pass proposes candidate tag intervals from two cues:
+# - loudness spikes: crowd noise and whistles rise well above the running level of the
+#   match. Audio is streamed as in the waveform and reduced to RMS per 50 ms bin.
+# - shot changes: a 64x36 grey frame stream at a few frames per second is diffed with
+#   NumPy. Bursts of cuts (replays, close-ups) become suggestions of their own, and
+#   single cuts near a loudness spike move its start to the cut.
+# The video is split into fixed time ranges that are decoded in separate processes.
+# Detection then runs over the whole match, because the running level needs context
+# across range boundaries.
+import math
+import os
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from src.media.waveform import BIN_SECONDS, build_pcm_command, stream_bins
+
+# Length of the time ranges analysed by each process
+RANGE_SECONDS = 300.0
+
+# How often a running analysis checks whether it was cancelled
+CANCEL_POLL_SECONDS = 0.2
+
+# Grey frame stream used for shot changes
+SCENE_FPS = 5
+FRAME_WIDTH = 64
+FRAME_HEIGHT = 36
+
+# A bin is loud when it is this many dB above the running level...
+SPIKE_DB = 6.0
+# ...the running level being its mean over this window...
+BASELINE_SECONDS = 30.0
+# ...and it is not near silence
+SILENCE_DB = -50.0
+# Loud stretches shorter than this are ignored, closer than MERGE_SECONDS are joined
+MIN_SPIKE_SECONDS = 0.3
+MERGE_SECONDS = 2.0
+
+# The play usually happens before the crowd reacts
+PRE_ROLL = 8.0
+POST_ROLL = 4.0
+# A cut this close to the start of a spike interval becomes its start
+SNAP_SECONDS = 3.0
+
+# A frame is a cut when its mean difference to the previous frame (0-255) exceeds both
+# this value and SCENE_MEDIAN_FACTOR times the typical difference
+SCENE_MIN_DIFF = 20.0
+SCENE_MEDIAN_FACTOR = 4.0
+# CLUSTER_CUTS cuts within CLUSTER_SECONDS make a scene suggestion
+CLUSTER_CUTS = 3
+CLUSTER_SECONDS = 10.0
+
+KIND_AUDIO = "audio"
+KIND_SCENE = "scene"
+
+
+class Suggestion:
+    """Candidate tag interval, pending until the user accepts or rejects it"""
+
+    PENDING = "pending"
+    ACCEPTED = "accepted"
+    REJECTED = "rejected"
+
+    def __init__(self, start, end, kind, score=0.0):
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.score = score
+        self.state = Suggestion.PENDING
+
+    def overlaps(self, other):
+        return self.start <= other.end and other.start <= self.end
+
+    def to_dict(self):
+        return {"start": round(self.start, 3), "end": round(self.end, 3), "kind": self.kind,
+                "score": round(float(self.score), 2), "state": self.state}
+
+    def __repr__(self):
+        return f"Suggestion({self.start:.2f}-{self.end:.2f}, {self.kind}, {self.state})"
+
+
+def plan_ranges(duration, range_seconds=RANGE_SECONDS):
+    """[(start, length)] ranges covering [0, duration]"""
+    count = max(1, math.ceil(duration / range_seconds))
+    return [(i * range_seconds, min(range_seconds, duration - i * range_seconds)) for i in range(count)]
+
+
+def build_frames_command(video_path, start, duration):
+    """Decode [start, start + duration] to raw 8-bit grey frames on stdout"""
+    return [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{start:.3f}", "-i", video_path, "-t", f"{duration:.3f}",
+        "-map", "0:v:0",
+        "-vf", f"fps={SCENE_FPS},scale={FRAME_WIDTH}:{FRAME_HEIGHT},format=gray",
+        "-f", "rawvideo", "-"
+    ]
+
+
+def frame_differences(stream, previous=None):
+    """Mean absolute difference of each frame read from stream to the one before it.
+
+    previous is the frame before the first one read (the first difference is 0 without it).
+    """
+    frame_bytes = FRAME_WIDTH * FRAME_HEIGHT
+    batch = frame_bytes * SCENE_FPS * 60
+    diffs = []
+    while True:
+        data = stream.read(batch)
+        if len(data) < frame_bytes:
+            break
+        frames = np.frombuffer(data[:len(data) // frame_bytes * frame_bytes], dtype=np.uint8)
+        frames = frames.reshape(-1, frame_bytes).astype(np.int16)
+        if previous is None:
+            previous = frames[0]
+        stacked = np.vstack([previous[None, :], frames])
+        diffs.append(np.abs(np.diff(stacked, axis=0)).mean(axis=1))
+        previous = frames[-1]
+    return np.concatenate(diffs).astype(np.float32) if diffs else np.zeros(0, dtype=np.float32)
+
+
+def analyze_range(video_path, start, duration):
+    """Decode one time range; runs in a worker process.
+
+    Returns (start, RMS per BIN_SECONDS bin, frame differences at SCENE_FPS).
+    """
+    bins, _ = stream_bins(build_pcm_command(video_path, start, duration))
+    rms = bins[:, 2] if bins is not None and len(bins) else np.zeros(0, dtype=np.float32)
+
+    process = subprocess.Popen(build_frames_command(video_path, start, duration), stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        diffs = frame_differences(process.stdout)
+    finally:
+        process.stdout.close()
+        process.wait()
+    if len(diffs):
+        # The first frame of a range has nothing before it in this process
+        diffs[0] = 0.0
+    return start, rms, diffs
+
+
+def _fit(values, count):
+    """Pad with zeros or trim to exactly count values"""
+    if len(values) >= count:
+        return values[:count]
+    return np.concatenate([values, np.zeros(count - len(values), dtype=values.dtype)])
+
+
+def _runs(mask):
+    """(start, end) index pairs of the runs of True in mask, end exclusive"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def loudness_spikes(rms, bin_seconds=BIN_SECONDS):
+    """[(start, end, score)] of stretches well above the running loudness, in seconds.
+
+    score is the highest excess over the running level, in dB.
+    """
+    if not len(rms):
+        return []
+    db = 20 * np.log10(np.maximum(rms, 1e-5))
+    window = max(1, int(BASELINE_SECONDS / bin_seconds))
+    padded = np.pad(db, (window // 2, window - window // 2 - 1), mode="edge")
+    cumsum = np.concatenate([[0.0], np.cumsum(padded)])
+    baseline = (cumsum[window:] - cumsum[:-window]) / window
+    excess = db - baseline
+    starts, ends = _runs((excess > SPIKE_DB) & (db > SILENCE_DB))
+
+    spikes = []
+    for start, end in zip(starts, ends):
+        if spikes and (start - spikes[-1][1]) * bin_seconds < MERGE_SECONDS:
+            spikes[-1][1] = end
+        else:
+            spikes.append([start, end])
+    return [(start * bin_seconds, end * bin_seconds, float(excess[start:end].max()))
+            for start, end in spikes if (end - start) * bin_seconds >= MIN_SPIKE_SECONDS]
+
+
+def scene_cuts(diffs, fps=SCENE_FPS):
+    """Times (seconds) of the frames that start a new shot"""
+    if not len(diffs):
+        return np.zeros(0)
+    threshold = max(SCENE_MIN_DIFF, SCENE_MEDIAN_FACTOR * float(np.median(diffs)))
+    return np.flatnonzero(diffs > threshold) / fps
+
+
+def cut_clusters(cuts):
+    """[(start, end, cut count)] of bursts with at least CLUSTER_CUTS cuts in CLUSTER_SECONDS"""
+    cuts = np.asarray(cuts)
+    if len(cuts) < CLUSTER_CUTS:
+        return []
+    # Index past the last cut of the window starting at each cut
+    window_ends = np.searchsorted(cuts, cuts + CLUSTER_SECONDS, side="right")
+    clusters = []
+    for first in np.flatnonzero(window_ends - np.arange(len(cuts)) >= CLUSTER_CUTS):
+        last = window_ends[first] - 1
+        if clusters and first <= clusters[-1][1]:
+            clusters[-1][1] = max(clusters[-1][1], last)
+        else:
+            clusters.append([first, last])
+    return [(float(cuts[first]), float(cuts[last]), int(last - first + 1)) for first, last in clusters]
+
+
+def merge_suggestions(suggestions):
+    """Join overlapping suggestions; the kinds of merged ones are combined ("audio+scene")"""
+    merged = []
+    for suggestion in sorted(suggestions, key=lambda s: s.start):
+        if merged and merged[-1].overlaps(suggestion):
+            last = merged[-1]
+            last.end = max(last.end, suggestion.end)
+            last.score = max(last.score, suggestion.score)
+            kinds = sorted(set(last.kind.split("+")) | set(suggestion.kind.split("+")))
+            last.kind = "+".join(kinds)
+        else:
+            merged.append(suggestion)
+    return merged
+
+
+def suggest_from_analysis(rms, diffs, duration, bin_seconds=BIN_SECONDS, fps=SCENE_FPS):
+    """Suggestions from the RMS bins and frame differences of the whole video"""
+    cuts = scene_cuts(diffs, fps)
+    suggestions = []
+    for start, end, score in loudness_spikes(rms, bin_seconds):
+        begin = max(0.0, start - PRE_ROLL)
+        near = cuts[np.abs(cuts - begin) <= SNAP_SECONDS] if len(cuts) else cuts
+        if len(near):
+            begin = float(near[np.argmin(np.abs(near - begin))])
+        suggestions.append(Suggestion(begin, min(duration, end + POST_ROLL), KIND_AUDIO, score))
+    for start, end, count in cut_clusters(cuts):
+        suggestions.append(Suggestion(float(start), min(duration, float(end) + 1.0), KIND_SCENE, float(count)))
+    return merge_suggestions(suggestions)
+
+
+def _stop_workers(executor):
+    """Drop the queued ranges and terminate the worker processes.
+
+    Their ffmpeg decodes write to a pipe the dead worker no longer reads, so they exit
+    too. Thread pools (used in tests) have no processes; their ranges just finish.
+    """
+    # ProcessPoolExecutor has no public way to stop running work, and shutdown() forgets
+    # its processes, so take them first
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+
+def default_workers():
+    # Each worker runs two ffmpeg decodes, one after the other
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+def suggest_tags(video_path, duration, workers=None, on_progress=None, is_cancelled=None,
+                 executor_class=ProcessPoolExecutor):
+    """Analyse the whole video and return its suggestions, sorted by start.
+
+    Time ranges are analysed in parallel processes. on_progress is called with 0-100
+    as ranges finish. is_cancelled is polled every CANCEL_POLL_SECONDS; once it returns
+    True the decodes are stopped and None is returned.
+    """
+    ranges = plan_ranges(duration)
+    results = {}
+    executor = executor_class(max_workers=min(len(ranges), workers or default_workers()))
+    try:
+        pending = {executor.submit(analyze_range, video_path, start, length) for start, length in ranges}
+        while pending:
+            done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, rms, diffs = future.result()
+                results[start] = (rms, diffs)
+                if on_progress is not None:
+                    on_progress(int(100 * len(results) / len(ranges)))
+            if is_cancelled is not None and is_cancelled():
+                _stop_workers(executor)
+                return None
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    rms = np.concatenate([_fit(results[start][0], int(round(length / BIN_SECONDS)))
+                          for start, length in ranges])
+    diffs = np.concatenate([_fit(results[start][1], int(math.ceil(length * SCENE_FPS)))
+                            for start, length in ranges])
+    return suggest_from_analysis(rms, diffs, duration)
@@ -0,0 +1,194 @@
+# Filmstrip thumbnails.
+# Frames are extracted by ffmpeg on a small worker pool and handed back as JPEG bytes,
+# so nothing here touches Qt and painting never waits on a decode. Thumbnails are
+# kept in a bounded in-memory LRU in front of an on-disk cache keyed by source
+# fingerprint, height and time, so resizing the timeline or reopening a video reuses
+# what was already extracted. Sample times snap to a fixed ladder of intervals for
+# the same reason: nearby widths ask for the same frames.
+import math
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import get_cache_dir
+from src.utils.logger import AppLogger
+
+# Height of the thumbnails in pixels
+THUMB_HEIGHT = 36
+
+# Seconds between thumbnails the filmstrip can use, smallest first
+SAMPLE_STEPS = [1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800]
+
+# Thumbnails kept in memory (a 36px JPEG is a few KB)
+MEMORY_CACHE_SIZE = 1024
+
+# ffmpeg processes extracting thumbnails at the same time
+EXTRACT_WORKERS = 2
+
+
+def sample_times(duration, width, thumb_width, start=0.0, end=None):
+    """Thumbnail times for a strip width pixels wide showing [start, end] of the video.
+
+    Returns (times, step): one thumbnail every step seconds, step being the smallest
+    interval of SAMPLE_STEPS that leaves at least thumb_width pixels per thumbnail.
+    """
+    end = duration if end is None else min(end, duration)
+    span = end - start
+    if span <= 0 or width <= 0 or thumb_width <= 0:
+        return [], 0
+    wanted = span / max(1, width // thumb_width)
+    step = next((s for s in SAMPLE_STEPS if s >= wanted), None)
+    if step is None:
+        step = math.ceil(wanted / SAMPLE_STEPS[-1]) * SAMPLE_STEPS[-1]
+    first = math.floor(start / step) * step
+    count = math.ceil((end - first) / step)
+    return [first + i * step for i in range(count)], step
+
+
+def build_thumbnail_command(video_path, seconds, height=THUMB_HEIGHT):
+    """Decode the frame at seconds and write it as a JPEG to stdout"""
+    return [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{seconds:.3f}",
+        "-i", video_path,
+        "-frames:v", "1",
+        "-vf", f"scale=-2:{height}",
+        "-q:v", "5",
+        "-f", "image2pipe", "-c:v", "mjpeg",
+        "-"
+    ]
+
+
+def extract_thumbnail(video_path, seconds, height=THUMB_HEIGHT):
+    """JPEG bytes of the frame at seconds (None when ffmpeg fails)"""
+    result = subprocess.run(build_thumbnail_command(video_path, seconds, height),
+                            stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return result.stdout
+
+
+class ThumbnailCache:
+    """Bounded in-memory LRU of JPEG thumbnails backed by the on-disk cache.
+
+    Keys are (fingerprint, height, milliseconds).
+    """
+
+    def __init__(self, max_entries=MEMORY_CACHE_SIZE, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir or get_cache_dir("thumbnails")
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key):
+        fingerprint, height, ms = key
+        return os.path.join(self.cache_dir, fingerprint, f"{height}_{ms}.jpg")
+
+    def get_memory(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def get(self, key):
+        """Thumbnail from memory, else from disk (promoted to memory); None if absent"""
+        data = self.get_memory(key)
+        if data is not None:
+            return data
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        self._remember(key, data)
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            AppLogger.get_logger().warning(f"Could not cache thumbnail {path}: {e}")
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class ThumbnailExtractor:
+    """Serves thumbnails from the cache and extracts missing ones on a worker pool"""
+
+    def __init__(self, cache=None, workers=EXTRACT_WORKERS, extract=extract_thumbnail):
+        self.cache = cache if cache is not None else ThumbnailCache()
+        self._extract = extract
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def request(self, video_path, fingerprint, seconds, callback, height=THUMB_HEIGHT):
+        """Return the thumbnail at seconds if it is in memory, else None.
+
+        A missing thumbnail is loaded from disk or extracted in the background, and
+        callback(seconds, data) is then called from a worker thread (data is None
+        when extraction failed). Never blocks.
+        """
+        key = (fingerprint, height, int(round(seconds * 1000)))
+        data = self.cache.get_memory(key)
+        if data is not None:
+            return data
+        with self._lock:
+            if key not in self._pending:
+                self._pending[key] = self._executor.submit(
+                    self._load, key, video_path, seconds, height, callback)
+        return None
+
+    def _load(self, key, video_path, seconds, height, callback):
+        try:
+            data = self.cache.get(key)
+            if data is None:
+                data = self._extract(video_path, seconds, height)
+                if data is not None:
+                    self.cache.put(key, data)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        callback(seconds, data)
+
+    def cancel_pending(self):
+        """Drop requests that have not started (e.g. the strip was laid out again)"""
+        with self._lock:
+            for key, future in list(self._pending.items()):
+                if future.cancel():
+                    del self._pending[key]
+
+    def shutdown(self):
+        self.cancel_pending()
+        self._executor.shutdown(wait=False)
+
+
+_default_extractor = None
+_default_extractor_lock = threading.Lock()
+
+
+def get_thumbnail_extractor():
+    """Extractor shared by every filmstrip of the application"""
+    global _default_extractor
+    with _default_extractor_lock:
+        if _default_extractor is None:
+            _default_extractor = ThumbnailExtractor()
+    return _default_extractor
@@ -0,0 +1,229 @@
+# Audio waveform overview.
+# ffmpeg decodes the first audio stream to mono float PCM at a low sample rate and the
+# samples are reduced with NumPy, chunk by chunk, to min/max/RMS per 50 ms bin, so
+# memory stays bounded however long the match is. Coarser levels of a pyramid are
+# built by merging pairs of bins; drawing picks the level with about one bin per
+# pixel. Only the finest level is saved (as int16) in the cache directory, keyed by
+# source fingerprint; the rest of the pyramid is rebuilt from it on load.
+import os
+import struct
+import subprocess
+
+import numpy as np
+
+from src.config import get_cache_dir
+from src.utils.logger import AppLogger
+
+# Loudness does not need more than this
+SAMPLE_RATE = 8000
+
+# Duration of the bins of the finest level
+BIN_SECONDS = 0.05
+BIN_SAMPLES = int(SAMPLE_RATE * BIN_SECONDS)
+
+# Bins reduced per read from ffmpeg (60 s of audio, under 2 MB of samples)
+CHUNK_BINS = 1200
+
+# Cache file: magic, format version, bin seconds, bin count, then (min, max, rms) int16 triplets
+CACHE_HEADER = struct.Struct("<4sHfI")
+CACHE_MAGIC = b"VTWF"
+CACHE_VERSION = 1
+INT16_SCALE = 32767.0
+
+
+def bin_stats(samples):
+    """(n, 3) float32 array of min, max and RMS of consecutive BIN_SAMPLES-sample bins.
+
+    A trailing partial bin is reduced on its own.
+    """
+    full = len(samples) // BIN_SAMPLES * BIN_SAMPLES
+    rows = []
+    if full:
+        bins = samples[:full].reshape(-1, BIN_SAMPLES)
+        rows.append(np.stack([bins.min(axis=1), bins.max(axis=1),
+                              np.sqrt(np.mean(np.square(bins), axis=1))], axis=1))
+    if full < len(samples):
+        rest = samples[full:]
+        rows.append(np.array([[rest.min(), rest.max(), np.sqrt(np.mean(np.square(rest)))]]))
+    if not rows:
+        return np.zeros((0, 3), dtype=np.float32)
+    return np.concatenate(rows).astype(np.float32)
+
+
+def merge_pairs(bins):
+    """Next pyramid level: each bin covers two bins of the given level"""
+    even = len(bins) // 2 * 2
+    pairs = bins[:even].reshape(-1, 2, 3)
+    merged = np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1),
+                       np.sqrt(np.mean(np.square(pairs[:, :, 2]), axis=1))], axis=1)
+    if even < len(bins):
+        merged = np.concatenate([merged, bins[even:]])
+    return merged.astype(np.float32)
+
+
+class Waveform:
+    """Min/max/RMS pyramid of a video's audio"""
+
+    def __init__(self, bins, bin_seconds=BIN_SECONDS):
+        self.bin_seconds = bin_seconds
+        self.levels = [np.asarray(bins, dtype=np.float32).reshape(-1, 3)]
+        while len(self.levels[-1]) > 1:
+            self.levels.append(merge_pairs(self.levels[-1]))
+
+    @property
+    def duration(self):
+        return len(self.levels[0]) * self.bin_seconds
+
+    def level_seconds(self, level):
+        return self.bin_seconds * (2 ** level)
+
+    def level_for(self, pixels_per_second):
+        """Coarsest level that still has at least one bin per pixel"""
+        level = 0
+        while level + 1 < len(self.levels) and self.level_seconds(level + 1) * pixels_per_second <= 1:
+            level += 1
+        return level
+
+    def columns(self, width, start=0.0, end=None):
+        """(width, 3) array of min, max and RMS for each pixel column showing [start, end].
+
+        Columns past the end of the audio are zero.
+        """
+        end = self.duration if end is None else end
+        result = np.zeros((max(0, width), 3), dtype=np.float32)
+        if width <= 0 or end <= start or not len(self.levels[0]):
+            return result
+        pixels_per_second = width / (end - start)
+        level = self.level_for(pixels_per_second)
+        bins = self.levels[level]
+        bin_seconds = self.level_seconds(level)
+
+        # Bin range [first, last) under each column
+        edges = np.floor((start + np.arange(width + 1) / pixels_per_second) / bin_seconds).astype(np.int64)
+        edges = np.clip(edges, 0, len(bins))
+        first, last = edges[:-1], edges[1:]
+        if bin_seconds * pixels_per_second > 1:
+            # Zoomed in past the finest level: several columns show the same bin
+            visible = first < len(bins)
+            result[visible] = bins[first[visible]]
+            return result
+        visible = first < last
+        if not visible.any():
+            return result
+        index = first[visible]
+        counts = (last - first)[visible]
+        bins = bins[:last[visible][-1]]
+        result[visible, 0] = np.minimum.reduceat(bins[:, 0], index)
+        result[visible, 1] = np.maximum.reduceat(bins[:, 1], index)
+        result[visible, 2] = np.sqrt(np.add.reduceat(np.square(bins[:, 2]), index) / counts)
+        return result
+
+    def save(self, path):
+        quantized = np.round(np.clip(self.levels[0], -1.0, 1.0) * INT16_SCALE).astype("<i2")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, self.bin_seconds, len(quantized)))
+            f.write(quantized.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Waveform saved by save(); None if the file is missing or not a valid cache"""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(CACHE_HEADER.size)
+                magic, version, bin_seconds, count = CACHE_HEADER.unpack(header)
+                data = np.frombuffer(f.read(count * 6), dtype="<i2")
+        except (OSError, struct.error):
+            return None
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or len(data) != count * 3:
+            return None
+        return cls(data.reshape(-1, 3).astype(np.float32) / INT16_SCALE, bin_seconds)
+
+
+def build_pcm_command(video_path, start=None, duration=None):
+    """Decode the first audio stream (or [start, start + duration] of it) to mono
+    little-endian float32 on stdout"""
+    seek = ["-ss", f"{start:.3f}"] if start else []
+    limit = ["-t", f"{duration:.3f}"] if duration else []
+    return [
+        "ffmpeg", "-nostdin", "-v", "error",
+        *seek, "-i", video_path, *limit,
+        "-map", "0:a:0", "-vn",
+        "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-"
+    ]
+
+
+def stream_bins(command, on_progress=None, cancel_event=None):
+    """Run an ffmpeg command writing mono float32 PCM at SAMPLE_RATE and reduce its output
+    with bin_stats, one chunk at a time.
+
+    Returns (bins, returncode); bins is None when cancel_event got set.
+    """
+    # stderr is not read while stdout streams, so it must not be a pipe that can fill up
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    chunk_bytes = CHUNK_BINS * BIN_SAMPLES * 4
+    parts = []
+    pending = b""
+    seconds = 0.0
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                process.kill()
+                return None, None
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            pending += data
+            usable = len(pending) // (BIN_SAMPLES * 4) * (BIN_SAMPLES * 4)
+            if usable:
+                parts.append(bin_stats(np.frombuffer(pending[:usable], dtype="<f4")))
+                pending = pending[usable:]
+                seconds += usable / 4 / SAMPLE_RATE
+                if on_progress is not None:
+                    on_progress(seconds)
+        usable = len(pending) // 4 * 4
+        if usable:
+            parts.append(bin_stats(np.frombuffer(pending[:usable], dtype="<f4")))
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    bins = np.concatenate(parts) if parts else np.zeros((0, 3), dtype=np.float32)
+    return bins, returncode
+
+
+def compute_waveform(video_path, on_progress=None, cancel_event=None):
+    """Stream the audio of video_path through bin_stats.
+
+    on_progress is called with the seconds of audio read so far. Returns None when the
+    file has no audio, ffmpeg fails or cancel_event gets set.
+    """
+    bins, returncode = stream_bins(build_pcm_command(video_path), on_progress, cancel_event)
+    if bins is None:
+        return None
+    if returncode != 0 or not len(bins):
+        AppLogger.get_logger().warning(
+            f"No waveform for {video_path}: " + (f"ffmpeg exited with {returncode}" if returncode else "no audio"))
+        return None
+    return Waveform(bins)
+
+
+def waveform_path(fingerprint):
+    return os.path.join(get_cache_dir("waveforms"), f"{fingerprint}.vtwf")
+
+
+def get_waveform(video_path, fingerprint, on_progress=None, cancel_event=None):
+    """Cached waveform of the video, computed and saved the first time"""
+    path = waveform_path(fingerprint)
+    waveform = Waveform.load(path)
+    if waveform is not None:
+        return waveform
+    waveform = compute_waveform(video_path, on_progress, cancel_event)
+    if waveform is not None:
+        try:
+            waveform.save(path)
+        except OSError as e:
+            AppLogger.get_logger().warning(f"Could not cache waveform {path}: {e}")
+    return waveform
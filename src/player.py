@@ -1,13 +1,23 @@
 import sys
+import subprocess
+import threading
 import vlc
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QSizePolicy
 from PyQt5.QtCore import QTimer, pyqtSignal
 
+from src.media.keyframes import SNAP_NEAREST, SNAP_NEXT, SNAP_PREVIOUS, get_keyframe_index
+from src.media.media_info import get_media_info
+from src.media.proxy import ProxyJob, create_proxy, find_proxy, needs_proxy
 from src.utils.logger import AppLogger
 
 class VideoPlayer(QWidget):
     time_changed = pyqtSignal(float)  # Signal for current video time
     speed_changed = pyqtSignal(float)  # Signal for speed changes
+    video_loaded = pyqtSignal(str)  # Path of a newly loaded video
+    media_info_loaded = pyqtSignal(object)  # MediaInfo of the loaded video, probed in background
+    proxy_progress = pyqtSignal(int)  # Percent of the background proxy transcode
+    proxy_ready = pyqtSignal(str, str)  # Source path, proxy path
+    keyframes_loaded = pyqtSignal(object)  # KeyframeIndex of the loaded video
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -20,8 +30,20 @@ class VideoPlayer(QWidget):
             self.instance = vlc.Instance()
             
         self.mediaplayer = self.instance.media_player_new()
+        self.video_path = None
+        self.media_info = None
+        # File actually played: video_path itself or its low-resolution proxy.
+        # Times are the same in both, so everything else works on video_path.
+        self.playback_path = None
+        self.use_proxies = True
+        self._proxy_job = None  # ProxyJob of the current video's proxy transcode
+        # Keyframes of the source, indexed in background; with snap_seeks every seek lands
+        # on the nearest one, which VLC reaches without decoding up to the target
+        self.keyframe_index = None
+        self.snap_seeks = False
         self.setup_ui()
         self.setup_timer()
+        self.proxy_ready.connect(self._switch_to_proxy)
 
     def setup_ui(self):
         """Setup the UI components"""
@@ -53,6 +75,15 @@ class VideoPlayer(QWidget):
             
         media = self.instance.media_new(path)
         self.mediaplayer.set_media(media)
+        self.video_path = path
+        self.playback_path = path
+        self.media_info = None
+        self.keyframe_index = None
+        self.video_loaded.emit(path)
+        # The proxy of the previous video is no longer wanted
+        self.cancel_proxy()
+        self._proxy_job = ProxyJob()
+        threading.Thread(target=self._load_media_info, args=(path, self._proxy_job), daemon=True).start()
         
         # Set render window based on platform
         if sys.platform.startswith('linux'):
@@ -65,6 +96,91 @@ class VideoPlayer(QWidget):
         self.timer.start()
         QTimer.singleShot(100, self.mediaplayer.play)
 
+    def _load_media_info(self, path, proxy_job):
+        """Probe the video off the GUI thread (cached after the first time)"""
+        try:
+            info = get_media_info(path)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            self.logger.warning(f"Could not read media info for {path}: {e}")
+            return
+        if path != self.video_path:
+            return
+        self.media_info = info
+        self.media_info_loaded.emit(info)
+
+        try:
+            index = get_keyframe_index(path, info.fingerprint)
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.logger.warning(f"Could not index keyframes of {path}: {e}")
+        else:
+            if path == self.video_path:
+                self.keyframe_index = index
+                self.keyframes_loaded.emit(index)
+
+        if self.use_proxies and needs_proxy(info):
+            self._prepare_proxy(path, info, proxy_job)
+
+    def set_use_proxies(self, enabled):
+        """Turn proxy playback on or off for the current and later videos"""
+        self.use_proxies = enabled
+        if not self.video_path:
+            return
+        if not enabled:
+            self.cancel_proxy()
+            if self.playback_path != self.video_path:
+                self._switch_media(self.video_path)
+        elif self.media_info and needs_proxy(self.media_info):
+            self._proxy_job = ProxyJob()
+            threading.Thread(target=self._prepare_proxy, args=(self.video_path, self.media_info, self._proxy_job),
+                             daemon=True).start()
+
+    def cancel_proxy(self, wait=False):
+        """Stop the proxy transcode of the current video, if one is running.
+
+        With wait, return only once ffmpeg exited and its partial file was removed.
+        """
+        if self._proxy_job is None:
+            return
+        self._proxy_job.cancel()
+        if wait:
+            self._proxy_job.wait()
+
+    def _prepare_proxy(self, path, info, job):
+        """Find or transcode the proxy of path (runs off the GUI thread)"""
+        if job.cancelled:
+            return
+        proxy = find_proxy(info) or create_proxy(path, info, self.proxy_progress.emit, job=job)
+        if proxy:
+            self.proxy_ready.emit(path, proxy)
+
+    def _switch_to_proxy(self, source_path, proxy):
+        if source_path != self.video_path or not self.use_proxies or self.playback_path == proxy:
+            return
+        self.logger.info(f"Playing proxy {proxy} for {source_path}")
+        self._switch_media(proxy)
+
+    def _switch_media(self, path):
+        """Play another file of the same video, keeping position, rate and pause state"""
+        was_playing = self.mediaplayer.is_playing()
+        position = self.get_time()
+        rate = self.mediaplayer.get_rate()
+        self.mediaplayer.set_media(self.instance.media_new(path))
+        self.playback_path = path
+        self.mediaplayer.play()
+
+        def restore():
+            self.set_time(position, snap=False)
+            self.mediaplayer.set_rate(rate)
+            if not was_playing:
+                self.mediaplayer.set_pause(1)
+        QTimer.singleShot(100, restore)
+
+    def get_duration(self):
+        """Video duration in seconds, from the media info once it is available"""
+        if self.media_info:
+            return self.media_info.duration
+        return max(0, self.mediaplayer.get_length()) / 1000.0
+
     def toggle_playback(self):
         """Toggle between play and pause"""
         if self.mediaplayer.is_playing():
@@ -83,8 +199,14 @@ class VideoPlayer(QWidget):
         """Get current playback time in seconds"""
         return self.mediaplayer.get_time() / 1000.0
 
-    def set_time(self, seconds):
-        """Set playback position in seconds"""
+    def set_time(self, seconds, snap=None, direction=SNAP_NEAREST):
+        """Set playback position in seconds.
+
+        snap: move the position to a keyframe (defaults to snap_seeks; has no effect until
+        the keyframe index is loaded). direction: which keyframe, see KeyframeIndex.snap
+        """
+        if (self.snap_seeks if snap is None else snap) and self.keyframe_index is not None:
+            seconds = self.keyframe_index.snap(seconds, direction)
         self.mediaplayer.set_time(int(seconds * 1000))
 
     def seek_relative(self, seconds):
@@ -96,9 +218,9 @@ class VideoPlayer(QWidget):
         if not self.mediaplayer.is_playing():
             return
         new_time = max(0, current_time + seconds)
-        total_time = self.mediaplayer.get_length() / 1000.0
-        new_time = min(new_time, total_time)
+        new_time = min(new_time, self.get_duration())
         
-        self.set_time(new_time)
+        # Snapping to the keyframe on the far side keeps short jumps from landing back here
+        self.set_time(new_time, direction=SNAP_NEXT if seconds > 0 else SNAP_PREVIOUS)
         self.logger.info(f"Seeking {'forward' if seconds > 0 else 'backward'} {abs(seconds)}s to {new_time:.2f}s")
 
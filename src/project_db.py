@@ -0,0 +1,212 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from src.tag_file import is_tag_file, read_tag_file
+from src.tag_store import Tag, to_ms
+
+# Project database: the tags of many videos in one SQLite file.
+# Tag JSON files hold one video each and have to be read whole, so a question such as
+# "every 'Balón parado' of the last 20 matches" means opening 20 files. The project
+# database keeps videos, categories and tags in indexed tables instead:
+# - tags (video, start) for the tags of a video in time order,
+# - tags (category) for one category across every match,
+# - tags (end) for skipping open tags.
+# Times are integer milliseconds, as in TagStore, and open tags have a NULL end. Any
+# other keys a tag has (notes...) are kept as a JSON object in extras, NULL when none. The
+# database runs in WAL mode, so reads do not wait for writers, and every write
+# (saving a video's tags, importing files) is a single transaction.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    video_id INTEGER NOT NULL REFERENCES videos (id) ON DELETE CASCADE,
+    category_id INTEGER NOT NULL REFERENCES categories (id),
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER,
+    extras TEXT
+);
+CREATE INDEX IF NOT EXISTS tags_video_start ON tags (video_id, start_ms);
+CREATE INDEX IF NOT EXISTS tags_category ON tags (category_id);
+CREATE INDEX IF NOT EXISTS tags_end ON tags (end_ms);
+"""
+
+# Tag files imported per transaction
+IMPORT_BATCH = 50
+
+
+def _tag_row(tag):
+    end = tag.get("end")
+    extras = {key: tag[key] for key in tag if key not in Tag.KEYS}
+    return (to_ms(tag["start"]), None if end is None else to_ms(end), tag.get("category", "General"),
+            json.dumps(extras, ensure_ascii=False) if extras else None)
+
+
+def _tag_dict(start_ms, end_ms, category, extras):
+    tag = {"start": start_ms / 1000.0, "end": None if end_ms is None else end_ms / 1000.0, "category": category}
+    if extras is not None:
+        tag.update(json.loads(extras))
+    return tag
+
+
+class ProjectDB:
+    """Tags of many videos in a SQLite database"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps the database consistent after a crash; NORMAL only skips fsyncs between checkpoints
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._load_categories()
+
+    def _migrate(self):
+        """Add the columns databases created by older versions lack"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tags)")}
+        if "extras" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE tags ADD COLUMN extras TEXT")
+
+    def _load_categories(self):
+        self._category_ids = dict(self._conn.execute("SELECT name, id FROM categories"))
+
+    @contextmanager
+    def _transaction(self):
+        try:
+            with self._conn:
+                yield
+        except Exception:
+            # Categories added by the rolled back transaction are gone
+            self._load_categories()
+            raise
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _key(video_path):
+        return os.path.abspath(video_path)
+
+    def _video_id(self, video_path, create=False):
+        key = self._key(video_path)
+        row = self._conn.execute("SELECT id FROM videos WHERE path = ?", (key,)).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        return self._conn.execute("INSERT INTO videos (path, added_at) VALUES (?, ?)",
+                                  (key, time.time())).lastrowid
+
+    def _category_id(self, name):
+        category_id = self._category_ids.get(name)
+        if category_id is None:
+            category_id = self._conn.execute("INSERT INTO categories (name) VALUES (?)", (name,)).lastrowid
+            self._category_ids[name] = category_id
+        return category_id
+
+    def _replace_tags(self, video_path, tags):
+        video_id = self._video_id(video_path, create=True)
+        self._conn.execute("DELETE FROM tags WHERE video_id = ?", (video_id,))
+        rows = [_tag_row(tag) for tag in tags]
+        self._conn.executemany(
+            "INSERT INTO tags (video_id, category_id, start_ms, end_ms, extras) VALUES (?, ?, ?, ?, ?)",
+            [(video_id, self._category_id(category), start, end, extras) for start, end, category, extras in rows])
+        return len(rows)
+
+    def save_tags(self, video_path, tags):
+        """Replace the tags of a video (added to the project if new) in one transaction"""
+        with self._transaction():
+            return self._replace_tags(video_path, tags)
+
+    def load_tags(self, video_path):
+        """Tags of a video in the order they were saved ([] for unknown videos)"""
+        rows = self._conn.execute(
+            "SELECT t.start_ms, t.end_ms, c.name, t.extras FROM tags t JOIN categories c ON c.id = t.category_id "
+            "JOIN videos v ON v.id = t.video_id WHERE v.path = ? ORDER BY t.id",
+            (self._key(video_path),))
+        return [_tag_dict(*row) for row in rows]
+
+    def import_json(self, pairs):
+        """Import (video, tag file) pairs (JSON or .vtags), replacing the tags the videos had.
+
+        Returns the number of tags imported. Files are read before their batch is written,
+        so a file that cannot be read leaves the database unchanged for its batch.
+        """
+        imported = 0
+        for first in range(0, len(pairs), IMPORT_BATCH):
+            batch = []
+            for video_path, tags_path in pairs[first:first + IMPORT_BATCH]:
+                if is_tag_file(tags_path):
+                    batch.append((video_path, read_tag_file(tags_path)))
+                    continue
+                with open(tags_path, "r", encoding="utf-8") as f:
+                    batch.append((video_path, json.load(f)))
+            with self._transaction():
+                imported += sum(self._replace_tags(video_path, tags) for video_path, tags in batch)
+        return imported
+
+    def remove_video(self, video_path):
+        with self._conn:
+            self._conn.execute("DELETE FROM videos WHERE path = ?", (self._key(video_path),))
+
+    def videos(self, last=None):
+        """Paths of the project videos, most recently added first (only the last ones if given)"""
+        sql = "SELECT path FROM videos ORDER BY added_at DESC, id DESC"
+        params = ()
+        if last is not None:
+            sql += " LIMIT ?"
+            params = (last,)
+        return [path for path, in self._conn.execute(sql, params)]
+
+    def categories(self):
+        return sorted(self._category_ids)
+
+    def query(self, category=None, last=None, videos=None, closed=True):
+        """Tags across videos, as dicts with a "video_path" key, by video and start.
+
+        category limits them to one category, last to the most recently added videos,
+        videos to the given paths, and closed to finished tags.
+        """
+        where = []
+        params = []
+        if category is not None:
+            category_id = self._category_ids.get(category)
+            if category_id is None:
+                return []
+            where.append("t.category_id = ?")
+            params.append(category_id)
+        if last is not None:
+            where.append("t.video_id IN (SELECT id FROM videos ORDER BY added_at DESC, id DESC LIMIT ?)")
+            params.append(last)
+        if videos is not None:
+            keys = [self._key(path) for path in videos]
+            where.append(f"v.path IN ({', '.join('?' * len(keys))})")
+            params.extend(keys)
+        if closed:
+            where.append("t.end_ms IS NOT NULL")
+        sql = ("SELECT v.path, t.start_ms, t.end_ms, c.name, t.extras FROM tags t "
+               "JOIN videos v ON v.id = t.video_id JOIN categories c ON c.id = t.category_id")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY t.video_id, t.start_ms"
+        return [dict(_tag_dict(start, end, name, extras), video_path=path)
+                for path, start, end, name, extras in self._conn.execute(sql, params)]
@@ -0,0 +1,32 @@
+# Tag suggestion analysis
+# The analysis lives in src/media/suggestions.py and does not depend on Qt; this
+# thread runs it off the GUI thread and turns its callbacks into signals.
+from PyQt5.QtCore import QThread, pyqtSignal
+from src.media.suggestions import suggest_tags
+from src.utils.logger import AppLogger
+
+
+class SuggestionThread(QThread):
+    progress = pyqtSignal(int)  # Analysed share of the video (0-100)
+    # Video path and its list of Suggestion (not emitted when cancelled or failed)
+    suggestions_ready = pyqtSignal(str, object)
+
+    def __init__(self, video_path, duration, workers=None):
+        super().__init__()
+        self.video_path = video_path
+        self.duration = duration
+        self.workers = workers
+        self._cancelled = False
+
+    def run(self):
+        try:
+            suggestions = suggest_tags(self.video_path, self.duration, self.workers,
+                                       on_progress=self.progress.emit, is_cancelled=lambda: self._cancelled)
+        except (OSError, RuntimeError) as e:
+            AppLogger.get_logger().error(f"Tag suggestion analysis failed: {e}")
+            return
+        if suggestions is not None:
+            self.suggestions_ready.emit(self.video_path, suggestions)
+
+    def cancel(self):
+        self._cancelled = True
@@ -0,0 +1,186 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from src.tag_index import max_tree, tree_leaves, tree_overlaps
+from src.tag_store import OPEN_END, TagStore, to_ms
+
+# Binary tag files (.vtags).
+# JSON tag files have to be parsed whole before the first tag can be shown, which takes
+# seconds for merged season files. A .vtags file holds the same tags as fixed-width
+# columns, sorted by start, that are memory-mapped when the file is opened, so reading
+# a time window or a category only touches the pages it needs (TagFile). Opening one in
+# the editor (TagManager.load_tags, read_tag_file) still reads every tag into a TagStore,
+# since the whole list is edited; that is a few column copies instead of parsing JSON.
+# Layout, little-endian, sections aligned to 8 bytes:
+#   header      magic, version, category count, tag count, size of the category names
+#   categories  JSON array of the category names (UTF-8)
+#   offsets     int64[categories + 1]: where each category starts in the rows column
+#   starts      int64[tags]: start in ms
+#   ends        int64[tags]: end in ms (OPEN_END for open tags)
+#   codes       int32[tags]: category code
+#   positions   int32[tags]: position in the tag list that was written
+#   rows        int32[tags]: tag rows grouped by category, by start within a group
+#   max tree    int64[2 * leaves]: max tree over the ends, as in TagIndex (leaves is the
+#               smallest power of two >= tags; OPEN_END in node 0 and the unused leaves)
+#   extras      JSON object, to the end of the file: position -> the other keys of that
+#               tag (notes, video_path...), only for tags that have any
+# A window lookup bisects the starts and descends the max tree, so it costs O(log n) per
+# tag found, even when a long tag near the start overlaps most of the file.
+# Positions keep the original tag order, so JSON -> .vtags -> JSON gives the same file.
+TAG_FILE_EXTENSION = ".vtags"
+
+HEADER = struct.Struct("<4sHHII")
+MAGIC = b"VTTG"
+VERSION = 3
+
+# (name, dtype) of the columns, in file order
+COLUMNS = (("starts", "<i8"), ("ends", "<i8"), ("codes", "<i4"), ("positions", "<i4"), ("rows", "<i4"))
+
+
+def is_tag_file(path):
+    return path.lower().endswith(TAG_FILE_EXTENSION)
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def _layout(category_count, tag_count, names_size):
+    """Offsets of the category offsets, {column: offset} and the max tree, and the file size"""
+    offsets = _align(HEADER.size + names_size)
+    position = offsets + 8 * (category_count + 1)
+    columns = {}
+    for name, dtype in COLUMNS:
+        position = _align(position)
+        columns[name] = position
+        position += np.dtype(dtype).itemsize * tag_count
+    tree = _align(position)
+    return offsets, columns, tree, tree + 8 * 2 * tree_leaves(tag_count)
+
+
+def write_tag_file(path, tags):
+    """Write tags (a TagStore or mappings with start, end and category) to a .vtags file"""
+    store = tags if isinstance(tags, TagStore) else TagStore(tags)
+    count = len(store)
+    order = np.argsort(store.starts_ms, kind="stable")
+    columns = {"starts": store.starts_ms[order], "ends": store.ends_ms[order],
+               "codes": store.category_codes[order], "positions": order}
+    # Rows of each category, in start order (a stable sort keeps the start order within a group)
+    columns["rows"] = np.argsort(columns["codes"], kind="stable")
+    counts = np.bincount(columns["codes"], minlength=len(store.categories))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype("<i8")
+
+    names = json.dumps(store.categories).encode("utf-8")
+    extras = {str(row): store.extras(row) for row in range(count) if store.extras(row)}
+    tree, _ = max_tree(columns["ends"], fill=OPEN_END)
+    offsets_at, columns_at, tree_at, size = _layout(len(store.categories), count, len(names))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(store.categories), count, len(names)))
+        f.write(names)
+        sections = [(offsets_at, offsets)]
+        sections += [(columns_at[name], columns[name].astype(dtype)) for name, dtype in COLUMNS]
+        sections.append((tree_at, tree.astype("<i8")))
+        for offset, data in sections:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data.tobytes())
+        if extras:
+            f.write(b"\0" * (size - f.tell()))
+            f.write(json.dumps(extras, ensure_ascii=False).encode("utf-8"))
+    os.replace(tmp_path, path)
+
+
+class TagFile:
+    """Lazily read .vtags file: tags are decoded only when a window or category is asked for"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            try:
+                magic, version, category_count, count, names_size = HEADER.unpack(header)
+            except struct.error:
+                raise ValueError(f"{path} is not a tag file")
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a tag file (version {VERSION})")
+            self.categories = json.loads(f.read(names_size).decode("utf-8"))
+            offsets_at, columns_at, tree_at, size = _layout(category_count, count, names_size)
+            if os.path.getsize(path) < size:
+                raise ValueError(f"{path} is truncated")
+            f.seek(size)
+            extras = f.read()
+        # Extra keys of the tags, by position in the list that was written
+        self._extras = {int(position): values
+                        for position, values in json.loads(extras.decode("utf-8")).items()} if extras else {}
+        self.count = count
+        self._codes = {name: code for code, name in enumerate(self.categories)}
+        self._offsets = np.fromfile(path, dtype="<i8", count=category_count + 1, offset=offsets_at)
+        self._columns = {}
+        for name, dtype in COLUMNS:
+            if count:
+                self._columns[name] = np.memmap(path, dtype=dtype, mode="r", offset=columns_at[name], shape=(count,))
+            else:
+                # An empty section cannot be mapped
+                self._columns[name] = np.zeros(0, dtype=dtype)
+        self._leaves = tree_leaves(count)
+        self._tree = np.memmap(path, dtype="<i8", mode="r", offset=tree_at, shape=(2 * self._leaves,))
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        # Drop the maps so the file can be replaced (Windows keeps mapped files locked)
+        self._columns = {}
+        self._tree = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _tags(self, rows):
+        """Tag dicts of the given rows (an index array or a slice)"""
+        starts = self._columns["starts"][rows].tolist()
+        ends = self._columns["ends"][rows].tolist()
+        codes = self._columns["codes"][rows].tolist()
+        tags = [{"start": start / 1000.0, "end": None if end == OPEN_END else end / 1000.0,
+                 "category": self.categories[code]}
+                for start, end, code in zip(starts, ends, codes)]
+        if self._extras:
+            for tag, position in zip(tags, self._columns["positions"][rows].tolist()):
+                tag.update(self._extras.get(position, {}))
+        return tags
+
+    def window(self, start, end):
+        """Finished tags overlapping [start, end] seconds, in start order"""
+        start_ms, end_ms = to_ms(start), to_ms(end)
+        # Tags after last begin after end
+        last = int(np.searchsorted(self._columns["starts"], end_ms, side="right")) - 1
+        return self._tags(np.array(tree_overlaps(self._tree, self._leaves, start_ms, last), dtype=np.int64))
+
+    def category(self, name):
+        """Tags of one category, open ones included, in start order"""
+        code = self._codes.get(name)
+        if code is None:
+            return []
+        return self._tags(np.asarray(self._columns["rows"][self._offsets[code]:self._offsets[code + 1]]))
+
+    def to_store(self):
+        """Every tag as a TagStore, in the order of the list that was written"""
+        order = np.argsort(self._columns["positions"])
+        return TagStore.from_columns(self._columns["starts"][order], self._columns["ends"][order],
+                                     self._columns["codes"][order], self.categories, self._extras)
+
+    def read_all(self):
+        """Every tag, in the order of the list that was written"""
+        return self._tags(np.argsort(self._columns["positions"]))
+
+
+def read_tag_file(path):
+    """Every tag of a .vtags file, as a TagStore"""
+    with TagFile(path) as tag_file:
+        return tag_file.to_store()
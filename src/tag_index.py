@@ -0,0 +1,208 @@
+import bisect
+
+import numpy as np
+
+from src.tag_store import OPEN_END, TagStore
+
+# Sorted interval index over a list of tags (dicts with "start" and "end").
+# Tags are kept sorted by start, next to their ends and a max tree over the ends: a
+# complete binary tree whose nodes hold the largest end below them. A lookup bisects
+# on the starts and then descends the tree, skipping every subtree whose ends all stop
+# before the queried time, so it is O(log n) per match whatever the tags look like
+# (one tag spanning the whole match does not make other queries walk every tag).
+# Open tags (end None) are kept for navigation by start, but they cover no time yet.
+# Entries refer to tags by their position in the list. Appending a tag in time order
+# and ending the latest tag update the index in place in O(log n). Inserting, removing
+# and editing tags update it in place too, in O(n) list and array moves but without
+# sorting again; other changes (shifts) mark it stale and it is rebuilt on the next query.
+# .vtags files store the same max tree over their ends (see tag_file).
+
+
+def tree_leaves(count, leaves=1):
+    """Leaf count of a max tree over count entries: a power of two, at least leaves"""
+    while leaves < count:
+        leaves *= 2
+    return leaves
+
+
+def max_tree(ends, fill=-np.inf, leaves=1):
+    """Max tree over ends and its leaf count (see tree_leaves).
+
+    The tree is an array: node k holds the largest end below it and has children 2k and
+    2k + 1, the root is node 1 and entry i is leaf leaves + i. Node 0 and the leaves past
+    the last entry hold fill.
+    """
+    leaves = tree_leaves(len(ends), leaves)
+    level = np.full(leaves, fill, dtype=np.result_type(ends, fill))
+    level[:len(ends)] = ends
+    levels = [level]
+    while len(level) > 1:
+        level = level.reshape(-1, 2).max(axis=1)
+        levels.append(level)
+    return np.concatenate([np.full(1, fill, dtype=level.dtype)] + levels[::-1]), leaves
+
+
+def tree_overlaps(tree, leaves, start, last):
+    """Entries up to last whose end is at least start, in entry order"""
+    found = []
+    # Depth-first from the root, left before right: (node, first entry below it, entries below it)
+    stack = [(1, 0, leaves)]
+    while stack:
+        node, first, width = stack.pop()
+        if first > last or tree[node] < start:
+            continue
+        if node >= leaves:
+            found.append(first)
+            continue
+        width //= 2
+        stack.append((2 * node + 1, first + width, width))
+        stack.append((2 * node, first, width))
+    return found
+
+
+class TagIndex:
+    def __init__(self):
+        self._starts = []
+        self._ends = []
+        self._positions = []
+        self._tree = [float("-inf")] * 2  # Max tree: node k has children 2k and 2k + 1
+        self._leaves = 1  # Leaf count, a power of two; leaf i is node _leaves + i
+        self._stale = True
+
+    @staticmethod
+    def _end(tag):
+        return tag["end"] if tag["end"] is not None else float("-inf")
+
+    # Mark the index stale after a change that add() and end() do not cover.
+    def invalidate(self):
+        self._stale = True
+
+    def rebuild(self, tags):
+        if isinstance(tags, TagStore):
+            self._rebuild_columns(tags)
+            return
+        entries = sorted((tag["start"], i) for i, tag in enumerate(tags))
+        self._starts = [start for start, _ in entries]
+        self._positions = [i for _, i in entries]
+        self._ends = [self._end(tags[i]) for i in self._positions]
+        self._build_tree(np.array(self._ends, dtype=float))
+        self._stale = False
+
+    # Same as rebuild, sorting the columns of a TagStore with NumPy.
+    def _rebuild_columns(self, store):
+        order = np.argsort(store.starts_ms, kind="stable")
+        ends = np.where(store.ends_ms == OPEN_END, -np.inf, store.ends_ms / 1000.0)[order]
+        self._starts = (store.starts_ms[order] / 1000.0).tolist()
+        self._positions = order.tolist()
+        self._ends = ends.tolist()
+        self._build_tree(ends)
+        self._stale = False
+
+    def _build_tree(self, ends, leaves=1):
+        """Max tree over ends, with room for at least leaves entries"""
+        tree, self._leaves = max_tree(ends, leaves=leaves)
+        self._tree = tree.tolist()
+
+    def _set_end(self, i, end):
+        """Set the end of entry i in the tree"""
+        node = self._leaves + i
+        self._tree[node] = end
+        node //= 2
+        while node:
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    def ensure(self, tags):
+        if self._stale or len(self._positions) != len(tags):
+            self.rebuild(tags)
+
+    # The tag at position was appended to the list.
+    def add(self, tags, position):
+        tag = tags[position]
+        if self._stale or position != len(self._positions) or (self._starts and tag["start"] < self._starts[-1]):
+            self._stale = True
+            return
+        self._starts.append(tag["start"])
+        self._positions.append(position)
+        self._ends.append(self._end(tag))
+        if len(self._ends) > self._leaves:
+            self._build_tree(np.array(self._ends, dtype=float), 2 * self._leaves)
+        else:
+            self._set_end(len(self._ends) - 1, self._ends[-1])
+
+    # The end of the tag at position was set.
+    def end(self, tags, position):
+        if self._stale or not self._positions or self._positions[-1] != position:
+            self._stale = True
+            return
+        self._ends[-1] = self._end(tags[position])
+        self._set_end(len(self._ends) - 1, self._ends[-1])
+
+    def _place(self, start, position):
+        """Entry where a tag (start, position) goes, keeping the (start, position) order of rebuild"""
+        j = bisect.bisect_left(self._starts, start)
+        while j < len(self._starts) and self._starts[j] == start and self._positions[j] < position:
+            j += 1
+        return j
+
+    def _insert_entry(self, tag, position):
+        j = self._place(tag["start"], position)
+        self._starts.insert(j, tag["start"])
+        self._positions.insert(j, position)
+        self._ends.insert(j, self._end(tag))
+
+    def _delete_entry(self, j):
+        del self._starts[j], self._positions[j], self._ends[j]
+
+    # count tags were inserted at position (later tags moved up by count).
+    def insert(self, tags, position, count):
+        if self._stale:
+            return
+        self._positions = [p + count if p >= position else p for p in self._positions]
+        for p in range(position, position + count):
+            self._insert_entry(tags[p], p)
+        self._build_tree(np.array(self._ends, dtype=float))
+
+    # The tag at position was removed (later tags moved down by one).
+    def remove(self, position):
+        if self._stale:
+            return
+        self._delete_entry(self._positions.index(position))
+        self._positions = [p - 1 if p > position else p for p in self._positions]
+        self._build_tree(np.array(self._ends, dtype=float))
+
+    # Fields of the tag at position were changed.
+    def update(self, tags, position):
+        if self._stale:
+            return
+        if position < 0:
+            position += len(tags)
+        tag = tags[position]
+        j = self._positions.index(position)
+        if tag["start"] == self._starts[j]:
+            # Same place in start order: only the end can have changed
+            self._ends[j] = self._end(tag)
+            self._set_end(j, self._ends[j])
+            return
+        self._delete_entry(j)
+        self._insert_entry(tag, position)
+        self._build_tree(np.array(self._ends, dtype=float))
+
+    # Positions of the tags overlapping [start, end], in start order.
+    def overlapping(self, start, end):
+        last = bisect.bisect_right(self._starts, end) - 1
+        return [self._positions[j] for j in tree_overlaps(self._tree, self._leaves, start, last)]
+
+    # Positions of the tags covering time t, in start order.
+    def at(self, t):
+        return self.overlapping(t, t)
+
+    # Position of the first tag starting after t (None if there is none).
+    def next_after(self, t):
+        i = bisect.bisect_right(self._starts, t)
+        return self._positions[i] if i < len(self._starts) else None
+
+    # Position of the last tag starting before t (None if there is none).
+    def previous_before(self, t):
+        i = bisect.bisect_left(self._starts, t) - 1
+        return self._positions[i] if i >= 0 else None
@@ -0,0 +1,194 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from src.utils.logger import AppLogger
+
+# Autosave of the tags as an append-only journal.
+# Every change to the tag list (add, end, remove, edit, shift) is one small JSON line
+# describing the change, so saving costs the same whatever the number of tags. Lines
+# are queued by the GUI thread and written by a background thread, which fsyncs them
+# in batches. Every so often the whole list is written as a snapshot and the journal
+# starts again empty (compaction), so that replaying it stays short.
+# Snapshot and journal carry a generation number. A journal only applies to the
+# snapshot of its generation, so a crash between writing a new snapshot and emptying
+# the journal does not replay changes twice.
+SNAPSHOT_NAME = "tags.json"
+JOURNAL_NAME = "tags.journal.jsonl"
+
+# Changes written to the journal before it is compacted into a new snapshot
+COMPACT_EVERY = 500
+# Changes arriving within this time are written with a single fsync
+BATCH_SECONDS = 0.2
+
+_STOP = object()
+
+
+def apply_record(store, record):
+    """Apply one journal record to a TagStore"""
+    op = record["op"]
+    if op == "add":
+        store.insert_many(record["at"], record["tags"])
+    elif op == "end":
+        store[record["at"]]["end"] = record["end"]
+    elif op == "remove":
+        store.pop(record["at"])
+    elif op == "set":
+        tag = store[record["at"]]
+        for key, value in record["values"].items():
+            tag[key] = value
+    elif op == "shift":
+        category = record.get("category")
+        store.shift(record["seconds"], store.category_mask(category) if category is not None else None)
+    else:
+        raise ValueError(f"Unknown journal operation: {op}")
+
+
+class TagJournal:
+    """Snapshot plus append-only journal of the tag list, kept in directory"""
+
+    def __init__(self, directory, compact_every=COMPACT_EVERY):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.path = os.path.join(directory, JOURNAL_NAME)
+        self.compact_every = compact_every
+        self.generation = 0
+        self.pending = 0  # Records written since the last compaction
+        self._queue = queue.Queue()
+        self._thread = None
+        self._file = None
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            return snapshot.get("generation", 0), snapshot.get("tags", [])
+        except (OSError, ValueError):
+            return 0, []
+
+    def _read_records(self, generation):
+        """Records of the journal of generation (none if the journal belongs to another one)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A crash can leave the last line half-written
+                continue
+        if not records or records[0].get("generation") != generation:
+            return []
+        return records[1:]
+
+    def restore(self, store):
+        """Replay snapshot and journal into store (cleared first) and compact them.
+
+        Returns the number of tags restored.
+        """
+        generation, tags = self._read_snapshot()
+        store.clear()
+        store.extend(tags)
+        for record in self._read_records(generation):
+            try:
+                apply_record(store, record)
+            except (KeyError, IndexError, ValueError) as e:
+                # Later records refer to positions after this one; stop here
+                AppLogger.get_logger().warning(f"Tag journal replay stopped at {record}: {e}")
+                break
+        self.generation = generation
+        self.compact(store)
+        return len(store)
+
+    def append(self, record):
+        """Queue a change for writing. Returns True when the journal is due for compaction."""
+        self._put(("record", record))
+        self.pending += 1
+        return self.pending >= self.compact_every
+
+    def compact(self, store):
+        """Queue a snapshot of store that replaces the journal written so far"""
+        self._put(("compact", store.copy()))
+        self.pending = 0
+
+    def _put(self, item):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._queue.put(item)
+
+    def flush(self):
+        """Wait until every queued change is on disk"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_SECONDS
+            while batch[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch([item for item in batch if item is not _STOP])
+            except OSError as e:
+                AppLogger.get_logger().warning(f"Could not write tag journal {self.path}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is _STOP:
+                return
+
+    def _write_batch(self, batch):
+        lines = []
+        for kind, payload in batch:
+            if kind == "compact":
+                # Records queued before the snapshot are already part of it
+                lines = []
+                self._write_snapshot(payload)
+            else:
+                lines.append(json.dumps(payload) + "\n")
+        if lines:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+                if self._file.tell() == 0:
+                    self._file.write(json.dumps({"generation": self.generation}) + "\n")
+            self._file.writelines(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _write_snapshot(self, store):
+        generation = self.generation + 1
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "tags": store.to_dicts()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self.generation = generation
+        # Start the journal of the new snapshot
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"generation": generation}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -1,11 +1,49 @@
 import json
 
+import numpy as np
+
+from src.tag_file import is_tag_file, read_tag_file, write_tag_file
+from src.tag_index import TagIndex
+from src.tag_store import TagStore
+
 # This is a simple tag manager for video tagging applications.
 # It allows adding, removing, and saving tags with start and end times.
+# Tags live in a columnar TagStore; get_tags() returns it, and its items behave like the
+# {"start", "end", "category"} dicts tags used to be.
+# With a TagJournal set, every change is also written to it as it happens (autosave).
+# Listeners (e.g. list models) are told about every change as it happens, too.
 class TagManager:
     def __init__(self):
-        self.tags = []
+        self.tags = TagStore()
         self.offset = 0.0
+        self.index = TagIndex()
+        self.journal = None
+        self.listeners = []
+
+    # callback(change) is called after every change with the journal record describing it
+    # ({"op": "add", "at": ..., "tags": [...]}, "end", "remove", "set" or "shift"), or with
+    # {"op": "reset"} when the whole list was replaced. Records of removed and edited tags
+    # carry their old values ("tag" and "previous").
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def _notify(self, change):
+        for callback in self.listeners:
+            callback(change)
+
+    # Autosave every change to journal, starting from the tags it restores.
+    # Returns the number of tags restored.
+    def set_journal(self, journal):
+        restored = journal.restore(self.tags)
+        self.index.invalidate()
+        self.journal = journal
+        self._notify({"op": "reset"})
+        return restored
+
+    def _record(self, record):
+        self._notify(record)
+        if self.journal is not None and self.journal.append(record):
+            self.journal.compact(self.tags)
 
     # Set the offset for the tags. This is useful for synchronizing tags with video playback.
     # The offset is subtracted from the start time of each tag when it is added.
@@ -15,30 +53,124 @@ class TagManager:
     # Add a start tag at the specified time in seconds.
     # The start time is adjusted by the offset, ensuring it doesn't go below 0.0 seconds.
     def add_start(self, time_sec, category="General"):
-        self.tags.append({
+        tag = {
             "start": max(0.0, time_sec - self.offset),
             "end": None,
             "category": category
-        })
+        }
+        self.tags.append(tag)
+        self.index.add(self.tags, len(self.tags) - 1)
+        self._record({"op": "add", "at": len(self.tags) - 1, "tags": [tag]})
         print(f"[TAG] Inicio ajustado en {time_sec:.2f}s")
 
     def add_end(self, time_sec):
-        if self.tags and self.tags[-1]["end"] is None:
+        if len(self.tags) and self.tags[-1]["end"] is None:
             self.tags[-1]["end"] = time_sec
+            self.index.end(self.tags, len(self.tags) - 1)
+            self._record({"op": "end", "at": len(self.tags) - 1, "end": time_sec})
+
+    # Add several finished tags at once (e.g. accepted suggestions), given as (start, end) in video time.
+    # A tag still waiting for its end stays last so add_end keeps closing it.
+    def add_tags(self, intervals, category="General"):
+        new_tags = [{"start": start, "end": end, "category": category} for start, end in intervals]
+        at = len(self.tags) - 1 if len(self.tags) and self.tags[-1]["end"] is None else len(self.tags)
+        self.tags.insert_many(at, new_tags)
+        self.index.insert(self.tags, at, len(new_tags))
+        if new_tags:
+            self._record({"op": "add", "at": at, "tags": new_tags})
+        return len(new_tags)
 
     def remove_tag(self, index):
         if 0 <= index < len(self.tags):
-            self.tags.pop(index)
+            removed = self.tags.pop(index)
+            self.index.remove(index)
+            self._record({"op": "remove", "at": index, "tag": removed})
+
+    # Change fields of the tag at index, e.g. update_tag(0, start=12.0, category="Gol").
+    def update_tag(self, index, **values):
+        tag = self.tags[index]
+        if index < 0:
+            # Records carry the position itself, as for the other changes
+            index += len(self.tags)
+        previous = {key: tag.get(key) for key in values}
+        for key, value in values.items():
+            tag[key] = value
+        self.index.update(self.tags, index)
+        self._record({"op": "set", "at": index, "values": values, "previous": previous})
 
     def get_tags(self):
         return self.tags
 
+    # Tags are saved as JSON, or as a binary tag file when path ends in .vtags.
     def save_tags(self, path):
+        if is_tag_file(path):
+            write_tag_file(path, self.tags)
+            return True
         with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self.tags, f, indent=2)
+            json.dump(self.tags.to_dicts(), f, indent=2)
             return True
         return False
 
     def load_tags(self, path):
+        if is_tag_file(path):
+            self._replace_tags(read_tag_file(path))
+            return
         with open(path, 'r', encoding='utf-8') as f:
-            self.tags = json.load(f)
+            self._replace_tags(TagStore(json.load(f)))
+
+    # Same as save_tags/load_tags, against the tags of video_path in a ProjectDB.
+    def save_project_tags(self, project, video_path):
+        return project.save_tags(video_path, self.tags)
+
+    def load_project_tags(self, project, video_path):
+        self._replace_tags(TagStore(project.load_tags(video_path)))
+
+    def _replace_tags(self, loaded):
+        # Reloaded in place: widgets holding get_tags() keep seeing the current tags
+        self.tags.assign(loaded)
+        self.index.invalidate()
+        self._notify({"op": "reset"})
+        if self.journal is not None:
+            self.journal.compact(self.tags)
+
+    # Bulk operations, each a NumPy expression over the tag columns.
+    # Move every tag (or those of one category) by seconds, e.g. to resync with another recording.
+    def shift_tags(self, seconds, category=None):
+        mask = self.tags.category_mask(category) if category is not None else None
+        moved = self.tags.shift(seconds, mask)
+        self.index.invalidate()
+        self._record({"op": "shift", "seconds": seconds, "category": category})
+        return moved
+
+    def tags_of_category(self, category):
+        return np.flatnonzero(self.tags.category_mask(category)).tolist()
+
+    # Seconds covered by the finished tags (of one category, or all).
+    def total_duration(self, category=None):
+        mask = self.tags.category_mask(category) if category is not None else None
+        return self.tags.total_duration(mask)
+
+    # Time queries, answered from the interval index. They return positions in get_tags().
+    # Open tags (no end yet) cover no time, but next/previous navigation includes them.
+    def tags_at(self, time_sec):
+        self.index.ensure(self.tags)
+        return self.index.at(time_sec)
+
+    def tags_in_range(self, start, end):
+        self.index.ensure(self.tags)
+        return self.index.overlapping(start, end)
+
+    # Other finished tags overlapping the tag at index.
+    def overlapping_tags(self, index):
+        tag = self.tags[index]
+        if tag["end"] is None:
+            return []
+        return [i for i in self.tags_in_range(tag["start"], tag["end"]) if i != index]
+
+    def next_tag(self, time_sec):
+        self.index.ensure(self.tags)
+        return self.index.next_after(time_sec)
+
+    def previous_tag(self, time_sec):
+        self.index.ensure(self.tags)
+        return self.index.previous_before(time_sec)
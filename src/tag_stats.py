@@ -0,0 +1,181 @@
+import csv
+import json
+from collections import Counter
+
+import numpy as np
+
+from src.tag_store import OPEN_END, to_ms
+
+# Tag statistics.
+# Per category: number of tags, finished tags, total and average duration, and how the
+# tags spread over the match, by start time, in fixed buckets (5 minutes by default)
+# and per half. The aggregates are sums, so TagStats follows TagManager's change
+# records and adds or subtracts the tags involved: O(1) per add, end, remove or edit.
+# Bulk changes (loading a file, restoring the autosave, shifting every tag) are
+# recomputed from the TagStore columns with NumPy instead.
+# Open tags count for their start but have no duration yet. Times are summed in integer
+# milliseconds, so incremental updates and recomputes give exactly the same figures.
+BUCKET_SECONDS = 300
+# Start of the second half in video time, until it is set for the match
+DEFAULT_SECOND_HALF = 45 * 60
+
+
+class CategoryStats:
+    """Aggregates of the tags of one category"""
+
+    __slots__ = ("count", "finished", "total_ms", "buckets", "halves")
+
+    def __init__(self):
+        self.count = 0
+        self.finished = 0
+        self.total_ms = 0
+        self.buckets = Counter()  # bucket index -> tags starting in it
+        self.halves = [0, 0]
+
+
+class TagStats:
+    """Statistics of the tags of a TagManager, kept up to date as tags change"""
+
+    def __init__(self, tag_manager, bucket_seconds=BUCKET_SECONDS, second_half=DEFAULT_SECOND_HALF):
+        self.tag_manager = tag_manager
+        self.bucket_seconds = bucket_seconds
+        self.second_half = second_half
+        self.categories = {}  # name -> CategoryStats
+        self.listeners = []
+        self.recompute()
+        tag_manager.add_listener(self.on_tags_changed)
+
+    # callback() is called after the statistics changed.
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def _notify(self):
+        for callback in self.listeners:
+            callback()
+
+    def set_second_half(self, seconds):
+        self.second_half = seconds
+        self.recompute()
+        self._notify()
+
+    def _bucket(self, start_ms):
+        # Integer bucket indices even when bucket_seconds is a float (e.g. from the CLI)
+        return np.floor_divide(start_ms, int(round(self.bucket_seconds * 1000)))
+
+    def _apply(self, tag, sign):
+        """Add (sign 1) or subtract (sign -1) one tag"""
+        category = tag["category"]
+        stats = self.categories.get(category)
+        if stats is None:
+            stats = self.categories[category] = CategoryStats()
+        start_ms = to_ms(tag["start"])
+        stats.count += sign
+        bucket = int(self._bucket(start_ms))
+        stats.buckets[bucket] += sign
+        if not stats.buckets[bucket]:
+            del stats.buckets[bucket]
+        stats.halves[start_ms >= to_ms(self.second_half)] += sign
+        if tag["end"] is not None:
+            stats.finished += sign
+            stats.total_ms += sign * (to_ms(tag["end"]) - start_ms)
+        if not stats.count:
+            del self.categories[category]
+
+    def on_tags_changed(self, change):
+        op = change["op"]
+        tags = self.tag_manager.get_tags()
+        if op == "add":
+            for tag in change["tags"]:
+                self._apply({"end": None, **tag}, 1)
+        elif op == "end":
+            tag = tags[change["at"]]
+            self._apply(dict(tag, end=None), -1)
+            self._apply(tag, 1)
+        elif op == "remove":
+            self._apply(change["tag"], -1)
+        elif op == "set":
+            tag = tags[change["at"]]
+            self._apply(dict(tag, **change["previous"]), -1)
+            self._apply(tag, 1)
+        else:
+            self.recompute()
+        self._notify()
+
+    def recompute(self):
+        """Rebuild every aggregate from the tag columns"""
+        store = self.tag_manager.get_tags()
+        starts, ends, codes = store.starts_ms, store.ends_ms, store.category_codes
+        size = len(store.categories)
+        finished = ends != OPEN_END
+        counts = np.bincount(codes, minlength=size)
+        finished_counts = np.bincount(codes[finished], minlength=size)
+        totals = np.bincount(codes[finished], weights=(ends - starts)[finished], minlength=size)
+        halves = np.bincount(codes * 2 + (starts >= to_ms(self.second_half)), minlength=2 * size).reshape(-1, 2)
+        buckets = self._bucket(starts)
+        # One integer key per (category code, bucket) pair
+        stride = int(buckets.max()) + 1 if len(buckets) else 1
+        keys, key_counts = np.unique(codes.astype(np.int64) * stride + buckets, return_counts=True)
+
+        self.categories = {}
+        for code in np.flatnonzero(counts).tolist():
+            stats = self.categories[store.categories[code]] = CategoryStats()
+            stats.count = int(counts[code])
+            stats.finished = int(finished_counts[code])
+            stats.total_ms = int(round(totals[code]))
+            stats.halves = halves[code].tolist()
+        for key, count in zip(keys.tolist(), key_counts.tolist()):
+            self.categories[store.categories[key // stride]].buckets[key % stride] = count
+
+    # Reports
+
+    def bucket_count(self):
+        """Buckets from the start of the video to the last one with a tag"""
+        return max((max(stats.buckets) + 1 for stats in self.categories.values() if stats.buckets), default=0)
+
+    def bucket_labels(self):
+        minutes = self.bucket_seconds / 60
+        return [f"{i * minutes:g}-{(i + 1) * minutes:g}" for i in range(self.bucket_count())]
+
+    def summary(self):
+        """One dict per category (by name) with its counts, durations and distribution"""
+        buckets = self.bucket_count()
+        rows = []
+        for category in sorted(self.categories):
+            stats = self.categories[category]
+            rows.append({
+                "category": category,
+                "count": stats.count,
+                "finished": stats.finished,
+                "total_seconds": stats.total_ms / 1000.0,
+                "average_seconds": round(stats.total_ms / stats.finished / 1000.0, 3) if stats.finished else None,
+                "first_half": stats.halves[0],
+                "second_half": stats.halves[1],
+                "buckets": [stats.buckets.get(i, 0) for i in range(buckets)],
+            })
+        return rows
+
+    def to_dict(self):
+        return {"bucket_seconds": self.bucket_seconds, "second_half_start": self.second_half,
+                "buckets": self.bucket_labels(), "categories": self.summary()}
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def write_csv(self, path):
+        """One row per category; distribution columns are named by bucket minutes"""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["category", "count", "finished", "total_seconds", "average_seconds",
+                             "first_half", "second_half"] + [f"min {label}" for label in self.bucket_labels()])
+            for row in self.summary():
+                writer.writerow([row["category"], row["count"], row["finished"], row["total_seconds"],
+                                 "" if row["average_seconds"] is None else row["average_seconds"],
+                                 row["first_half"], row["second_half"]] + row["buckets"])
+
+    def write(self, path):
+        """CSV or JSON, depending on the extension of path"""
+        if path.lower().endswith(".csv"):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
@@ -0,0 +1,252 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+# Columnar storage for tags.
+# Instead of one dict per tag, starts and ends are kept in parallel NumPy arrays of
+# integer milliseconds (exact to add, compare and shift) and categories as codes into
+# a table of interned names. That is 20 bytes per tag instead of a few hundred, and
+# bulk operations (shift, filter by category, total duration) are single NumPy
+# expressions. Indexing the store returns a Tag: a small view that reads and writes
+# its row and works like the old dicts, tag["start"] in seconds and tag["end"] None
+# while the tag is open. A view follows its row, so it is only valid until a tag is
+# inserted or removed before it. Code that must hold tags across changes (exports)
+# takes a copy with dict(tag).
+# Any other keys a tag has (notes, the video of a project query...) are kept as they
+# are in a side table of row -> extra values; they are rare, so it stays small.
+
+# End of a tag that is still open
+OPEN_END = -1
+
+_INITIAL_CAPACITY = 64
+
+
+def to_ms(seconds):
+    return int(round(seconds * 1000))
+
+
+class Tag(Mapping):
+    """Dict-like view of one row of a TagStore"""
+
+    __slots__ = ("_store", "_row")
+    KEYS = ("start", "end", "category")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._store.get_value(self._row, key)
+
+    def __setitem__(self, key, value):
+        self._store.set_value(self._row, key, value)
+
+    def __iter__(self):
+        yield from Tag.KEYS
+        yield from self._store.extras(self._row)
+
+    def __len__(self):
+        return len(Tag.KEYS) + len(self._store.extras(self._row))
+
+    def to_dict(self):
+        return {**{key: self[key] for key in Tag.KEYS}, **self._store.extras(self._row)}
+
+    def __repr__(self):
+        return f"Tag({self.to_dict()})"
+
+
+class TagStore:
+    """List-like collection of tags stored column by column"""
+
+    def __init__(self, tags=()):
+        self._start = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._end = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._category = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self._size = 0
+        self.categories = []
+        self._codes = {}
+        self._extras = {}  # row -> {key: value} of the keys other than Tag.KEYS
+        self.extend(tags)
+
+    # Columns, one value per tag (views: do not keep them across changes)
+    @property
+    def starts_ms(self):
+        return self._start[:self._size]
+
+    @property
+    def ends_ms(self):
+        return self._end[:self._size]
+
+    @property
+    def category_codes(self):
+        return self._category[:self._size]
+
+    def category_code(self, category):
+        """Code of a category name, interning it the first time"""
+        code = self._codes.get(category)
+        if code is None:
+            code = self._codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def __len__(self):
+        return self._size
+
+    def _row(self, position):
+        if position < 0:
+            position += self._size
+        if not 0 <= position < self._size:
+            raise IndexError("tag index out of range")
+        return position
+
+    def __getitem__(self, position):
+        return Tag(self, self._row(position))
+
+    def __iter__(self):
+        return (Tag(self, row) for row in range(self._size))
+
+    def extras(self, row):
+        """Keys of a row other than start, end and category (do not modify)"""
+        return self._extras.get(row, {})
+
+    def get_value(self, row, key):
+        if key == "start":
+            return int(self._start[row]) / 1000.0
+        if key == "end":
+            end = int(self._end[row])
+            return None if end == OPEN_END else end / 1000.0
+        if key == "category":
+            return self.categories[self._category[row]]
+        return self._extras.get(row, {})[key]
+
+    def set_value(self, row, key, value):
+        if key == "start":
+            self._start[row] = to_ms(value)
+        elif key == "end":
+            self._end[row] = OPEN_END if value is None else to_ms(value)
+        elif key == "category":
+            self._category[row] = self.category_code(value)
+        else:
+            self._extras.setdefault(row, {})[key] = value
+
+    def _reserve(self, size):
+        if size <= len(self._start):
+            return
+        capacity = max(size, 2 * len(self._start))
+        for name in ("_start", "_end", "_category"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def insert_many(self, position, tags):
+        """Insert tags (mappings with start, end and category) before position"""
+        rows = [(to_ms(tag["start"]), OPEN_END if tag.get("end") is None else to_ms(tag["end"]),
+                 self.category_code(tag.get("category", "General"))) for tag in tags]
+        if not rows:
+            return
+        count = len(rows)
+        self._reserve(self._size + count)
+        position = min(max(position, 0), self._size)
+        for column in (self._start, self._end, self._category):
+            column[position + count:self._size + count] = column[position:self._size].copy()
+        extras = {row + count if row >= position else row: values for row, values in self._extras.items()}
+        for offset, tag in enumerate(tags):
+            values = {key: value for key, value in tag.items() if key not in Tag.KEYS}
+            if values:
+                extras[position + offset] = values
+        self._extras = extras
+        values = np.array(rows, dtype=np.int64)
+        self._start[position:position + count] = values[:, 0]
+        self._end[position:position + count] = values[:, 1]
+        self._category[position:position + count] = values[:, 2]
+        self._size += count
+
+    def append(self, tag):
+        self.insert_many(self._size, [tag])
+
+    def extend(self, tags):
+        self.insert_many(self._size, list(tags))
+
+    def pop(self, position=-1):
+        row = self._row(position)
+        removed = self[row].to_dict()
+        for column in (self._start, self._end, self._category):
+            column[row:self._size - 1] = column[row + 1:self._size].copy()
+        if self._extras:
+            self._extras = {other - 1 if other > row else other: values
+                            for other, values in self._extras.items() if other != row}
+        self._size -= 1
+        return removed
+
+    def clear(self):
+        self._size = 0
+        self._extras = {}
+
+    def to_dicts(self):
+        return [tag.to_dict() for tag in self]
+
+    @classmethod
+    def from_columns(cls, starts_ms, ends_ms, codes, categories, extras=None):
+        """Store holding the given columns (ends OPEN_END for open tags, codes into categories).
+
+        extras maps rows to their other keys.
+        """
+        store = cls()
+        store._reserve(len(starts_ms))
+        store._start[:len(starts_ms)] = starts_ms
+        store._end[:len(starts_ms)] = ends_ms
+        store._category[:len(starts_ms)] = codes
+        store._size = len(starts_ms)
+        store.categories = list(categories)
+        store._codes = {name: code for code, name in enumerate(store.categories)}
+        store._extras = {row: dict(values) for row, values in (extras or {}).items()}
+        return store
+
+    def copy(self):
+        """Independent store with the same tags (a copy of the columns)"""
+        return TagStore.from_columns(self.starts_ms, self.ends_ms, self.category_codes, self.categories,
+                                     self._extras)
+
+    def assign(self, other):
+        """Replace the tags with those of another store, keeping this object"""
+        self.clear()
+        self._reserve(len(other))
+        self._start[:len(other)] = other.starts_ms
+        self._end[:len(other)] = other.ends_ms
+        self._category[:len(other)] = other.category_codes
+        self._size = len(other)
+        self.categories = list(other.categories)
+        self._codes = dict(other._codes)
+        self._extras = {row: dict(values) for row, values in other._extras.items()}
+
+    # Vectorised bulk operations
+
+    def category_mask(self, category):
+        code = self._codes.get(category)
+        if code is None:
+            return np.zeros(self._size, dtype=bool)
+        return self.category_codes == code
+
+    def closed_mask(self):
+        return self.ends_ms != OPEN_END
+
+    def shift(self, seconds, mask=None):
+        """Move tags (all, or those selected by a boolean mask) by seconds, not before 0.
+
+        Returns how many tags moved.
+        """
+        mask = np.ones(self._size, dtype=bool) if mask is None else mask
+        delta = to_ms(seconds)
+        starts, ends = self.starts_ms, self.ends_ms
+        closed = mask & self.closed_mask()
+        # Keep each tag's length when it would be clamped at 0
+        delta_per_tag = np.maximum(delta, -starts[mask])
+        ends[closed] += np.maximum(delta, -starts[closed])
+        starts[mask] += delta_per_tag
+        return int(mask.sum())
+
+    def total_duration(self, mask=None):
+        """Seconds covered by the finished tags (all, or those selected by a mask)"""
+        closed = self.closed_mask() if mask is None else mask & self.closed_mask()
+        return float((self.ends_ms[closed] - self.starts_ms[closed]).sum()) / 1000.0
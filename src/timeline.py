@@ -1,31 +1,217 @@
+import threading
+
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPainter, QColor, QMouseEvent, QFont
-from PyQt5.QtCore import Qt, pyqtSignal, QPoint
+from PyQt5.QtGui import QPainter, QColor, QMouseEvent, QFont, QPixmap
+from PyQt5.QtCore import Qt, pyqtSignal, QPoint, QRect
+
+from src.media.thumbnails import THUMB_HEIGHT, get_thumbnail_extractor, sample_times
+from src.media.suggestions import Suggestion
+from src.media.waveform import get_waveform
+
+# Vertical layout: tag labels and blocks on top, then the suggestion track, the filmstrip
+# and the audio waveform
+TAG_TRACK_HEIGHT = 40
+SUGGESTION_TOP = TAG_TRACK_HEIGHT
+SUGGESTION_HEIGHT = 10
+FILMSTRIP_TOP = SUGGESTION_TOP + SUGGESTION_HEIGHT + 2
+WAVEFORM_TOP = FILMSTRIP_TOP + THUMB_HEIGHT + 4
+WAVEFORM_HEIGHT = 32
 
 # This widget displays a timeline with tags and a current playback position.
 # It allows the user to click on tags to select them and emits a signal with the tag's start time.
 class TimelineWidget(QWidget):
     tag_clicked = pyqtSignal(float)
+    thumbnail_loaded = pyqtSignal(str, float, object)  # Emitted from extractor threads, handled in the GUI thread
+    waveform_loaded = pyqtSignal(str, object)  # Fingerprint, Waveform (None if the video has no audio)
+    suggestion_changed = pyqtSignal(object)  # Suggestion accepted or rejected on the suggestion track
 
     ## Constructor
-    # get_duration: function to get the duration of the video
+    # get_duration: function to get the duration of the video (VideoPlayer.get_duration reads it from the media info cache)
     # get_tags: function to get the list of tags
     # parent: parent widget (default is None)
-    # This widget is initialized with a minimum height of 40 pixels.
-    def __init__(self, get_duration, get_tags, parent=None):
+    # thumbnails: ThumbnailExtractor used for the filmstrip (default: the shared one)
+    # tags_at: function returning the indices of the tags covering a time (TagManager.tags_at);
+    # without it clicks scan the tag list
+    # This widget is initialized with a minimum height of 40 pixels, plus the filmstrip and waveform.
+    def __init__(self, get_duration, get_tags, parent=None, thumbnails=None, tags_at=None):
         super().__init__(parent)
         self.get_duration = get_duration
         self.get_tags = get_tags
-        self.setMinimumHeight(40)
+        self.tags_at = tags_at or self._scan_tags_at
+        self.setMinimumHeight(WAVEFORM_TOP + WAVEFORM_HEIGHT + 4)
         self.highlighted_index = None
         self.current_time = 0.0
 
+        # Filmstrip state: the video the thumbnails come from and the current layout
+        self.thumbnails = thumbnails or get_thumbnail_extractor()
+        self.video_path = None
+        self.fingerprint = None
+        self.thumb_width = THUMB_HEIGHT * 16 // 9
+        self.strip_times = []
+        self.strip_step = 0
+        self._strip_layout = None
+        self._pixmaps = {}
+        self._failed = set()
+        self.thumbnail_loaded.connect(self._on_thumbnail_loaded)
+
+        # Waveform of the video, computed (or read from its cache) in a background thread
+        self.waveform = None
+        self._waveform_cancel = None
+        self._waveform_columns = None
+        self.waveform_loaded.connect(self._on_waveform_loaded)
+
+        # Automatic tag suggestions (src.media.suggestions), reviewed on their own track
+        self.suggestions = []
+
+    ## Sets the video shown in the filmstrip.
+    # path: file the frames are extracted from (the source or its proxy, which share their timeline)
+    # media_info: MediaInfo of the source; its fingerprint keys the thumbnail cache
+    def set_video(self, path, media_info):
+        if media_info.fingerprint != self.fingerprint:
+            self.thumbnails.cancel_pending()
+            self._pixmaps = {}
+            self._failed = set()
+            self._strip_layout = None
+            self._load_waveform(path, media_info.fingerprint)
+        self.video_path = path
+        self.fingerprint = media_info.fingerprint
+        if media_info.width and media_info.height:
+            self.thumb_width = max(1, THUMB_HEIGHT * media_info.width // media_info.height)
+        self.update()
+
     ## This method sets the current playback time of the video.
     # It takes a time in seconds and updates the current_time attribute.
     def set_current_time(self, time_sec):
         self.current_time = time_sec
         self.update()
 
+    ## Shows suggestions on the suggestion track (an empty list clears it).
+    def set_suggestions(self, suggestions):
+        self.suggestions = list(suggestions)
+        self.update()
+
+    ## Draws the suggestion track: pending suggestions outlined, accepted ones filled green
+    # and rejected ones faded.
+    def _paint_suggestions(self, painter, duration):
+        colors = {
+            Suggestion.PENDING: QColor(240, 190, 40, 200),
+            Suggestion.ACCEPTED: QColor(60, 170, 80, 230),
+            Suggestion.REJECTED: QColor(150, 150, 150, 90),
+        }
+        for suggestion in self.suggestions:
+            x = int(suggestion.start / duration * self.width())
+            width = max(2, int((suggestion.end - suggestion.start) / duration * self.width()))
+            rect = QRect(x, SUGGESTION_TOP, width, SUGGESTION_HEIGHT)
+            color = colors[suggestion.state]
+            if suggestion.state == Suggestion.PENDING:
+                painter.setPen(color)
+                painter.setBrush(Qt.NoBrush)
+                painter.drawRect(rect.adjusted(0, 0, -1, -1))
+            else:
+                painter.fillRect(rect, color)
+        painter.setBrush(Qt.NoBrush)
+
+    ## Left click accepts a suggestion (or takes the acceptance back), right click rejects it.
+    def _review_suggestion(self, clicked_time, button):
+        for suggestion in self.suggestions:
+            if suggestion.start <= clicked_time <= suggestion.end:
+                target = Suggestion.REJECTED if button == Qt.RightButton else Suggestion.ACCEPTED
+                suggestion.state = Suggestion.PENDING if suggestion.state == target else target
+                self.update()
+                self.suggestion_changed.emit(suggestion)
+                return
+
+    ## Starts computing the waveform of a new video, cancelling the one of the previous video.
+    def _load_waveform(self, path, fingerprint):
+        if self._waveform_cancel is not None:
+            self._waveform_cancel.set()
+        self.waveform = None
+        self._waveform_columns = None
+        cancel = self._waveform_cancel = threading.Event()
+
+        def load():
+            waveform = get_waveform(path, fingerprint, cancel_event=cancel)
+            if not cancel.is_set():
+                self.waveform_loaded.emit(fingerprint, waveform)
+        threading.Thread(target=load, daemon=True).start()
+
+    def _on_waveform_loaded(self, fingerprint, waveform):
+        if fingerprint == self.fingerprint:
+            self.waveform = waveform
+            self._waveform_columns = None
+            self.update()
+
+    ## Draws the waveform lane: min/max envelope with the RMS loudness on top.
+    # One value per pixel column, taken from the pyramid level matching the pixels per second.
+    def _paint_waveform(self, painter, duration):
+        layout = (self.width(), duration)
+        if self._waveform_columns is None or self._waveform_columns[0] != layout:
+            self._waveform_columns = (layout, self.waveform.columns(self.width(), 0.0, duration))
+        columns = self._waveform_columns[1]
+
+        middle = WAVEFORM_TOP + WAVEFORM_HEIGHT // 2
+        half = WAVEFORM_HEIGHT / 2
+        painter.fillRect(0, WAVEFORM_TOP, self.width(), WAVEFORM_HEIGHT, QColor(40, 40, 50))
+        painter.setPen(QColor(90, 150, 220))
+        for x, (low, high, _) in enumerate(columns):
+            painter.drawLine(x, int(middle - high * half), x, int(middle - low * half))
+        painter.setPen(QColor(170, 220, 255))
+        for x, (_, _, rms) in enumerate(columns):
+            if rms > 0:
+                painter.drawLine(x, int(middle - rms * half), x, int(middle + rms * half))
+
+    ## Recomputes the thumbnail times when the width or the duration changed.
+    # Thumbnails of the previous layout that are not needed any more are dropped and
+    # their pending extractions cancelled.
+    def _layout_strip(self, duration):
+        layout = (self.fingerprint, self.width(), duration)
+        if layout == self._strip_layout:
+            return
+        self._strip_layout = layout
+        self.strip_times, self.strip_step = sample_times(duration, self.width(), self.thumb_width)
+        self.thumbnails.cancel_pending()
+        wanted = set(self.strip_times)
+        self._pixmaps = {t: pixmap for t, pixmap in self._pixmaps.items() if t in wanted}
+
+    def _on_thumbnail_loaded(self, fingerprint, seconds, data):
+        if fingerprint != self.fingerprint:
+            return
+        if data is None:
+            self._failed.add(seconds)
+            return
+        if seconds in self.strip_times:
+            pixmap = QPixmap()
+            if pixmap.loadFromData(data, "JPG"):
+                self._pixmaps[seconds] = pixmap
+                self.update()
+
+    ## Draws the filmstrip. Thumbnails not loaded yet are requested (never waited for)
+    # and drawn as placeholders until thumbnail_loaded brings them in.
+    def _paint_filmstrip(self, painter, duration):
+        self._layout_strip(duration)
+        for i, t in enumerate(self.strip_times):
+            x = int(t / duration * self.width())
+            next_x = int(min(t + self.strip_step, duration) / duration * self.width())
+            rect = QRect(x, FILMSTRIP_TOP, max(1, next_x - x), THUMB_HEIGHT)
+
+            pixmap = self._pixmaps.get(t)
+            if pixmap is None and t not in self._failed:
+                fingerprint = self.fingerprint
+                data = self.thumbnails.request(
+                    self.video_path, fingerprint, t,
+                    lambda seconds, data: self.thumbnail_loaded.emit(fingerprint, seconds, data))
+                if data is not None:
+                    self._on_thumbnail_loaded(fingerprint, t, data)
+                    pixmap = self._pixmaps.get(t)
+
+            if pixmap is None:
+                painter.fillRect(rect, QColor(200, 200, 200) if i % 2 else QColor(185, 185, 185))
+                continue
+            painter.save()
+            painter.setClipRect(rect)
+            painter.drawPixmap(rect.x() + (rect.width() - pixmap.width()) // 2, rect.y(), pixmap)
+            painter.restore()
+
     ## This method is called when the widget needs to be repainted.
     # It uses a QPainter to draw the timeline, tags, and current playback position.
     # It retrieves the duration and tags from the provided functions and draws them on the widget.
@@ -42,6 +228,12 @@ class TimelineWidget(QWidget):
             return
 
         painter.fillRect(self.rect(), QColor(230, 230, 230))
+        if self.fingerprint:
+            self._paint_filmstrip(painter, duration)
+        if self.waveform is not None:
+            self._paint_waveform(painter, duration)
+        if self.suggestions:
+            self._paint_suggestions(painter, duration)
 
         font = QFont("Arial", 8)
         painter.setFont(font)
@@ -92,12 +284,21 @@ class TimelineWidget(QWidget):
             painter.drawPolygon(*points)
 
 
+    ## Indices of the finished tags covering time_sec, by scanning the list returned by get_tags.
+    def _scan_tags_at(self, time_sec):
+        return [i for i, tag in enumerate(self.get_tags())
+                if tag["end"] is not None and tag["start"] <= time_sec <= tag["end"]]
+
     # This method is called when the user clicks on the widget.
-    # It calculates the clicked time based on the mouse position and checks if it falls within any of the tags.
+    # It calculates the clicked time based on the mouse position and looks up the tags covering it.
     def mousePressEvent(self, event: QMouseEvent):
         duration = self.get_duration()
         tags = self.get_tags()
 
+        if duration and self.suggestions and SUGGESTION_TOP <= event.y() < SUGGESTION_TOP + SUGGESTION_HEIGHT:
+            self._review_suggestion(event.x() / self.width() * duration, event.button())
+            return
+
         if not duration or not tags:
             return
 
@@ -105,9 +306,8 @@ class TimelineWidget(QWidget):
         clicked_ratio = click_x / self.width()
         clicked_time = clicked_ratio * duration
 
-        for i, tag in enumerate(tags):
-            if tag["start"] <= clicked_time <= tag["end"]:
-                self.highlighted_index = i
-                self.update()
-                self.tag_clicked.emit(tag["start"])
-                break
+        hits = self.tags_at(clicked_time)
+        if hits:
+            self.highlighted_index = hits[0]
+            self.update()
+            self.tag_clicked.emit(tags[hits[0]]["start"])
@@ -1,9 +1,19 @@
 from PyQt5.QtWidgets import (QWidget, QPushButton, QVBoxLayout, QProgressBar, QHBoxLayout, 
-                             QLabel, QGroupBox, QLineEdit, QComboBox, QFileDialog, QMessageBox)
+                             QLabel, QGroupBox, QLineEdit, QComboBox, QFileDialog, QMessageBox,
+                             QCheckBox, QDoubleSpinBox, QDialog, QListWidget, QListWidgetItem,
+                             QDialogButtonBox)
 from PyQt5.QtCore import Qt
 from .base_component import UIComponent
-from src.exporter import ExporterThread
+from src.exporter import ExporterThread, ReelExporterThread
+from src.export.reel import ORDER_TIME, ORDER_CATEGORY
+from src.config import load_categories
+from src.export.smart_cut import MODE_REENCODE, MODE_SMART, MODE_KEYFRAME
+from src.export.pipeline import MODE_SINGLE_PASS
+from src.export.planner import MODE_COALESCE
+from src.export.journal import find_resumable, unregister_pending
+from src.export.profiles import PROFILES
 from src.utils.logger import AppLogger
+from src.utils.utils import format_time
 
 class FileControls(UIComponent):
     def __init__(self, parent=None, video_player=None, tags=None):
@@ -12,20 +22,79 @@ class FileControls(UIComponent):
             raise ValueError("video_player must be provided")
         self.video_player = video_player
         self.tags = tags if tags is not None else []
+        self.export_tags = self.tags  # Tags of the export in progress
+        self.video_path = None
         self.output_directory = None
         self.logger = AppLogger.get_logger()
         self.export_threads = []
+        self.reel_thread = None
+        self.export_cancelled = False
+        self.completed_clips = 0
+        self.failed_clips = []
+        self.batch_eta = None
+        self.clip_etas = {}
 
     def setup_ui(self, layout):
         # Create main group box for file controls
         file_group = QGroupBox("Export Controls")
         file_layout = QVBoxLayout(file_group)
 
+        # Export mode selector
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("Mode:"))
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItem("Re-encode (accurate)", MODE_REENCODE)
+        self.mode_combo.addItem("Smart cut (fast, accurate)", MODE_SMART)
+        self.mode_combo.addItem("Keyframe snap (fastest)", MODE_KEYFRAME)
+        self.mode_combo.addItem("Single pass (many clips, one decode)", MODE_SINGLE_PASS)
+        self.mode_combo.addItem("Coalesce overlapping tags", MODE_COALESCE)
+        mode_layout.addWidget(self.mode_combo, stretch=1)
+        file_layout.addLayout(mode_layout)
+
+        # Encoder profile (preset, quality, size)
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Profile:"))
+        self.profile_combo = QComboBox()
+        for profile in PROFILES.values():
+            self.profile_combo.addItem(profile.label, profile.name)
+        profile_layout.addWidget(self.profile_combo, stretch=1)
+        file_layout.addLayout(profile_layout)
+
+        # Re-exports only render new or edited clips
+        self.incremental_checkbox = QCheckBox("Skip unchanged clips")
+        self.incremental_checkbox.setChecked(True)
+        file_layout.addWidget(self.incremental_checkbox)
+
+        # Short clips are not kept waiting behind long ones
+        self.shortest_first_checkbox = QCheckBox("Export shortest clips first")
+        file_layout.addWidget(self.shortest_first_checkbox)
+
+        # Same-category tags closer than this are exported as one clip (0 = off)
+        merge_layout = QHBoxLayout()
+        merge_layout.addWidget(QLabel("Merge same category within (s):"))
+        self.merge_gap_spin = QDoubleSpinBox()
+        self.merge_gap_spin.setRange(0.0, 60.0)
+        self.merge_gap_spin.setSingleStep(0.5)
+        self.merge_gap_spin.setValue(0.0)
+        merge_layout.addWidget(self.merge_gap_spin)
+        file_layout.addLayout(merge_layout)
+
         # Export button
         self.export_button = QPushButton("📤 Export Clips")
         self.export_button.clicked.connect(self.export_clips)
         file_layout.addWidget(self.export_button)
 
+        # Stops the running export; it can be resumed later
+        self.cancel_button = QPushButton("⏹ Cancel Export")
+        self.cancel_button.clicked.connect(self.cancel_export)
+        self.cancel_button.setVisible(False)
+        file_layout.addWidget(self.cancel_button)
+
+        # Highlight reel button
+        self.reel_button = QPushButton("🎬 Export Highlight Reel")
+        self.reel_button.clicked.connect(self.export_reel)
+        file_layout.addWidget(self.reel_button)
+
         # Progress section with better layout
         progress_group = QGroupBox("Export Progress")
         progress_layout = QVBoxLayout(progress_group)
@@ -99,45 +168,163 @@ class FileControls(UIComponent):
             )
 
         if self.output_directory:
-            # Initialize progress UI
-            self.status_label.setText("Export started... This may take a few minutes.")
-            self.status_label.setStyleSheet("color: blue;")
-            self.status_label.setVisible(True)
-            
-            self.progress_bar.setMaximum(100)
-            self.progress_bar.setValue(0)
-            self.progress_bar.setVisible(True)
-            
-            self.clip_progress_bar.setMaximum(100)
-            self.clip_progress_bar.setValue(0)
-            self.clip_progress_bar.setVisible(True)
-            
-            self.progress_label.setVisible(True)
-            self.current_clip_label.setVisible(True)  # Fixed: using correct label reference
-            self.clip_name_label.setVisible(True)
-            self.clip_percentage.setVisible(True)
-            self.progress_percentage.setVisible(True)
-            
-            self.export_button.setEnabled(False)
-            
-            # Clear any existing threads
-            self.export_threads.clear()
-            
-            # Create export thread
-            thread = ExporterThread(
+            self.start_export(
                 self.tags,
-                self.video_path, 
-                self.output_directory, 
-                "clip"
+                mode=self.mode_combo.currentData(),
+                profile=self.profile_combo.currentData(),
+                incremental=self.incremental_checkbox.isChecked(),
+                shortest_first=self.shortest_first_checkbox.isChecked(),
+                merge_gap=self.merge_gap_spin.value() or None
             )
-            
-            thread.progress.connect(self.update_overall_progress)
-            thread.clip_progress.connect(self.update_clip_progress)
-            thread.finished.connect(lambda t=thread: self.on_thread_finished(t))
-            
-            self.export_threads.append(thread)
-            thread.start()
-            self.logger.info(f"Started export thread")
+
+    ## Ofrecer reanudar exportaciones interrumpidas (cierre o fallo de la aplicación)
+    def offer_resume(self):
+        for session in find_resumable():
+            answer = QMessageBox.question(
+                self.parent,
+                "Resume Export",
+                f"An export to {session.output_dir} was interrupted with "
+                f"{len(session.pending)} of {len(session.states)} clips left.\nResume it now?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if answer != QMessageBox.Yes:
+                unregister_pending(session.output_dir)
+                continue
+            if self.export_threads:
+                QMessageBox.warning(self.parent, "Warning", "Another export is already running.")
+                return
+            self.video_path = session.video_path
+            self.output_directory = session.output_dir
+            self.start_export(session.tags, resume=True, **session.settings)
+
+    def start_export(self, tags, resume=False, **settings):
+        """Launch the export thread for tags into self.output_directory"""
+        # Initialize progress UI
+        self.status_label.setText("Export started... This may take a few minutes.")
+        self.status_label.setStyleSheet("color: blue;")
+        self.status_label.setVisible(True)
+        
+        self.progress_bar.setMaximum(100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        
+        self.clip_progress_bar.setMaximum(100)
+        self.clip_progress_bar.setValue(0)
+        self.clip_progress_bar.setVisible(True)
+        
+        self.progress_label.setVisible(True)
+        self.current_clip_label.setVisible(True)  # Fixed: using correct label reference
+        self.clip_name_label.setVisible(True)
+        self.clip_percentage.setVisible(True)
+        self.progress_percentage.setVisible(True)
+        
+        self.export_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.setVisible(True)
+        self.export_cancelled = False
+        
+        # Clear any existing threads
+        self.export_threads.clear()
+        self.completed_clips = 0
+        self.failed_clips = []
+        self.batch_eta = None
+        self.clip_etas = {}
+        
+        # Create export thread
+        thread = ExporterThread(
+            tags,
+            self.video_path, 
+            self.output_directory, 
+            "clip",
+            resume=resume,
+            **settings
+        )
+        # The export works on its own copy of the tags; clip indices refer to it
+        self.export_tags = thread.engine.tags
+        
+        thread.progress.connect(self.update_overall_progress)
+        thread.clip_progress.connect(self.update_clip_progress)
+        thread.clip_finished.connect(self.on_clip_finished)
+        thread.eta.connect(self.update_eta)
+        thread.finished.connect(lambda t=thread: self.on_thread_finished(t))
+        
+        self.export_threads.append(thread)
+        thread.start()
+        self.logger.info(f"Started export thread")
+
+    ## Exportar un único vídeo resumen con los tags seleccionados
+    def export_reel(self):
+        closed_tags = [tag for tag in self.tags if tag["end"] is not None]
+        if not closed_tags:
+            QMessageBox.warning(self.parent, "Warning", "There are no finished tags to build a reel from.")
+            return
+        if not self.video_path:
+            QMessageBox.warning(self.parent, "Warning", "Please load a video first")
+            return
+
+        # Ask for categories and order
+        dialog = QDialog(self.parent)
+        dialog.setWindowTitle("Highlight Reel")
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(QLabel("Categories:"))
+        category_list = QListWidget()
+        for category in dict.fromkeys(tag["category"] for tag in closed_tags):
+            item = QListWidgetItem(category)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            category_list.addItem(item)
+        layout.addWidget(category_list)
+        order_combo = QComboBox()
+        order_combo.addItem("Match time", ORDER_TIME)
+        order_combo.addItem("Category", ORDER_CATEGORY)
+        layout.addWidget(order_combo)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+
+        categories = [category_list.item(n).text() for n in range(category_list.count())
+                      if category_list.item(n).checkState() == Qt.Checked]
+        output_path, _ = QFileDialog.getSaveFileName(self.parent, "Save Highlight Reel", "reel.mp4", "MP4 (*.mp4)")
+        if not output_path:
+            return
+
+        self.status_label.setText("Building highlight reel...")
+        self.status_label.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.reel_button.setEnabled(False)
+
+        thread = ReelExporterThread(
+            self.tags, self.video_path, output_path,
+            categories=categories, order=order_combo.currentData(),
+            category_order=load_categories(), profile=self.profile_combo.currentData())
+        thread.progress.connect(self.update_overall_progress)
+        thread.finished.connect(lambda t=thread: self.on_reel_finished(t))
+        self.reel_thread = thread
+        thread.start()
+
+    def on_reel_finished(self, thread):
+        """Handle completion of the highlight reel thread"""
+        self.reel_thread = None
+        thread.deleteLater()
+        self.progress_bar.setVisible(False)
+        self.status_label.setVisible(False)
+        self.reel_button.setEnabled(True)
+        if thread.success:
+            QMessageBox.information(self.parent, "Highlight Reel", f"Highlight reel saved to:\n{thread.output_path}")
+        else:
+            QMessageBox.warning(self.parent, "Highlight Reel", "The highlight reel could not be exported.")
+
+    def cancel_export(self):
+        """Kill the running export (finished clips are kept)"""
+        self.export_cancelled = True
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("Cancelling export...")
+        for thread in self.export_threads:
+            thread.cancel()
 
     def update_overall_progress(self, value):
         """Update the overall progress bar"""
@@ -149,9 +336,11 @@ class FileControls(UIComponent):
 
     def update_clip_progress(self, clip_index, value):
         """Update the current clip progress"""
-        if clip_index < len(self.tags):
-            clip = self.tags[clip_index]
-            self.clip_name_label.setText(f"Processing: {clip['category']}_{clip_index + 1}")
+        if clip_index < len(self.export_tags):
+            clip = self.export_tags[clip_index]
+            eta = self.clip_etas.get(clip_index)
+            eta_text = f" (~{format_time(eta)} left)" if eta is not None and value < 100 else ""
+            self.clip_name_label.setText(f"Processing: {clip['category']}_{clip_index + 1}{eta_text}")
             self.clip_name_label.repaint()
             
         self.clip_progress_bar.setValue(value)
@@ -160,6 +349,27 @@ class FileControls(UIComponent):
         self.clip_progress_bar.repaint()
         self.clip_percentage.repaint()
 
+    def on_clip_finished(self, clip_index, success):
+        """Record the result of a single clip (clips complete out of order)"""
+        self.completed_clips += 1
+        if not success:
+            self.failed_clips.append(clip_index)
+        self.update_status()
+
+    def update_eta(self, batch_seconds, clip_seconds):
+        """Store the latest time estimates of the export"""
+        self.batch_eta = batch_seconds
+        self.clip_etas = clip_seconds
+        self.update_status()
+
+    def update_status(self):
+        """Show finished clips and the estimated time left"""
+        total = sum(1 for tag in self.export_tags if tag["end"] is not None)
+        text = f"Exported {self.completed_clips}/{total} clips..."
+        if self.batch_eta is not None:
+            text += f" about {format_time(self.batch_eta)} left"
+        self.status_label.setText(text)
+
     def on_thread_finished(self, thread):
         """Handle completion of export thread"""
         if thread in self.export_threads:
@@ -186,7 +396,29 @@ class FileControls(UIComponent):
         self.status_label.setVisible(False)
         
         self.export_button.setEnabled(True)
-        
+        self.cancel_button.setVisible(False)
+
+        if self.export_cancelled:
+            QMessageBox.information(
+                self.parent,
+                "Export Cancelled",
+                f"{self.completed_clips} clips were exported to:\n{self.output_directory}\n"
+                "The export can be resumed the next time the application starts."
+            )
+            self.logger.info("Export cancelled by the user")
+            return
+
+        if self.failed_clips:
+            failed = ", ".join(str(i + 1) for i in sorted(self.failed_clips))
+            QMessageBox.warning(
+                self.parent,
+                "Export Finished With Errors",
+                f"{len(self.failed_clips)} clips could not be exported ({failed}).\n"
+                f"The rest have been exported to:\n{self.output_directory}"
+            )
+            self.logger.warning(f"Export finished with failed clips: {failed}")
+            return
+
         QMessageBox.information(
             self.parent,
             "Export Complete",
@@ -1,17 +1,29 @@
 from PyQt5.QtWidgets import (
     QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QLabel, QDialog, QInputDialog,
-    QMessageBox, QListWidget, QSpinBox, QLineEdit, QComboBox,
-      QGroupBox, QMainWindow, QSplitter, QMenuBar, QAction, QMenu, QStyle)
+    QMessageBox, QListWidget, QSpinBox, QLineEdit, QComboBox, QFileDialog,
+      QGroupBox, QMainWindow, QSplitter, QMenuBar, QAction, QMenu, QStyle, QDockWidget)
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
 from src.ui.base_component import UIComponent
 from src.player import VideoPlayer
 from src.ui.video_player_controls_widget import PlayerControls
 from src.ui.tag_widget import TagControls
+from src.ui.tag_list_model import TagListModel
+from src.ui.stats_widget import TagStatsPanel
+from src.tag_stats import TagStats
 from src.ui.file_controls_widget import FileControls
 from src.utils.logger import AppLogger
 from src.tag_manager import TagManager
+from src.tag_journal import TagJournal
+from src.config import get_cache_dir
+from src.timeline import TimelineWidget
+from src.suggester import SuggestionThread
+from src.media.suggestions import Suggestion
+from src.media.keyframes import SNAP_NEXT, SNAP_PREVIOUS
+
+# Large tag files open much faster in the binary format
+TAG_FILE_FILTER = "JSON (*.json);;Tags binarios (*.vtags)"
 
 ## Main application window for Video Tagger
 class VideoTaggerApp(QMainWindow):
@@ -35,10 +47,24 @@ class VideoTaggerApp(QMainWindow):
         # Initialize components
         self.player_controls = PlayerControls(self)
         self.tag_controls = TagControls(self)
+        # The tag list is a view over the tag manager, updated row by row as tags change
+        self.tag_model = TagListModel(self.tag_manager, self)
+        self.tag_controls.set_tag_model(self.tag_model)
+        # Statistics per category, kept up to date as tags change
+        self.tag_stats = TagStats(self.tag_manager)
         
          # Pass video_player to FileControls
         self.file_controls = FileControls(self, video_player=self.video_player, tags=self.tag_manager.get_tags())
 
+        # Timeline with tags and filmstrip below the video
+        self.timeline = TimelineWidget(get_duration=self.video_player.get_duration,
+                                       get_tags=self.tag_manager.get_tags,
+                                       tags_at=self.tag_manager.tags_at)
+        self.suggestion_thread = None
+        self._suggest_when_idle = False  # Analyse the new video once the old analysis stopped
+        # Widen new tags to keyframes so they can be exported by stream copy
+        self.snap_tags = False
+
         self.player_controls.set_video_player(self.video_player)  # Set the video player
         self.tag_controls.set_video_player(self.video_player)
 
@@ -47,6 +73,16 @@ class VideoTaggerApp(QMainWindow):
         self.setup_menu()
         self.setup_connections()
 
+        # Autosave: restore the tags of the previous session and journal every change
+        self.tag_journal = TagJournal(get_cache_dir("autosave"))
+        restored = self.tag_manager.set_journal(self.tag_journal)
+        if restored:
+            self.refresh_tags()
+            self.statusBar().showMessage(f"Recuperados {restored} tags de la sesión anterior", 5000)
+
+        # Offer to resume exports interrupted by a crash once the window is up
+        QTimer.singleShot(0, self.file_controls.offer_resume)
+
     def setup_menu(self):
         """Setup the application menu bar"""
         menubar = self.menuBar()
@@ -65,13 +101,12 @@ class VideoTaggerApp(QMainWindow):
         # Save tags action
         save_action = QAction(self.style().standardIcon(QStyle.SP_CommandLink), 'Guardar Tags', self)
         save_action.setShortcut('Ctrl+S')
-        #save_action.triggered.connect(self.save_tags)
-        #save_action.triggered.connect(self.file_controls.save_tags)
+        save_action.triggered.connect(self.save_tags)
         archivo_menu.addAction(save_action)
 
 
         load_action = QAction('Cargar Tags', self)
-        #load_action.triggered.connect(self.file_controls.load_tags) 
+        load_action.triggered.connect(self.load_tags)
         archivo_menu.addAction(load_action)
         export_action = QAction(self.style().standardIcon(QStyle.SP_DialogSaveButton),'Exportar Clip', self)
         export_action.triggered.connect(self.file_controls.export_clips)
@@ -88,6 +123,57 @@ class VideoTaggerApp(QMainWindow):
         time_settings_action = QAction('Ajustes de Tiempo', self)
         time_settings_action.triggered.connect(self.edit_time_settings)
         config_menu.addAction(time_settings_action)
+
+        proxy_action = QAction('Usar proxies para vídeos de alta resolución', self)
+        proxy_action.setCheckable(True)
+        proxy_action.setChecked(self.video_player.use_proxies)
+        proxy_action.toggled.connect(self.video_player.set_use_proxies)
+        config_menu.addAction(proxy_action)
+
+        snap_seeks_action = QAction('Saltos rápidos a keyframes', self)
+        snap_seeks_action.setCheckable(True)
+        snap_seeks_action.toggled.connect(lambda checked: setattr(self.video_player, "snap_seeks", checked))
+        config_menu.addAction(snap_seeks_action)
+
+        snap_tags_action = QAction('Ajustar tags a keyframes', self)
+        snap_tags_action.setCheckable(True)
+        snap_tags_action.toggled.connect(lambda checked: setattr(self, "snap_tags", checked))
+        config_menu.addAction(snap_tags_action)
+
+        # Navegar menu: jump between tags
+        navigate_menu = menubar.addMenu('Navegar')
+        next_tag_action = QAction('Tag siguiente', self)
+        next_tag_action.setShortcut('Ctrl+Right')
+        next_tag_action.triggered.connect(lambda: self.jump_to_tag(forward=True))
+        navigate_menu.addAction(next_tag_action)
+
+        previous_tag_action = QAction('Tag anterior', self)
+        previous_tag_action.setShortcut('Ctrl+Left')
+        previous_tag_action.triggered.connect(lambda: self.jump_to_tag(forward=False))
+        navigate_menu.addAction(previous_tag_action)
+
+        # Análisis menu: automatic tag suggestions, reviewed on the timeline
+        analysis_menu = menubar.addMenu('Análisis')
+        suggest_action = QAction('Sugerir tags (audio y cambios de plano)', self)
+        suggest_action.triggered.connect(self.suggest_tags)
+        analysis_menu.addAction(suggest_action)
+
+        accept_action = QAction('Convertir sugerencias aceptadas en tags', self)
+        accept_action.triggered.connect(self.convert_suggestions)
+        analysis_menu.addAction(accept_action)
+
+        clear_action = QAction('Descartar sugerencias', self)
+        clear_action.triggered.connect(lambda: self.timeline.set_suggestions([]))
+        analysis_menu.addAction(clear_action)
+
+        analysis_menu.addSeparator()
+        stats_action = self.stats_dock.toggleViewAction()
+        stats_action.setText('Estadísticas')
+        analysis_menu.addAction(stats_action)
+
+        export_stats_action = QAction('Exportar estadísticas...', self)
+        export_stats_action.triggered.connect(self.export_stats)
+        analysis_menu.addAction(export_stats_action)
         
         # Salir action
         salir_action = QAction('Salir', self)
@@ -116,13 +202,25 @@ class VideoTaggerApp(QMainWindow):
         # self.tag_controls.set_video_player(self.video_player)
         # self.player_controls.set_video_player(self.video_player)
         
+        video_panel = QWidget()
+        video_layout = QVBoxLayout(video_panel)
+        video_layout.setContentsMargins(0, 0, 0, 0)
+        video_layout.addWidget(self.video_player, 1)
+        video_layout.addWidget(self.timeline)
+
         splitter.addWidget(controls_panel)
-        splitter.addWidget(self.video_player)
+        splitter.addWidget(video_panel)
         splitter.setSizes([300, 700])
 
         # Main layout
         main_layout.addWidget(splitter)
 
+        # Statistics panel, hidden until opened from the Análisis menu
+        self.stats_dock = QDockWidget("Estadísticas", self)
+        self.stats_dock.setWidget(TagStatsPanel(self.tag_stats))
+        self.addDockWidget(Qt.RightDockWidgetArea, self.stats_dock)
+        self.stats_dock.hide()
+
     def setup_connections(self):
         """
         Sets up signal-slot connections for the main window's UI components.
@@ -138,23 +236,177 @@ class VideoTaggerApp(QMainWindow):
         self.player_controls.forward_button.clicked.connect(lambda: self.video_player.seek_relative(5))
         self.player_controls.speed_down_button.clicked.connect(lambda: self.video_player.change_speed(-0.25))
         self.player_controls.speed_up_button.clicked.connect(lambda: self.video_player.change_speed(0.25))
+        self.video_player.proxy_progress.connect(
+            lambda percent: self.statusBar().showMessage(f"Generando proxy: {percent}%"))
+        self.video_player.proxy_ready.connect(
+            lambda source, proxy: self.statusBar().showMessage("Reproduciendo proxy de baja resolución", 5000))
         
+        # Timeline
+        self.video_player.time_changed.connect(self.timeline.set_current_time)
+        self.video_player.media_info_loaded.connect(
+            lambda info: self.timeline.set_video(self.video_player.video_path, info))
+        self.video_player.video_loaded.connect(self.on_video_loaded)
+        self.video_player.proxy_ready.connect(self.on_proxy_ready)
+        self.timeline.tag_clicked.connect(self.video_player.set_time)
+        # Reviewing a suggestion jumps to it
+        self.timeline.suggestion_changed.connect(lambda suggestion: self.video_player.set_time(suggestion.start))
+
         # Tag controls
         self.tag_controls.tag_started.connect(self.on_tag_started)
         self.tag_controls.tag_ended.connect(self.on_tag_ended)
 
-        # Update file controls when tags change
-        self.tag_controls.tag_started.connect(lambda *args: self.file_controls.set_tags(self.tag_manager.get_tags()))
-        self.tag_controls.tag_ended.connect(lambda *args: self.file_controls.set_tags(self.tag_manager.get_tags()))
+        self.tag_controls.tag_removed.connect(self.on_tag_removed)
+
+        # Update file controls when tags are added or removed
+        for signal in (self.tag_model.rowsInserted, self.tag_model.rowsRemoved, self.tag_model.modelReset):
+            signal.connect(lambda *args: self.file_controls.set_tags(self.tag_manager.get_tags()))
+
+    def refresh_tags(self):
+        """Show the current tags in every widget after they changed in bulk"""
+        # The tag list and file controls follow the tag model; the timeline repaints
+        self.timeline.update()
+
+    def save_tags(self):
+        """Save the tags to a tag file of the user's choice (they are also autosaved)"""
+        path, _ = QFileDialog.getSaveFileName(self, "Guardar Tags", "tags.json", TAG_FILE_FILTER)
+        if not path:
+            return
+        try:
+            self.tag_manager.save_tags(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Guardar Tags", f"No se pudieron guardar los tags: {e}")
+            return
+        self.statusBar().showMessage(f"Tags guardados en {path}", 5000)
+
+    def load_tags(self):
+        """Replace the tags with those of a tag file"""
+        path, _ = QFileDialog.getOpenFileName(self, "Cargar Tags", "", TAG_FILE_FILTER)
+        if not path:
+            return
+        try:
+            self.tag_manager.load_tags(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            QMessageBox.critical(self, "Cargar Tags", f"No se pudieron cargar los tags: {e}")
+            return
+        self.refresh_tags()
+        self.logger.info(f"Loaded {len(self.tag_manager.get_tags())} tags from {path}")
+
+    def export_stats(self):
+        """Write the tag statistics to a CSV or JSON file"""
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar estadísticas", "estadisticas.csv",
+                                              "CSV (*.csv);;JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.tag_stats.write(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Estadísticas", f"No se pudieron exportar las estadísticas: {e}")
+            return
+        self.statusBar().showMessage(f"Estadísticas exportadas a {path}", 5000)
+
+    def closeEvent(self, event):
+        self.video_player.cancel_proxy(wait=True)
+        # Stop the analysis before its worker processes outlive the window
+        if self.suggestion_thread is not None:
+            self.suggestion_thread.cancel()
+            self.suggestion_thread.wait()
+        # Write the last queued tag changes before quitting
+        self.tag_journal.close()
+        super().closeEvent(event)
+
+    def on_proxy_ready(self, source_path, proxy_path):
+        # The proxy shares the source timeline and decodes much faster, so the filmstrip uses it too
+        if source_path == self.video_player.video_path and self.video_player.media_info:
+            self.timeline.set_video(proxy_path, self.video_player.media_info)
+
+    def jump_to_tag(self, forward):
+        """Seek to the start of the next (or previous) tag"""
+        # The player reports its time with some slack, so step a little past the tag it was
+        # just moved to before looking up the next one
+        current = self.video_player.get_time()
+        if forward:
+            index = self.tag_manager.next_tag(current + 0.05)
+        else:
+            index = self.tag_manager.previous_tag(current - 0.05)
+        if index is None:
+            return
+        self.timeline.highlighted_index = index
+        self.timeline.update()
+        self.video_player.set_time(self.tag_manager.get_tags()[index]["start"], snap=False)
+
+    def suggest_tags(self):
+        """Analyse the loaded video in the background and show its tag suggestions"""
+        duration = self.video_player.get_duration()
+        if not self.video_player.video_path or not duration:
+            QMessageBox.warning(self, "Sugerencias", "Carga un vídeo primero.")
+            return
+        if self.suggestion_thread is not None and self.suggestion_thread.isRunning():
+            if self.suggestion_thread.video_path != self.video_player.video_path:
+                # The analysis of the previous video is winding down; start once it stopped
+                self._suggest_when_idle = True
+            return
+        self.suggestion_thread = SuggestionThread(self.video_player.video_path, duration)
+        self.suggestion_thread.finished.connect(self.on_suggestion_thread_finished)
+        self.suggestion_thread.progress.connect(
+            lambda percent: self.statusBar().showMessage(f"Analizando vídeo: {percent}%"))
+        self.suggestion_thread.suggestions_ready.connect(self.on_suggestions_ready)
+        self.suggestion_thread.start()
+
+    def on_suggestion_thread_finished(self):
+        if self._suggest_when_idle:
+            self._suggest_when_idle = False
+            self.suggest_tags()
+
+    def on_video_loaded(self, path):
+        # Suggestions belong to the video they were computed for
+        if self.suggestion_thread is not None:
+            self.suggestion_thread.cancel()
+        self.timeline.set_suggestions([])
+
+    def on_suggestions_ready(self, video_path, suggestions):
+        if video_path != self.video_player.video_path:
+            return
+        self.timeline.set_suggestions(suggestions)
+        self.statusBar().showMessage(
+            f"{len(suggestions)} sugerencias: clic izquierdo para aceptar, clic derecho para rechazar", 10000)
+
+    def convert_suggestions(self):
+        """Turn every accepted suggestion into a tag of the chosen category"""
+        accepted = [s for s in self.timeline.suggestions if s.state == Suggestion.ACCEPTED]
+        if not accepted:
+            QMessageBox.information(self, "Sugerencias", "No hay sugerencias aceptadas.")
+            return
+        category, ok = QInputDialog.getItem(self, "Sugerencias", f"Categoría para {len(accepted)} tags:",
+                                            self.tag_controls.categories, 0, False)
+        if not ok:
+            return
+        self.tag_manager.add_tags([(s.start, s.end) for s in accepted], category)
+        self.timeline.set_suggestions([s for s in self.timeline.suggestions if s.state != Suggestion.ACCEPTED])
+        self.refresh_tags()
+        self.logger.info(f"Added {len(accepted)} tags from suggestions ({category})")
 
     def on_tag_started(self, category, start_time):
+        if self.snap_tags and self.video_player.keyframe_index is not None:
+            # TagManager subtracts its pre-start offset, so snap the adjusted start
+            offset = self.tag_manager.offset
+            start_time = self.video_player.keyframe_index.snap(max(0.0, start_time - offset), SNAP_PREVIOUS) + offset
         self.tag_manager.add_start(start_time, category)
-        self.tag_controls.update_tag_list(self.tag_manager.get_tags())
         self.logger.info(f"[VideoTaggerApp] Started tag for {category} at {start_time:.2f}s")
 
+    def on_tag_removed(self, index):
+        self.tag_manager.remove_tag(index)
+        tags = self.tag_manager.get_tags()
+        if not len(tags) or tags[-1]["end"] is not None:
+            # The open tag was removed: the next category press starts a new one
+            self.tag_controls.clear_tags()
+        self.timeline.highlighted_index = None
+        self.timeline.update()
+
     def on_tag_ended(self, category, end_time):
+        if self.snap_tags and self.video_player.keyframe_index is not None:
+            end_time = self.video_player.keyframe_index.snap(end_time, SNAP_NEXT)
         self.tag_manager.add_end(end_time)
-        self.tag_controls.update_tag_list(self.tag_manager.get_tags())
+        self.timeline.update()
         self.logger.info(f"[VideoTaggerApp] Ended tag for {category} at {end_time:.2f}s")
 
     def edit_categories(self):
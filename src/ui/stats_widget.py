@@ -0,0 +1,80 @@
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import Qt, QTimer
+
+## Live statistics panel
+# Table of the TagStats summary: one row per category plus a total row. The statistics
+# themselves are updated on every tag change; the table is redrawn at most every
+# REFRESH_MS, and only while the panel is visible, so tagging hotkeys never wait for it.
+REFRESH_MS = 200
+
+COLUMNS = ["Categoría", "Tags", "Terminados", "Duración (s)", "Media (s)", "1ª parte", "2ª parte"]
+
+
+class TagStatsPanel(QWidget):
+    def __init__(self, stats, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self._dirty = True
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        stats.add_listener(self.schedule_refresh)
+
+        layout = QVBoxLayout(self)
+        half_layout = QHBoxLayout()
+        half_layout.addWidget(QLabel("Inicio de la 2ª parte (min):"))
+        self.half_spin = QSpinBox()
+        self.half_spin.setRange(0, 600)
+        self.half_spin.setValue(int(stats.second_half // 60))
+        self.half_spin.valueChanged.connect(lambda minutes: self.stats.set_second_half(minutes * 60))
+        half_layout.addWidget(self.half_spin)
+        half_layout.addStretch()
+        layout.addLayout(half_layout)
+
+        self.table = QTableWidget()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+    def schedule_refresh(self):
+        self._dirty = True
+        if self.isVisible() and not self._timer.isActive():
+            self._timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._dirty:
+            self.refresh()
+
+    def refresh(self):
+        rows = self.stats.summary()
+        labels = [f"{label}'" for label in self.stats.bucket_labels()]
+        self.table.setColumnCount(len(COLUMNS) + len(labels))
+        self.table.setHorizontalHeaderLabels(COLUMNS + labels)
+        self.table.setRowCount(len(rows) + 1 if rows else 0)
+
+        for i, row in enumerate(rows):
+            average = "" if row["average_seconds"] is None else f"{row['average_seconds']:.1f}"
+            self._set_row(i, [row["category"], row["count"], row["finished"], f"{row['total_seconds']:.1f}",
+                              average, row["first_half"], row["second_half"]] + row["buckets"])
+        if rows:
+            finished = sum(row["finished"] for row in rows)
+            total = sum(row["total_seconds"] for row in rows)
+            self._set_row(len(rows), ["Total", sum(row["count"] for row in rows), finished, f"{total:.1f}",
+                                      f"{total / finished:.1f}" if finished else "",
+                                      sum(row["first_half"] for row in rows),
+                                      sum(row["second_half"] for row in rows)]
+                          + [sum(column) for column in zip(*(row["buckets"] for row in rows))])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self._dirty = False
+
+    def _set_row(self, row, values):
+        for column, value in enumerate(values):
+            item = QTableWidgetItem(str(value))
+            if column:
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(row, column, item)
@@ -0,0 +1,55 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+## List model over the tags of a TagManager.
+# The manager reports every change (the same records its journal gets), and the model
+# turns them into row insert, change and remove notifications, so a view only redraws
+# the rows that changed instead of rebuilding the whole list.
+# The model keeps its own row count: the manager has already changed when it reports,
+# and views must keep seeing the old count until the matching begin...() call.
+class TagListModel(QAbstractListModel):
+    def __init__(self, tag_manager, parent=None):
+        super().__init__(parent)
+        self.tag_manager = tag_manager
+        self._rows = len(tag_manager.get_tags())
+        tag_manager.add_listener(self.on_tags_changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._rows:
+            return None
+        tag = self.tag_manager.get_tags()[index.row()]
+        if role == Qt.DisplayRole:
+            end_time = f"{tag['end']:.1f}" if tag["end"] is not None else "..."
+            return f"{index.row() + 1}. {tag['category']} ({tag['start']:.1f}s - {end_time}s)"
+        if role == Qt.ToolTipRole and tag["end"] is None:
+            return "Tag abierto: pulsa de nuevo la categoría para cerrarlo"
+        return None
+
+    def on_tags_changed(self, change):
+        op = change["op"]
+        if op == "add":
+            first = change["at"]
+            self.beginInsertRows(QModelIndex(), first, first + len(change["tags"]) - 1)
+            self._rows += len(change["tags"])
+            self.endInsertRows()
+            # Rows after the inserted ones were renumbered
+            self._rows_changed(first + len(change["tags"]), self._rows - 1)
+        elif op == "remove":
+            self.beginRemoveRows(QModelIndex(), change["at"], change["at"])
+            self._rows -= 1
+            self.endRemoveRows()
+            self._rows_changed(change["at"], self._rows - 1)
+        elif op in ("end", "set"):
+            self._rows_changed(change["at"], change["at"])
+        elif op == "shift":
+            self._rows_changed(0, self._rows - 1)
+        else:
+            self.beginResetModel()
+            self._rows = len(self.tag_manager.get_tags())
+            self.endResetModel()
+
+    def _rows_changed(self, first, last):
+        if first <= last:
+            self.dataChanged.emit(self.index(first), self.index(last), [Qt.DisplayRole])
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
-    QWidget, QPushButton, QVBoxLayout, QSpinBox, QLabel, QHBoxLayout, QGroupBox, QListWidget,
-    QShortcut, QGridLayout
+    QWidget, QPushButton, QVBoxLayout, QSpinBox, QLabel, QHBoxLayout, QGroupBox, QListView,
+    QShortcut, QGridLayout, QAbstractItemView
 )
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QKeySequence
@@ -18,6 +18,7 @@ class TagControls(QWidget, UIComponent):
        
         self.active_category = None
         self.video_player = None
+        self.tag_model = None  # TagListModel shown in the tag list
         # Load categories from json file instead of hardcoding
         self.categories = load_categories()
         self.category_buttons = {}
@@ -34,6 +35,11 @@ class TagControls(QWidget, UIComponent):
     def set_video_player(self, video_player):
         self.video_player = video_player
 
+    def set_tag_model(self, model):
+        self.tag_model = model
+        if hasattr(self, 'tag_list'):
+            self.tag_list.setModel(model)
+
     def setup_ui(self, layout):
         # Create main group box for tags
         tag_group = QGroupBox("Video Tags")
@@ -48,10 +54,7 @@ class TagControls(QWidget, UIComponent):
         self.create_category_buttons()
 
         ## Lista de tags
-        self.tag_list = QListWidget()
-        self.tag_layout.addWidget(QLabel("📝 Tags creados:"))
-        self.apply_format_to_taglist(self.tag_list)
-        self.tag_layout.addWidget(self.tag_list)
+        self.create_tag_list()
 
         # Add the section to the layout and ensure it's visible
         layout.addWidget(self.tag_section)
@@ -113,11 +116,29 @@ class TagControls(QWidget, UIComponent):
         self.tag_layout.addLayout(button_grid)
 
         # Re-add the tag list section
-        self.tag_list = QListWidget()
+        self.create_tag_list()
+
+    def create_tag_list(self):
+        """Tag list view over the tag model; rows have one height, so only visible rows are laid out"""
+        self.tag_list = QListView()
+        self.tag_list.setUniformItemSizes(True)
+        self.tag_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        if self.tag_model is not None:
+            self.tag_list.setModel(self.tag_model)
         self.tag_layout.addWidget(QLabel("📝 Tags creados:"))
         self.apply_format_to_taglist(self.tag_list)
         self.tag_layout.addWidget(self.tag_list)
 
+        # Supr removes the selected tag
+        delete_shortcut = QShortcut(QKeySequence(Qt.Key_Delete), self.tag_list)
+        delete_shortcut.setContext(Qt.WidgetShortcut)
+        delete_shortcut.activated.connect(self.remove_selected_tag)
+
+    def remove_selected_tag(self):
+        index = self.tag_list.currentIndex()
+        if index.isValid():
+            self.tag_removed.emit(index.row())
+
     def update_category_buttons(self):
         """Update the category buttons after category list changes"""
         self.create_category_buttons()
@@ -160,19 +181,8 @@ class TagControls(QWidget, UIComponent):
             button = self.category_buttons[category]
             button.click()  # Simulate button click
 
-    def update_tag_list(self, tags):
-        """Update the tag list with current tags"""
-        self.tag_list.clear()
-        for i, tag in enumerate(tags):
-            if tag["start"] is not None:
-                start_time = f"{tag['start']:.1f}"
-                end_time = f"{tag['end']:.1f}" if tag["end"] is not None else "..."
-                category = tag["category"]
-                self.tag_list.addItem(f"{i+1}. {category} ({start_time}s - {end_time}s)")
-
     def clear_tags(self):
-        """Clear the tag list and reset active category"""
-        self.tag_list.clear()
+        """Reset the active category (the tag list follows the tag model)"""
         if self.active_category:
             self.category_buttons[self.active_category].setStyleSheet("font-size: 16px;")
         self.active_category = None
@@ -180,18 +190,18 @@ class TagControls(QWidget, UIComponent):
     def apply_format_to_taglist(self, tag_list):
         """Apply custom formatting to the tag list"""
         tag_list.setStyleSheet("""
-        QListWidget {
+        QListView {
             background-color: #2b2b2b;
             border: 1px solid #3d3d3d;
             border-radius: 4px;
             padding: 5px;
         }
-        QListWidget::item {
+        QListView::item {
             color: #ffffff;
             padding: 5px;
             margin: 2px 0px;
         }
-        QListWidget::item:selected {
+        QListView::item:selected {
             background-color: #3d3d3d;
         }
     """)
\ No newline at end of file
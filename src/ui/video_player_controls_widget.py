@@ -59,7 +59,7 @@ class PlayerControls(UIComponent):
 
     def update_time_label(self, current_time):
         if self.video_player:
-            total_time = self.video_player.mediaplayer.get_length() / 1000.0  # Convert to seconds
+            total_time = self.video_player.get_duration()  # Probed once, VLC is only asked until then
             current_mins = int(current_time // 60)
             current_secs = int(current_time % 60)
             total_mins = int(total_time // 60)
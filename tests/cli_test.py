@@ -0,0 +1,79 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.cli import main, parse_pairs, output_dir_for, output_dirs
+from ffmpeg_fakes import fake_ffmpeg
+
+class TestBatchCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": os.path.join(self.tmp_dir, "cache")})
+        self.env.start()
+        self.tags_path = os.path.join(self.tmp_dir, "tags.json")
+        with open(self.tags_path, "w") as f:
+            json.dump([{"start": 0.0, "end": 2.0, "category": "A"},
+                       {"start": 5.0, "end": None, "category": "B"}], f)
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pairs(self):
+        self.assertEqual(parse_pairs(["a.mp4", "a.json", "b.mp4", "b.json"]),
+                         [("a.mp4", "a.json"), ("b.mp4", "b.json")])
+        with self.assertRaises(ValueError):
+            parse_pairs(["a.mp4"])
+        self.assertEqual(output_dir_for("out", "/videos/match1.mp4", True), os.path.join("out", "match1"))
+        self.assertEqual(output_dir_for("out", "/videos/match1.mp4", False), "out")
+        self.assertEqual(output_dirs("out", ["/videos/match1.mp4"]), ["out"])
+        self.assertEqual(output_dirs("out", ["a/match.mp4", "b/match.mp4", "c/Match.mkv", "d/other.mp4"]),
+                         [os.path.join("out", "match"), os.path.join("out", "match_2"),
+                          os.path.join("out", "Match_3"), os.path.join("out", "other")])
+
+    @patch("asyncio.create_subprocess_exec", side_effect=fake_ffmpeg())
+    def test_batch_export_writes_json_progress(self, mock_spawn):
+        output_dir = os.path.join(self.tmp_dir, "out")
+        stdout = io.StringIO()
+        with patch("sys.stdout", stdout):
+            code = main(["export", "one.mp4", self.tags_path, "two.mp4", self.tags_path, "-o", output_dir, "--jobs", "2"])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(mock_spawn.call_count, 2)
+        events = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        done = {event["video"]: event["failed"] for event in events if event["event"] == "done"}
+        self.assertEqual(done, {"one.mp4": [], "two.mp4": []})
+        self.assertTrue(os.path.exists(os.path.join(output_dir, "one", "A_1.mp4")))
+        self.assertTrue(os.path.exists(os.path.join(output_dir, "two", "A_1.mp4")))
+
+    @patch("asyncio.create_subprocess_exec", side_effect=fake_ffmpeg())
+    def test_export_from_project(self, mock_spawn):
+        db_path = os.path.join(self.tmp_dir, "project.db")
+        self.assertEqual(main(["import", db_path, "one.mp4", self.tags_path, "two.mp4", self.tags_path]), 0)
+        output_dir = os.path.join(self.tmp_dir, "out")
+        with patch("sys.stdout", io.StringIO()):
+            code = main(["export", "--project", db_path, "--category", "A", "--last", "1", "-o", output_dir])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(mock_spawn.call_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(output_dir, "A_1.mp4")))
+        self.assertEqual(main(["export", "-o", output_dir]), 2)
+
+    def test_stats_to_stdout_and_file(self):
+        stdout = io.StringIO()
+        with patch("sys.stdout", stdout):
+            self.assertEqual(main(["stats", self.tags_path]), 0)
+        data = json.loads(stdout.getvalue())
+        self.assertEqual([row["category"] for row in data["categories"]], ["A", "B"])
+        self.assertEqual(data["buckets"], ["0-5"])
+
+        csv_path = os.path.join(self.tmp_dir, "stats.csv")
+        self.assertEqual(main(["stats", self.tags_path, "-o", csv_path, "--bucket-minutes", "2.5"]), 0)
+        with open(csv_path, encoding="utf-8") as f:
+            self.assertEqual(f.readline().strip().split(",")[-1], "min 0-2.5")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.export.eta import SpeedModel, DEFAULT_SPEED, blended_speed, schedule_eta
+from src.export.engine import ClipExporter
+from ffmpeg_fakes import fake_ffmpeg
+
+class TestExportEta(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, "speed.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_speed_is_learned_and_persisted(self):
+        model = SpeedModel(self.model_path)
+        key = SpeedModel.key("reencode", "default")
+        self.assertEqual(model.speed(key), DEFAULT_SPEED)
+        model.observe(key, 30.0, 10.0)
+        self.assertAlmostEqual(model.speed(key), 3.0)
+        model.observe(key, 10.0, 10.0)
+        self.assertAlmostEqual(model.speed(key), 0.7 * 3.0 + 0.3 * 1.0)
+        model.save()
+        self.assertAlmostEqual(SpeedModel(self.model_path).speed(key), model.speed(key))
+
+    def test_blended_speed_moves_towards_measurements(self):
+        self.assertAlmostEqual(blended_speed(2.0, 0.0, 0.0), 2.0)
+        self.assertAlmostEqual(blended_speed(2.0, 400.0, 100.0), (400.0 + 20.0) / 110.0)
+
+    def test_schedule_replays_queue_on_workers(self):
+        # Two workers at 2x: unit 0 has 10s of media left, 1 and 2 are queued
+        finish, batch = schedule_eta({0: 10.0}, [(1, 4.0), (2, 8.0)], workers=2, speed=2.0)
+        self.assertEqual(finish, {0: 5.0, 1: 2.0, 2: 6.0})
+        self.assertEqual(batch, 6.0)
+        self.assertEqual(schedule_eta({}, [], 2, 1.0), ({}, 0.0))
+
+    @patch("asyncio.create_subprocess_exec")
+    def test_shortest_clips_start_first(self, mock_spawn):
+        started = []
+        spawn = fake_ffmpeg()
+
+        async def record(*command, **kwargs):
+            started.append(command[-1])
+            return await spawn(*command, **kwargs)
+        mock_spawn.side_effect = record
+
+        tags = [{"start": 0.0, "end": 30.0, "category": "Long"},
+                {"start": 40.0, "end": 42.0, "category": "Short"},
+                {"start": 50.0, "end": 60.0, "category": "Mid"}]
+        etas = []
+        with patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": self.tmp_dir}):
+            exporter = ClipExporter(tags, "match.mp4", self.tmp_dir, "clip", max_workers=1, incremental=False,
+                                    shortest_first=True, speed_model=SpeedModel(self.model_path),
+                                    on_eta=lambda batch, clips: etas.append(batch))
+            exporter.run()
+
+        self.assertEqual([os.path.basename(path) for path in started],
+                         [".Short_2.mp4.part", ".Mid_3.mp4.part", ".Long_1.mp4.part"])
+        self.assertTrue(etas)
+        self.assertEqual(etas[-1], 0.0)
+        self.assertTrue(os.path.exists(self.model_path))
+
+    @patch("asyncio.create_subprocess_exec")
+    def test_failed_clips_do_not_teach_speed(self, mock_spawn):
+        mock_spawn.side_effect = fake_ffmpeg(returncode=1, stderr="boom")
+        model = SpeedModel(self.model_path)
+        key = SpeedModel.key("reencode", "default")
+        with patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": self.tmp_dir}):
+            exporter = ClipExporter([{"start": 0.0, "end": 30.0, "category": "Long"}], "match.mp4", self.tmp_dir,
+                                    "clip", max_workers=1, incremental=False, speed_model=model)
+            exporter.run()
+        self.assertEqual(exporter.results, {0: False})
+        self.assertEqual(model.speed(key), DEFAULT_SPEED)
+        self.assertEqual(exporter._wall_finished, 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
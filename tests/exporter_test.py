@@ -1,13 +1,21 @@
+import asyncio
 import os
+import shutil
+import tempfile
 import unittest
 import subprocess
 from unittest.mock import patch, MagicMock
 from PyQt5.QtCore import QThread
-from src.exporter import ExporterThread
-from io import StringIO
+from src.exporter import ExporterThread, default_max_workers
+from src.export.journal import ExportJournal, partial_path
+from ffmpeg_fakes import fake_ffmpeg
 
 class TestExporterThread(unittest.TestCase):
     def setUp(self):
+        # Keep the speed model, manifests and media cache out of the user's cache
+        self.cache_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": self.cache_dir})
+        self.env.start()
         self.tags = [
             {"start": 0.0, "end": 10.0, "category": "Test1"},
             {"start": 10.0, "end": 20.0, "category": "Test2"}
@@ -20,13 +28,10 @@ class TestExporterThread(unittest.TestCase):
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
 
-    @patch("subprocess.Popen")
-    def test_run(self, mock_popen):
-        # Setup mock process
-        mock_process = MagicMock()
-        mock_process.poll.return_value = 0
-        mock_process.stderr = StringIO("frame=100\n")  # Simulate ffmpeg output
-        mock_popen.return_value = mock_process
+    @patch("asyncio.create_subprocess_exec")
+    def test_run(self, mock_spawn):
+        # Simulate ffmpeg -progress output
+        mock_spawn.side_effect = fake_ffmpeg(0, "frame=100\nout_time_us=5000000\nprogress=continue\nprogress=end\n")
 
         # Setup signal trackers
         progress_values = []
@@ -37,41 +42,96 @@ class TestExporterThread(unittest.TestCase):
         # Run the export
         self.exporter.run()
 
-        # Verify Popen was called for each tag with correct arguments
-        self.assertEqual(mock_popen.call_count, len(self.tags))
+        # Verify ffmpeg was started for each tag with correct arguments
+        self.assertEqual(mock_spawn.call_count, len(self.tags))
         
         # Check calls had correct ffmpeg arguments
         for i, tag in enumerate(self.tags):
             output_filename = f"{tag['category']}_{i+1}.mp4"
             output_path = os.path.join(self.output_dir, output_filename)
             expected_args = [
-                "ffmpeg", "-y",
+                "ffmpeg", "-y", "-v", "error",
                 "-i", self.video_path,
                 "-ss", str(tag["start"]),
                 "-to", str(tag["end"]),
                 "-c:v", "libx264",
                 "-c:a", "aac",
+                "-threads", str(self.exporter.threads_per_process),
                 "-f", "mp4",
-                "-stats",
-                output_path
+                "-progress", "pipe:1", "-nostats",
+                partial_path(output_path)
             ]
-            mock_popen.assert_any_call(
-                expected_args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                bufsize=1
+            mock_spawn.assert_any_call(
+                *expected_args,
+                stdin=subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
 
+        # Finished clips are renamed into place
+        self.assertTrue(os.path.exists(output_path))
+        self.assertFalse(os.path.exists(partial_path(output_path)))
+
         # Verify progress was tracked
         self.assertGreater(len(progress_values), 0)
         self.assertEqual(progress_values[-1], 100)  # Final progress should be 100%
 
+    @patch("asyncio.create_subprocess_exec")
+    def test_run_reports_each_clip(self, mock_spawn):
+        # One clip succeeds and one fails; both must be reported
+        ok = fake_ffmpeg(0, "out_time_us=10000000\nprogress=end\n")
+        failed = fake_ffmpeg(1, "", "Invalid argument\n")
+        calls = iter([ok, failed])
+
+        async def spawn(*command, **kwargs):
+            return await next(calls)(*command, **kwargs)
+        mock_spawn.side_effect = spawn
+
+        exporter = ExporterThread(self.tags, self.video_path, self.output_dir, self.filename_base, max_workers=1)
+        results = []
+        exporter.clip_finished.connect(lambda i, ok: results.append((i, ok)))
+        exporter.run()
+
+        self.assertEqual(sorted(results), [(0, True), (1, False)])
+        self.assertEqual(exporter.results, {0: True, 1: False})
+
+    @patch("asyncio.create_subprocess_exec")
+    def test_resume_skips_finished_clips(self, mock_spawn):
+        mock_spawn.side_effect = fake_ffmpeg(0, "progress=end\n")
+        with patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": os.path.abspath(self.output_dir)}):
+            # A previous run was interrupted after finishing the first clip
+            journal = ExportJournal(self.output_dir)
+            journal.begin(self.video_path, self.tags, {}, [0, 1])
+            journal.mark(0, "done")
+            journal.mark(1, "running")
+            journal.close()
+            with open(os.path.join(self.output_dir, "Test1_1.mp4"), "w") as f:
+                f.write("clip")
+            with open(partial_path(os.path.join(self.output_dir, "Test2_2.mp4")), "w") as f:
+                f.write("half-written")
+
+            exporter = ExporterThread(self.tags, self.video_path, self.output_dir, self.filename_base,
+                                      incremental=False, resume=True)
+            exporter.run()
+
+        self.assertEqual(mock_spawn.call_count, 1)
+        self.assertEqual(exporter.results, {0: True, 1: True})
+        session = ExportJournal(self.output_dir).load()
+        self.assertTrue(session.complete)
+        self.assertEqual(session.done, [0, 1])
+
+    def test_default_worker_count(self):
+        with patch("os.cpu_count", return_value=16):
+            self.assertEqual(default_max_workers(2), 8)
+            self.assertEqual(default_max_workers(32), 1)
+        with patch("os.cpu_count", return_value=None):
+            self.assertEqual(default_max_workers(), 1)
+
     def tearDown(self):
         # Clean up the output directory
-        for file in os.listdir(self.output_dir):
-            os.remove(os.path.join(self.output_dir, file))
-        os.rmdir(self.output_dir)
+        shutil.rmtree(self.output_dir)
+        self.env.stop()
+        shutil.rmtree(self.cache_dir)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,34 @@
+# Stand-ins for the ffmpeg subprocesses started by the export supervisor
+import asyncio
+
+
+class FakeProcess:
+    """Behaves like an asyncio ffmpeg subprocess; a successful run writes its output file"""
+
+    def __init__(self, command, returncode=0, stdout="", stderr=""):
+        if returncode == 0:
+            with open(command[-1], "w") as f:
+                f.write("clip")
+        self.command = list(command)
+        self.returncode = None
+        self._returncode = returncode
+        self.stdout = asyncio.StreamReader()
+        self.stdout.feed_data(stdout.encode())
+        self.stdout.feed_eof()
+        self.stderr = asyncio.StreamReader()
+        self.stderr.feed_data(stderr.encode())
+        self.stderr.feed_eof()
+
+    async def wait(self):
+        self.returncode = self._returncode
+        return self.returncode
+
+    def kill(self):
+        pass
+
+
+def fake_ffmpeg(returncode=0, stdout="out_time_us=1000000\nprogress=end\n", stderr=""):
+    """Side effect for a patched asyncio.create_subprocess_exec"""
+    async def spawn(*command, **kwargs):
+        return FakeProcess(command, returncode, stdout, stderr)
+    return spawn
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.export.journal import (
+    JOURNAL_NAME, ExportJournal, find_resumable, register_pending, partial_path, finalize_output
+)
+
+TAGS = [{"start": 0.0, "end": 4.0, "category": "A"}, {"start": 10.0, "end": 14.0, "category": "B"}]
+
+class TestExportJournal(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": os.path.join(self.output_dir, "cache")})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.output_dir)
+
+    def test_replay_clip_states(self):
+        journal = ExportJournal(self.output_dir)
+        journal.begin("match.mp4", TAGS, {"mode": "reencode"}, [0, 1])
+        journal.mark(0, "running")
+        journal.mark(0, "done")
+        journal.mark(1, "running")
+        journal.close()
+
+        session = ExportJournal(self.output_dir).load()
+        self.assertEqual(session.video_path, "match.mp4")
+        self.assertEqual(session.tags, TAGS)
+        self.assertEqual(session.settings, {"mode": "reencode"})
+        self.assertEqual(session.done, [0])
+        self.assertEqual(session.pending, [1])
+        self.assertTrue(session.resumable)
+
+    def test_truncated_last_line_is_ignored(self):
+        journal = ExportJournal(self.output_dir)
+        journal.begin("match.mp4", TAGS, {}, [0, 1])
+        journal.mark(0, "done")
+        journal.close()
+        with open(os.path.join(self.output_dir, JOURNAL_NAME), "a") as f:
+            f.write('{"clip": 1, "sta')
+
+        session = ExportJournal(self.output_dir).load()
+        self.assertEqual(session.pending, [1])
+
+    def test_finished_export_is_not_resumable(self):
+        register_pending(self.output_dir)
+        journal = ExportJournal(self.output_dir)
+        journal.begin("match.mp4", TAGS, {}, [0, 1])
+        self.assertEqual([s.output_dir for s in find_resumable()], [self.output_dir])
+        journal.mark(0, "done")
+        journal.mark(1, "failed")
+        journal.finish()
+        self.assertEqual(find_resumable(), [])
+
+    def test_partial_file_is_renamed_into_place(self):
+        output_path = os.path.join(self.output_dir, "A_1.mp4")
+        with open(partial_path(output_path), "w") as f:
+            f.write("clip")
+        self.assertTrue(os.path.basename(partial_path(output_path)).startswith("."))
+        finalize_output(output_path)
+        self.assertTrue(os.path.exists(output_path))
+        self.assertFalse(os.path.exists(partial_path(output_path)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+from src.media import keyframes
+from src.media.keyframes import SNAP_NEXT, SNAP_PREVIOUS, KeyframeIndex, get_keyframe_index
+
+class TestKeyframeIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = KeyframeIndex([4.0, 0.0, 2.0, 6.0])
+
+    def test_lookups(self):
+        self.assertEqual(self.index.previous(3.9), 2.0)
+        self.assertEqual(self.index.previous(4.0), 4.0)
+        self.assertIsNone(self.index.previous(-1.0))
+        self.assertEqual(self.index.next(4.1), 6.0)
+        self.assertIsNone(self.index.next(6.5))
+        self.assertEqual(self.index.nearest(4.9), 4.0)
+        self.assertEqual(self.index.nearest(5.1), 6.0)
+
+    def test_snap(self):
+        self.assertEqual(self.index.snap(3.0, SNAP_PREVIOUS), 2.0)
+        self.assertEqual(self.index.snap(3.0, SNAP_NEXT), 4.0)
+        self.assertEqual(self.index.snap(7.0, SNAP_NEXT), 7.0)
+        self.assertEqual(KeyframeIndex([]).snap(3.0), 3.0)
+
+class TestKeyframeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": self.tmp_dir})
+        self.env.start()
+        keyframes._indexes.clear()
+
+    def tearDown(self):
+        self.env.stop()
+        keyframes._indexes.clear()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_save_and_load(self):
+        path = os.path.join(self.tmp_dir, "index.npy")
+        KeyframeIndex(np.arange(0, 5400, 2.0)).save(path)
+        loaded = KeyframeIndex.load(path)
+        self.assertEqual(len(loaded), 2700)
+        self.assertEqual(loaded.previous(1001.0), 1000.0)
+        self.assertIsNone(KeyframeIndex.load(os.path.join(self.tmp_dir, "missing.npy")))
+
+    @patch("src.media.keyframes.probe_keyframes", return_value=[0.0, 2.0, 4.0])
+    def test_probed_once_per_video(self, mock_probe):
+        index = get_keyframe_index("match.mp4", fingerprint="abc")
+        self.assertEqual(index.tolist(), [0.0, 2.0, 4.0])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, "keyframes", "abc.npy")))
+
+        # From memory, then from disk once the memory cache is gone
+        get_keyframe_index("match.mp4", fingerprint="abc")
+        keyframes._indexes.clear()
+        self.assertEqual(get_keyframe_index("match.mp4", fingerprint="abc").tolist(), [0.0, 2.0, 4.0])
+        self.assertEqual(mock_probe.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
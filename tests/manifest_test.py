@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.export.manifest import ExportManifest, clip_key
+
+SETTINGS = {"mode": "reencode", "video_codec": "libx264", "audio_codec": "aac"}
+
+class TestExportManifest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.keys = [clip_key("source", start, start + 4, SETTINGS) for start in (0, 10, 20)]
+        manifest = ExportManifest(self.output_dir)
+        for n, key in enumerate(self.keys):
+            self._write(f"A_{n+1}.mp4", f"clip {n}")
+            manifest.record(f"A_{n+1}.mp4", key)
+        manifest.save()
+
+    def _write(self, name, content):
+        with open(os.path.join(self.output_dir, name), "w") as f:
+            f.write(content)
+
+    def _read(self, name):
+        with open(os.path.join(self.output_dir, name)) as f:
+            return f.read()
+
+    def test_key_depends_on_inputs(self):
+        self.assertEqual(clip_key("source", 0, 4, SETTINGS), self.keys[0])
+        self.assertNotEqual(clip_key("source", 0, 5, SETTINGS), self.keys[0])
+        self.assertNotEqual(clip_key("other", 0, 4, SETTINGS), self.keys[0])
+        self.assertNotEqual(clip_key("source", 0, 4, dict(SETTINGS, mode="smart")), self.keys[0])
+
+    def test_unchanged_clips_are_satisfied(self):
+        manifest = ExportManifest(self.output_dir)
+        edited = clip_key("source", 10, 15, SETTINGS)
+        satisfied = manifest.prepare({"A_1.mp4": self.keys[0], "A_2.mp4": edited, "A_3.mp4": self.keys[2]})
+        self.assertEqual(satisfied, {"A_1.mp4", "A_3.mp4"})
+
+    def test_modified_file_is_rendered_again(self):
+        self._write("A_1.mp4", "changed on disk")
+        manifest = ExportManifest(self.output_dir)
+        self.assertNotIn("A_1.mp4", manifest.prepare({"A_1.mp4": self.keys[0]}))
+
+    def test_renumbered_clips_are_moved_not_rendered(self):
+        # The first tag was removed, so every other clip shifts down by one
+        manifest = ExportManifest(self.output_dir)
+        satisfied = manifest.prepare({"A_1.mp4": self.keys[1], "A_2.mp4": self.keys[2]})
+        self.assertEqual(satisfied, {"A_1.mp4", "A_2.mp4"})
+        self.assertEqual(self._read("A_1.mp4"), "clip 1")
+        self.assertEqual(self._read("A_2.mp4"), "clip 2")
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "A_3.mp4")))
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+if __name__ == "__main__":
+    unittest.main()
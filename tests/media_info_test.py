@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.media.keyframes import get_keyframe_index
+from src.media.media_info import MediaInfo, MediaInfoCache, count_keyframes, file_fingerprint
+
+FFPROBE_OUTPUT = {
+    "streams": [
+        {"index": 0, "codec_type": "video", "codec_name": "h264", "width": 3840, "height": 2160,
+         "pix_fmt": "yuv420p", "avg_frame_rate": "50/1", "r_frame_rate": "50/1"},
+        {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+    ],
+    "format": {"duration": "5400.5"},
+}
+
+class TestMediaInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmp_dir, "match.mp4")
+        with open(self.video_path, "wb") as f:
+            f.write(os.urandom(200 * 1024))
+        self.cache_path = os.path.join(self.tmp_dir, "media_info.json")
+
+    def test_from_ffprobe(self):
+        info = MediaInfo.from_ffprobe("abc", FFPROBE_OUTPUT, keyframe_count=2700)
+        self.assertEqual(info.fps, 50.0)
+        self.assertEqual(info.duration, 5400.5)
+        self.assertEqual((info.width, info.height), (3840, 2160))
+        self.assertEqual(info.video_codec, "h264")
+        self.assertEqual(info.pixel_format, "yuv420p")
+        self.assertTrue(info.has_audio)
+        self.assertEqual(info.total_frames, 270025)
+
+    def test_fingerprint_changes_with_content(self):
+        before = file_fingerprint(self.video_path)
+        self.assertEqual(before, file_fingerprint(self.video_path))
+        with open(self.video_path, "ab") as f:
+            f.write(b"more")
+        self.assertNotEqual(before, file_fingerprint(self.video_path))
+
+    @patch("src.media.media_info.count_keyframes", return_value=10)
+    @patch("src.media.media_info.probe_media", return_value=FFPROBE_OUTPUT)
+    def test_file_is_probed_once(self, mock_probe, mock_keyframes):
+        cache = MediaInfoCache(self.cache_path)
+        cache.get(self.video_path)
+        cache.get(self.video_path)
+        # A new cache instance reads the entry back from disk
+        info = MediaInfoCache(self.cache_path).get(self.video_path)
+        self.assertEqual(mock_probe.call_count, 1)
+        self.assertEqual(info.keyframe_count, 10)
+        self.assertEqual(info.fps, 50.0)
+
+    @patch("src.media.keyframes.probe_keyframes", return_value=[0.0, 2.0, 4.0])
+    def test_keyframes_are_counted_from_the_index(self, mock_keyframes):
+        with patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": self.tmp_dir}):
+            self.assertEqual(count_keyframes(self.video_path), 3)
+            self.assertEqual(len(get_keyframe_index(self.video_path)), 3)
+        # The export and the player reuse the index read for the count
+        self.assertEqual(mock_keyframes.call_count, 1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
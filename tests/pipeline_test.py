@@ -0,0 +1,35 @@
+import unittest
+from src.export.pipeline import plan_passes, build_filter_graph, build_single_pass_command
+
+class TestSinglePassPipeline(unittest.TestCase):
+    def test_plan_passes_groups_clips_in_time_order(self):
+        jobs = [
+            (0, {"start": 50.0, "end": 60.0}),
+            (1, {"start": 0.0, "end": 10.0}),
+            (2, {"start": 20.0, "end": 25.0}),
+        ]
+        passes = plan_passes(jobs, clips_per_pass=2)
+        self.assertEqual([[i for i, _ in batch] for batch in passes], [[1, 2], [0]])
+
+    def test_filter_graph_trims_relative_to_seek_point(self):
+        clips = [(10.0, 12.0, "a.mp4"), (11.0, 15.0, "b.mp4")]
+        graph = build_filter_graph(clips, seek=10.0)
+        self.assertIn("[0:v]split=2[v0][v1]", graph)
+        self.assertIn("[v1]trim=start=1.000000:end=5.000000", graph)
+        self.assertIn("[a0]atrim=start=0.000000:end=2.000000", graph)
+
+    def test_filter_graph_without_audio(self):
+        graph = build_filter_graph([(0.0, 1.0, "a.mp4")], has_audio=False)
+        self.assertNotIn("[0:a]", graph)
+
+    def test_command_decodes_source_once(self):
+        clips = [(10.0, 12.0, "a.mp4"), (30.0, 35.0, "b.mp4")]
+        command = build_single_pass_command("match.mp4", clips)
+        self.assertEqual(command.count("-i"), 1)
+        self.assertEqual(command[command.index("-ss") + 1], "10.000000")
+        self.assertEqual(command[command.index("-to") + 1], "35.000000")
+        self.assertIn("a.mp4", command)
+        self.assertIn("b.mp4", command)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.export.engine import ClipExporter
+from src.export.planner import MODE_COALESCE, coalesce_intervals, merge_nearby, build_span_command
+from ffmpeg_fakes import fake_ffmpeg
+
+class TestCoalesceIntervals(unittest.TestCase):
+    def test_overlapping_and_adjacent_tags_share_a_span(self):
+        intervals = [(10.0, 20.0, 0), (15.0, 25.0, 1), (25.0, 30.0, 2), (40.0, 45.0, 3), (0.0, 5.0, 4)]
+        spans = coalesce_intervals(intervals)
+        self.assertEqual(spans, [
+            (0.0, 5.0, [4]),
+            (10.0, 30.0, [0, 1, 2]),
+            (40.0, 45.0, [3]),
+        ])
+
+    def test_contained_tag_does_not_extend_span(self):
+        spans = coalesce_intervals([(0.0, 30.0, 0), (5.0, 10.0, 1)])
+        self.assertEqual(spans, [(0.0, 30.0, [0, 1])])
+
+class TestMergeNearby(unittest.TestCase):
+    def test_same_category_tags_within_gap_are_merged(self):
+        jobs = [
+            (0, {"start": 0.0, "end": 5.0, "category": "Ataque"}),
+            (1, {"start": 6.0, "end": 9.0, "category": "Defensa"}),
+            (2, {"start": 6.5, "end": 10.0, "category": "Ataque"}),
+            (3, {"start": 30.0, "end": 35.0, "category": "Ataque"}),
+        ]
+        merged, members = merge_nearby(jobs, max_gap=2.0)
+        self.assertEqual([i for i, _ in merged], [0, 1, 3])
+        self.assertEqual(merged[0][1]["end"], 10.0)
+        self.assertEqual(members[0], [0, 2])
+        # The original tag is not modified
+        self.assertEqual(jobs[0][1]["end"], 5.0)
+
+class TestSpanCommand(unittest.TestCase):
+    def test_keyframes_forced_at_inner_cut_points(self):
+        command = build_span_command("match.mp4", 10.0, 30.0, [10.0, 15.0, 20.0, 25.0, 30.0], "span.mp4")
+        forced = command[command.index("-force_key_frames") + 1]
+        self.assertEqual(forced, "5.000000,10.000000,15.000000")
+
+class TestCoalescedExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": os.path.join(self.tmp_dir, "cache")})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch("asyncio.create_subprocess_exec")
+    def test_failed_slice_fails_only_its_clip(self, mock_spawn):
+        ok, failing = fake_ffmpeg(), fake_ffmpeg(returncode=1, stderr="boom")
+
+        async def spawn(*command, **kwargs):
+            slicing_b = "Ataque_2" in command[-1]
+            return await (failing if slicing_b else ok)(*command, **kwargs)
+        mock_spawn.side_effect = spawn
+
+        tags = [{"start": 0.0, "end": 10.0, "category": "Ataque"},
+                {"start": 5.0, "end": 15.0, "category": "Ataque"},
+                {"start": 12.0, "end": 20.0, "category": "Defensa"}]
+        exporter = ClipExporter(tags, "match.mp4", self.tmp_dir, "clip", mode=MODE_COALESCE, incremental=False)
+        self.assertEqual(exporter.run(), {0: True, 1: False, 2: True})
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, "Ataque_1.mp4")))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, "Defensa_3.mp4")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch
+from src.export.profiles import PROFILES, EncoderProfile, get_profile
+from src.export.pipeline import build_single_pass_command
+from src.export.planner import build_span_command
+from src.export.benchmark import benchmark_profile, build_benchmark_command
+
+class TestEncoderProfiles(unittest.TestCase):
+    def test_default_profile_keeps_ffmpeg_defaults(self):
+        profile = get_profile(None)
+        self.assertEqual(profile.video_args(), ["-c:v", "libx264"])
+        self.assertEqual(profile.audio_args(), ["-c:a", "aac"])
+        self.assertIsNone(profile.scale_filter())
+        self.assertEqual(profile.settings(), {"video_codec": "libx264", "audio_codec": "aac"})
+
+    def test_profile_arguments(self):
+        profile = PROFILES["social_720p"]
+        self.assertEqual(profile.video_args(), ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23"])
+        self.assertEqual(profile.audio_args(), ["-c:a", "aac", "-b:a", "128k"])
+        self.assertEqual(profile.scale_filter(), "scale=-2:'min(720,ih)'")
+        # Any setting that changes the output changes the manifest settings
+        self.assertNotEqual(profile.settings(), PROFILES["archive"].settings())
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            get_profile("nope")
+        custom = EncoderProfile("custom", "Custom", crf=30)
+        self.assertIs(get_profile(custom), custom)
+
+    def test_profile_applied_to_builders(self):
+        profile = PROFILES["fast_preview"]
+        command = build_single_pass_command("match.mp4", [(0.0, 2.0, "a.mp4")], profile=profile)
+        graph = command[command.index("-filter_complex") + 1]
+        self.assertIn("setpts=PTS-STARTPTS,scale=-2:'min(480,ih)'[ov0]", graph)
+        self.assertIn("ultrafast", command)
+
+        command = build_span_command("match.mp4", 0.0, 10.0, [5.0], "span.mp4", profile=profile)
+        self.assertEqual(command[command.index("-vf") + 1], profile.scale_filter())
+        self.assertIn("-crf", command)
+
+    def test_benchmark_command(self):
+        command = build_benchmark_command("match.mp4", "archive", 60.0, 20.0, "out.mp4")
+        self.assertEqual(command[command.index("-ss") + 1], "60.000000")
+        self.assertEqual(command[command.index("-t") + 1], "20.000000")
+        self.assertEqual(command[command.index("-preset") + 1], "slow")
+        self.assertEqual(command[command.index("-threads") + 1], "4")
+        self.assertEqual(command[-1], "out.mp4")
+
+    def test_benchmark_measures_the_encoded_length(self):
+        # The source ends 10 s into the 30 s excerpt
+        def run_ffmpeg(command, on_block=None):
+            on_block({"frame": "250", "out_time_us": "10000000", "progress": "end"})
+            with open(command[-1], "wb") as f:
+                f.write(b"\0" * 125_000)
+            return True, []
+        clock = iter([0.0, 5.0])
+        with patch("src.export.benchmark.run_ffmpeg", run_ffmpeg):
+            result = benchmark_profile("match.mp4", "archive", duration=30.0, clock=lambda: next(clock))
+        self.assertEqual(result["speed"], 2.0)
+        self.assertEqual(result["bitrate_kbps"], 100.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from src.export.progress import MAX_MESSAGES, ProgressParser, ProgressThrottle
+
+class TestProgressParser(unittest.TestCase):
+    def test_blocks_are_returned_on_progress_key(self):
+        parser = ProgressParser()
+        self.assertIsNone(parser.feed("frame=50\n"))
+        self.assertIsNone(parser.feed("out_time_us=2500000\n"))
+        block = parser.feed("progress=continue\n")
+        self.assertEqual(parser.out_time(block), 2.5)
+        self.assertFalse(parser.is_end(block))
+
+    def test_unknown_out_time_and_messages(self):
+        parser = ProgressParser()
+        parser.feed("Error opening output file out.mp4.\n")
+        block = parser.feed("out_time_us=N/A\n") or parser.feed("progress=end\n")
+        self.assertIsNone(parser.out_time(block))
+        self.assertTrue(parser.is_end(block))
+        self.assertEqual(list(parser.messages), ["Error opening output file out.mp4."])
+
+    def test_only_the_last_messages_are_kept(self):
+        parser = ProgressParser()
+        for n in range(10000):
+            parser.feed(f"Invalid NAL unit {n}, skipping.\n")
+        self.assertEqual(len(parser.messages), MAX_MESSAGES)
+        self.assertEqual(parser.messages[-1], "Invalid NAL unit 9999, skipping.")
+
+class TestProgressThrottle(unittest.TestCase):
+    def test_updates_are_merged_within_interval(self):
+        now = [0.0]
+        throttle = ProgressThrottle(rate=10, clock=lambda: now[0])
+        self.assertEqual(throttle.update(0, 5), {0: 5})
+        now[0] = 0.05
+        self.assertIsNone(throttle.update(0, 6))
+        self.assertIsNone(throttle.update(1, 3))
+        now[0] = 0.11
+        self.assertEqual(throttle.update(0, 7), {0: 7, 1: 3})
+
+    def test_forced_update_is_emitted_immediately(self):
+        now = [0.0]
+        throttle = ProgressThrottle(rate=10, clock=lambda: now[0])
+        throttle.update(0, 5)
+        self.assertEqual(throttle.update(0, 100, force=True), {0: 100})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.cli import main
+from src.project_db import SCHEMA, ProjectDB
+from src.tag_manager import TagManager
+
+class TestProjectDB(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "project.db")
+        self.project = ProjectDB(self.db_path)
+
+    def tearDown(self):
+        self.project.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def write_tags(self, name, tags):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(tags, f)
+        return path
+
+    def test_schema_and_wal(self):
+        mode = self.project._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        indexes = {row[0] for row in self.project._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({"tags_video_start", "tags_category", "tags_end"} <= indexes)
+
+    def test_save_and_load_keep_order_and_open_tags(self):
+        tags = [{"start": 30.0, "end": 35.5, "category": "Gol"},
+                {"start": 10.0, "end": 12.0, "category": "Falta"},
+                {"start": 40.0, "end": None, "category": "Gol"}]
+        self.assertEqual(self.project.save_tags("match1.mp4", tags), 3)
+        self.assertEqual(self.project.load_tags("match1.mp4"), tags)
+        # Saving again replaces the video's tags
+        self.project.save_tags("match1.mp4", tags[:1])
+        self.assertEqual(self.project.load_tags("match1.mp4"), tags[:1])
+        self.assertEqual(self.project.load_tags("unknown.mp4"), [])
+
+    def test_query_across_videos(self):
+        pairs = []
+        for i in range(5):
+            pairs.append((f"match{i}.mp4", self.write_tags(f"match{i}.json", [
+                {"start": 60.0, "end": 70.0, "category": "Balón parado"},
+                {"start": 10.0, "end": 15.0, "category": "Balón parado"},
+                {"start": 20.0, "end": 25.0, "category": "Gol"},
+                {"start": 90.0, "end": None, "category": "Balón parado"}])))
+        self.assertEqual(self.project.import_json(pairs), 20)
+
+        tags = self.project.query(category="Balón parado", last=2)
+        self.assertEqual([(os.path.basename(t["video_path"]), t["start"]) for t in tags],
+                         [("match3.mp4", 10.0), ("match3.mp4", 60.0), ("match4.mp4", 10.0), ("match4.mp4", 60.0)])
+        self.assertEqual(len(self.project.query(category="Balón parado", closed=False)), 15)
+        self.assertEqual(len(self.project.query(videos=["match0.mp4"])), 3)
+        self.assertEqual(self.project.query(category="Tiro"), [])
+        self.assertEqual(self.project.categories(), ["Balón parado", "Gol"])
+
+    def test_extra_keys_survive_import_and_query(self):
+        tags = [{"start": 1.0, "end": 2.0, "category": "Gol", "note": "Remate de cabeza"},
+                {"start": 3.0, "end": 4.0, "category": "Falta"}]
+        self.project.import_json([("match.mp4", self.write_tags("match.json", tags))])
+        self.assertEqual(self.project.load_tags("match.mp4"), tags)
+        video = os.path.abspath("match.mp4")
+        self.assertEqual(self.project.query(), [dict(tag, video_path=video) for tag in tags])
+
+    def test_older_database_gets_the_extras_column(self):
+        self.project.close()
+        old_path = os.path.join(self.tmp_dir, "old.db")
+        conn = sqlite3.connect(old_path)
+        conn.executescript(SCHEMA.replace(",\n    extras TEXT", ""))
+        conn.close()
+        self.project = ProjectDB(old_path)
+        self.project.save_tags("match.mp4", [{"start": 1.0, "end": 2.0, "category": "Gol", "note": "al palo"}])
+        self.assertEqual(self.project.load_tags("match.mp4")[0]["note"], "al palo")
+
+    def test_failed_import_leaves_its_batch_out(self):
+        good = self.write_tags("good.json", [{"start": 1.0, "end": 2.0, "category": "Gol"}])
+        bad = self.write_tags("bad.json", [{"end": 2.0, "category": "Nueva"}])
+        with self.assertRaises(KeyError):
+            self.project.import_json([("a.mp4", good), ("b.mp4", bad)])
+        self.assertEqual(self.project.videos(), [])
+        self.assertEqual(self.project.categories(), [])
+
+    def test_tag_manager_round_trip(self):
+        manager = TagManager()
+        manager.add_tags([(5.0, 8.0)], "Gol")
+        manager.add_start(20.0, "Falta")
+        manager.save_project_tags(self.project, "match.mp4")
+
+        other = TagManager()
+        other.load_project_tags(self.project, "match.mp4")
+        self.assertEqual(other.get_tags().to_dicts(), manager.get_tags().to_dicts())
+        self.assertEqual(other.tags_at(6.0), [0])
+
+    def test_cli_import_and_query(self):
+        self.project.close()
+        tags_path = self.write_tags("match.json", [{"start": 1.0, "end": 2.0, "category": "Gol"},
+                                                   {"start": 3.0, "end": 4.0, "category": "Falta"}])
+        self.assertEqual(main(["import", self.db_path, "match.mp4", tags_path]), 0)
+        stdout = io.StringIO()
+        with patch("sys.stdout", stdout):
+            self.assertEqual(main(["query", self.db_path, "--category", "Gol"]), 0)
+        rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(rows, [{"start": 1.0, "end": 2.0, "category": "Gol", "video": os.path.abspath("match.mp4")}])
+        self.project = ProjectDB(self.db_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src.media.media_info import MediaInfo
+from src.media.proxy import ProxyJob, build_proxy_command, create_proxy, find_proxy, needs_proxy, proxy_path
+
+class TestProxy(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"VIDEO_TAGGER_CACHE": self.tmp_dir})
+        self.env.start()
+        self.info = MediaInfo("abc123", duration=100.0, fps=50.0, width=3840, height=2160)
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_command_is_short_gop_540p(self):
+        command = build_proxy_command("match.mp4", "proxy.mp4")
+        self.assertIn("scale=-2:540", command)
+        self.assertEqual(command[command.index("-g") + 1], "10")
+        self.assertEqual(command[command.index("-bf") + 1], "0")
+        self.assertEqual(command[-1], "proxy.mp4")
+
+    def test_only_large_sources_need_a_proxy(self):
+        self.assertTrue(needs_proxy(self.info))
+        self.assertFalse(needs_proxy(MediaInfo("x", width=1280, height=720)))
+
+    def test_proxy_is_cached_by_fingerprint(self):
+        path = proxy_path(self.info)
+        self.assertTrue(path.startswith(os.path.join(self.tmp_dir, "proxies")))
+        self.assertIn("abc123", os.path.basename(path))
+        self.assertIsNone(find_proxy(self.info))
+
+    @patch("src.media.proxy.run_ffmpeg")
+    def test_create_then_reuse(self, mock_run):
+        def fake_run(command, on_position=None, on_start=None):
+            with open(command[-1], "wb") as f:
+                f.write(b"proxy")
+            on_position(50.0)
+            return True, []
+        mock_run.side_effect = fake_run
+        progress = []
+
+        path = create_proxy("match.mp4", self.info, progress.append)
+        self.assertEqual(path, proxy_path(self.info))
+        self.assertTrue(os.path.exists(path))
+        self.assertFalse(os.path.exists(path + ".part"))
+        self.assertEqual(progress, [50, 100])
+
+        self.assertEqual(create_proxy("match.mp4", self.info), path)
+        self.assertEqual(mock_run.call_count, 1)
+
+    @patch("src.media.proxy.run_ffmpeg")
+    def test_failed_transcode_leaves_nothing(self, mock_run):
+        def fake_run(command, on_position=None, on_start=None):
+            with open(command[-1], "wb") as f:
+                f.write(b"half")
+            return False, ["error"]
+        mock_run.side_effect = fake_run
+        self.assertIsNone(create_proxy("match.mp4", self.info))
+        self.assertIsNone(find_proxy(self.info))
+        self.assertFalse(os.path.exists(proxy_path(self.info) + ".part"))
+
+    def test_cancelled_transcode_is_killed_and_cleaned_up(self):
+        # A stand-in for ffmpeg that writes part of its output and then hangs
+        code = ("import sys, time; open(sys.argv[1], 'w').write('half')\n"
+                "print('progress=continue', flush=True); time.sleep(30)")
+        job = ProxyJob()
+        result = []
+        with patch("src.media.proxy.build_proxy_command",
+                   lambda source, output, height: [sys.executable, "-c", code, output]):
+            worker = threading.Thread(target=lambda: result.append(create_proxy("match.mp4", self.info, job=job)))
+            began = time.monotonic()
+            worker.start()
+            while not os.path.exists(proxy_path(self.info) + ".part"):
+                time.sleep(0.05)
+            job.cancel()
+            self.assertTrue(job.wait(10))
+            worker.join(10)
+        self.assertLess(time.monotonic() - began, 10)
+        self.assertEqual(result, [None])
+        self.assertIsNone(find_proxy(self.info))
+        self.assertFalse(os.path.exists(proxy_path(self.info) + ".part"))
+        # A cancelled job does not start again
+        self.assertIsNone(create_proxy("match.mp4", self.info, job=job))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.export.engine import ReelExporter
+from src.export.reel import (
+    ORDER_CATEGORY, select_segments, segments_compatible, write_reel_list, build_reel_reencode_command
+)
+from src.media.media_info import MediaInfo
+
+class TestHighlightReel(unittest.TestCase):
+    def setUp(self):
+        self.tags = [
+            {"start": 50.0, "end": 60.0, "category": "Ataque"},
+            {"start": 10.0, "end": 20.0, "category": "Defensa"},
+            {"start": 30.0, "end": 35.0, "category": "Ataque"},
+            {"start": 70.0, "end": None, "category": "Ataque"},
+        ]
+
+    def test_segments_in_time_order_skip_open_tags(self):
+        segments = select_segments(self.tags, "match.mp4")
+        self.assertEqual([seg[1] for seg in segments], [10.0, 30.0, 50.0])
+
+    def test_segments_filtered_and_grouped_by_category(self):
+        segments = select_segments(self.tags, "match.mp4", categories=["Ataque", "Defensa"],
+                                   order=ORDER_CATEGORY, category_order=["Defensa", "Ataque"])
+        self.assertEqual([(seg[3], seg[1]) for seg in segments],
+                         [("Defensa", 10.0), ("Ataque", 30.0), ("Ataque", 50.0)])
+        only_attack = select_segments(self.tags, "match.mp4", categories=["Ataque"])
+        self.assertEqual(len(only_attack), 2)
+
+    def test_playlist_snaps_inpoints_to_keyframes(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            list_path = write_reel_list([("match.mp4", 31.0, 35.0, "Ataque")], os.path.join(tmp_dir, "reel.txt"),
+                                        keyframes={"match.mp4": [0.0, 28.0, 30.0, 32.0]})
+            with open(list_path) as f:
+                content = f.read()
+            self.assertIn("inpoint 30.000000", content)
+            self.assertIn("outpoint 35.000000", content)
+            self.assertIn(f"file '{os.path.abspath('match.mp4')}'", content)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_compatibility_of_sources(self):
+        a = MediaInfo("a", fps=25.0, width=1920, height=1080, video_codec="h264", audio_codec="aac")
+        b = MediaInfo("b", fps=25.0, width=1920, height=1080, video_codec="h264", audio_codec="aac")
+        c = MediaInfo("c", fps=50.0, width=3840, height=2160, video_codec="hevc", audio_codec="aac")
+        self.assertTrue(segments_compatible([a, b]))
+        self.assertFalse(segments_compatible([a, c]))
+
+    def test_reencode_fallback_only_decodes_tagged_ranges(self):
+        segments = [("a.mp4", 10.0, 20.0, "Ataque"), ("b.mp4", 5.0, 8.0, "Ataque")]
+        command = build_reel_reencode_command(segments, "reel.mp4", target=(1920, 1080, 25.0))
+        self.assertEqual(command.count("-i"), 2)
+        self.assertIn("concat=n=2:v=1:a=1[v][a]", command[command.index("-filter_complex") + 1])
+
+    @patch("src.export.engine.run_ffmpeg")
+    @patch("src.export.engine.get_media_info", side_effect=OSError("no ffprobe"))
+    def test_reel_fails_when_sources_cannot_be_probed(self, _probe, run):
+        tags = [dict(self.tags[0], video_path="a.mp4"), dict(self.tags[1], video_path="b.mp4")]
+        progress = []
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            exporter = ReelExporter(tags, "a.mp4", os.path.join(tmp_dir, "reel.mp4"), on_progress=progress.append)
+            self.assertFalse(exporter.run())
+        finally:
+            shutil.rmtree(tmp_dir)
+        run.assert_not_called()
+        self.assertEqual(progress, [100])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from src.export.profiles import EncoderProfile
+from src.export.smart_cut import (
+    MODE_SMART, MODE_KEYFRAME, plan_segments, build_segment_command, smart_cut_problem
+)
+from src.media.media_info import MediaInfo
+
+class TestPlanSegments(unittest.TestCase):
+    def setUp(self):
+        # Keyframe every 2 seconds
+        self.keyframes = [float(k) for k in range(0, 60, 2)]
+
+    def test_smart_cut_encodes_only_edges(self):
+        segments = plan_segments(3.3, 9.5, self.keyframes, MODE_SMART)
+        self.assertEqual(segments, [
+            ("encode", 3.3, 4.0),
+            ("copy", 4.0, 8.0),
+            ("encode", 8.0, 9.5),
+        ])
+
+    def test_smart_cut_on_keyframe_boundaries_copies_everything(self):
+        segments = plan_segments(4.0, 8.0, self.keyframes, MODE_SMART)
+        self.assertEqual(segments, [("copy", 4.0, 8.0)])
+
+    def test_clip_without_full_gop_is_reencoded(self):
+        segments = plan_segments(4.5, 5.5, self.keyframes, MODE_SMART)
+        self.assertEqual(segments, [("encode", 4.5, 5.5)])
+
+    def test_keyframe_mode_snaps_start_back(self):
+        segments = plan_segments(3.3, 9.5, self.keyframes, MODE_KEYFRAME)
+        self.assertEqual(segments, [("copy", 2.0, 9.5)])
+
+    def test_copy_segment_command_does_not_reencode_video(self):
+        command = build_segment_command("in.mp4", "copy", 4.0, 8.0, "out.ts")
+        self.assertEqual(command[command.index("-c:v") + 1], "copy")
+        self.assertLess(command.index("-ss"), command.index("-i"))
+
+    def test_smart_cut_needs_h264_in_a_format_the_profile_keeps(self):
+        info = MediaInfo("a", video_codec="h264", pixel_format="yuv420p")
+        self.assertIsNone(smart_cut_problem(info))
+        self.assertIsNotNone(smart_cut_problem(None))
+        self.assertIn("hevc", smart_cut_problem(MediaInfo("b", video_codec="hevc", pixel_format="yuv420p")))
+        self.assertIsNotNone(smart_cut_problem(MediaInfo("c", video_codec="h264", pixel_format="yuv420p10le")))
+        converting = EncoderProfile("444", "4:4:4", pixel_format="yuv444p")
+        self.assertIn("yuv444p", smart_cut_problem(info, converting))
+
+if __name__ == "__main__":
+    unittest.main()
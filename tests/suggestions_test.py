@@ -0,0 +1,109 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import numpy as np
+from src.media import suggestions
+from src.suggester import SuggestionThread
+from src.media.suggestions import (
+    Suggestion, cut_clusters, loudness_spikes, merge_suggestions, plan_ranges, scene_cuts,
+    suggest_from_analysis, suggest_tags
+)
+
+def quiet_match(seconds, bin_seconds=0.05):
+    """RMS bins of steady crowd noise with a little jitter"""
+    rng = np.random.default_rng(0)
+    return (0.05 * (1 + 0.1 * rng.standard_normal(int(seconds / bin_seconds)))).astype(np.float32)
+
+def hanging_range(video_path, start, duration):
+    """Stand-in for a range decode that takes far too long"""
+    time.sleep(60)
+
+class TestSuggestions(unittest.TestCase):
+    def test_plan_ranges(self):
+        self.assertEqual(plan_ranges(700.0), [(0.0, 300.0), (300.0, 300.0), (600.0, 100.0)])
+        self.assertEqual(plan_ranges(10.0), [(0.0, 10.0)])
+
+    def test_loudness_spike(self):
+        rms = quiet_match(120)
+        rms[1200:1260] = 0.5  # 3 s of roar at 60 s, 20 dB up
+        spikes = loudness_spikes(rms)
+        self.assertEqual(len(spikes), 1)
+        start, end, score = spikes[0]
+        self.assertAlmostEqual(start, 60.0)
+        self.assertAlmostEqual(end, 63.0)
+        self.assertGreater(score, 15)
+
+    def test_short_and_silent_spikes_are_ignored(self):
+        rms = quiet_match(120)
+        rms[400:402] = 0.5  # 100 ms click
+        self.assertEqual(loudness_spikes(rms), [])
+        self.assertEqual(loudness_spikes(np.full(1000, 1e-6, dtype=np.float32)), [])
+
+    def test_scene_cuts_and_clusters(self):
+        diffs = np.full(500, 2.0, dtype=np.float32)
+        diffs[[50, 210, 225, 240, 400]] = 80.0
+        cuts = scene_cuts(diffs, fps=5)
+        np.testing.assert_allclose(cuts, [10.0, 42.0, 45.0, 48.0, 80.0])
+        self.assertEqual(cut_clusters(cuts), [(42.0, 48.0, 3)])
+        self.assertEqual(cut_clusters([1.0, 2.0]), [])
+
+    def test_merge_combines_kinds(self):
+        merged = merge_suggestions([Suggestion(10, 20, "audio", 8.0), Suggestion(18, 25, "scene", 3.0),
+                                    Suggestion(40, 45, "audio", 7.0)])
+        self.assertEqual([(s.start, s.end, s.kind, s.score) for s in merged],
+                         [(10, 25, "audio+scene", 8.0), (40, 45, "audio", 7.0)])
+
+    def test_spike_start_snaps_to_nearby_cut(self):
+        rms = quiet_match(120)
+        rms[1200:1260] = 0.5
+        diffs = np.full(600, 2.0, dtype=np.float32)
+        diffs[255] = 80.0  # Cut at 51 s, 1 s before the pre-rolled start
+        result = suggest_from_analysis(rms, diffs, 120.0)
+        self.assertEqual(len(result), 1)
+        self.assertEqual((result[0].start, result[0].end, result[0].kind), (51.0, 67.0, "audio"))
+        self.assertEqual(result[0].state, Suggestion.PENDING)
+
+    def test_ranges_are_analysed_in_parallel_and_joined(self):
+        def analyze(video_path, start, duration):
+            rms = quiet_match(duration)
+            if start == 300.0:
+                rms[200:260] = 0.5  # Roar at 310 s
+            return start, rms, np.full(int(duration * 5), 2.0, dtype=np.float32)
+
+        progress = []
+        with patch.object(suggestions, "analyze_range", analyze):
+            result = suggest_tags("match.mp4", 700.0, workers=3, on_progress=progress.append,
+                                  executor_class=ThreadPoolExecutor)
+        self.assertEqual(progress, [33, 66, 100])
+        self.assertEqual([(s.start, s.end) for s in result], [(302.0, 317.0)])
+
+    def test_cancel_stops_running_decodes(self):
+        cancelled = []
+        began = time.monotonic()
+        with patch.object(suggestions, "analyze_range", hanging_range):
+            result = suggest_tags("match.mp4", 700.0, workers=2,
+                                  is_cancelled=lambda: cancelled.append(1) or len(cancelled) > 2)
+        self.assertIsNone(result)
+        self.assertLess(time.monotonic() - began, 10)
+
+    def test_thread_reports_the_video_of_its_suggestions(self):
+        found = [Suggestion(10.0, 20.0, "audio")]
+        received = []
+        thread = SuggestionThread("match.mp4", 700.0)
+        thread.suggestions_ready.connect(lambda path, result: received.append((path, result)))
+        with patch("src.suggester.suggest_tags", return_value=found):
+            thread.run()
+        self.assertEqual(received, [("match.mp4", found)])
+
+        # A cancelled analysis reports nothing
+        received.clear()
+        thread.cancel()
+        def analyse(*args, is_cancelled, **kwargs):
+            return None if is_cancelled() else found
+        with patch("src.suggester.suggest_tags", side_effect=analyse):
+            thread.run()
+        self.assertEqual(received, [])
+
+if __name__ == '__main__':
+    unittest.main()
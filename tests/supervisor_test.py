@@ -0,0 +1,81 @@
+import asyncio
+import sys
+import time
+import unittest
+from unittest.mock import patch
+from src.export.supervisor import ProcessSupervisor
+
+def python_command(code):
+    return [sys.executable, "-c", code]
+
+class TestProcessSupervisor(unittest.TestCase):
+    def test_drains_both_pipes(self):
+        # Far more stderr output than a pipe buffer holds must not block the child
+        code = ("import sys\n"
+                "sys.stderr.write('warning\\n' * 200000)\n"
+                "print('out_time_us=2000000'); print('progress=end')\n"
+                "sys.stderr.write('last error\\n')")
+        positions = []
+        success, messages = asyncio.run(ProcessSupervisor().run(python_command(code), positions.append))
+        self.assertTrue(success)
+        self.assertEqual(positions, [2.0])
+        self.assertEqual(messages[-1], "last error")
+
+    def test_many_processes_on_one_loop(self):
+        supervisor = ProcessSupervisor()
+
+        async def run_all():
+            commands = [python_command(f"import sys; sys.exit({n % 2})") for n in range(8)]
+            return await asyncio.gather(*(supervisor.run(command) for command in commands))
+
+        results = asyncio.run(run_all())
+        self.assertEqual([success for success, _ in results], [n % 2 == 0 for n in range(8)])
+
+    def test_stalled_job_is_killed(self):
+        supervisor = ProcessSupervisor(stall_timeout=1)
+        began = time.monotonic()
+        success, messages = asyncio.run(supervisor.run(python_command("import time; time.sleep(30)")))
+        self.assertFalse(success)
+        self.assertIn("stalled", messages[-1])
+        self.assertLess(time.monotonic() - began, 10)
+
+    def test_job_timeout(self):
+        code = "import time\nwhile True:\n    print('progress=continue', flush=True); time.sleep(0.1)"
+        success, messages = asyncio.run(ProcessSupervisor().run(python_command(code), timeout=1))
+        self.assertFalse(success)
+        self.assertIn("timed out", messages[-1])
+
+    def test_cancel_kills_running_jobs(self):
+        supervisor = ProcessSupervisor()
+
+        async def run_and_cancel():
+            job = asyncio.ensure_future(supervisor.run(python_command("import time; time.sleep(30)")))
+            await asyncio.sleep(0.5)
+            supervisor.cancel()
+            return await job
+
+        began = time.monotonic()
+        success, messages = asyncio.run(run_and_cancel())
+        self.assertFalse(success)
+        self.assertEqual(messages[-1], "cancelled")
+        self.assertLess(time.monotonic() - began, 10)
+        # Nothing new starts after a cancel
+        self.assertEqual(asyncio.run(supervisor.run(python_command("pass"))), (False, ["cancelled"]))
+
+    def test_cancel_during_spawn_kills_the_new_job(self):
+        supervisor = ProcessSupervisor()
+        spawn = asyncio.create_subprocess_exec
+
+        async def spawn_while_cancelling(*command, **kwargs):
+            supervisor.cancel()
+            return await spawn(*command, **kwargs)
+
+        began = time.monotonic()
+        with patch("asyncio.create_subprocess_exec", spawn_while_cancelling):
+            success, messages = asyncio.run(supervisor.run(python_command("import time; time.sleep(30)")))
+        self.assertFalse(success)
+        self.assertEqual(messages[-1], "cancelled")
+        self.assertLess(time.monotonic() - began, 10)
+
+if __name__ == "__main__":
+    unittest.main()
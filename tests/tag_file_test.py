@@ -0,0 +1,110 @@
+import json
+import os
+import random
+import shutil
+import struct
+import tempfile
+import unittest
+from src.cli import main
+from src.tag_file import TagFile, read_tag_file, write_tag_file
+from src.tag_manager import TagManager
+
+TAGS = [{"start": 30.0, "end": 35.5, "category": "Gol"},
+        {"start": 10.0, "end": 12.0, "category": "Falta"},
+        {"start": 11.0, "end": 40.0, "category": "Balón parado"},
+        {"start": 50.0, "end": None, "category": "Gol"}]
+
+class TestTagFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tags.vtags")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip_keeps_order(self):
+        write_tag_file(self.path, TAGS)
+        self.assertEqual(read_tag_file(self.path).to_dicts(), TAGS)
+        with TagFile(self.path) as tag_file:
+            self.assertEqual(tag_file.read_all(), TAGS)
+
+    def test_extra_keys_round_trip(self):
+        tags = [dict(TAGS[0], note="Remate de cabeza"), TAGS[1], dict(TAGS[2], video_path="b.mp4")] + TAGS[3:]
+        write_tag_file(self.path, tags)
+        self.assertEqual(read_tag_file(self.path).to_dicts(), tags)
+        with TagFile(self.path) as tag_file:
+            self.assertEqual(tag_file.read_all(), tags)
+            self.assertEqual(tag_file.window(36.0, 45.0), [tags[2]])
+            self.assertEqual(tag_file.category("Gol"), [tags[0], tags[3]])
+
+    def test_window_and_category(self):
+        write_tag_file(self.path, TAGS)
+        with TagFile(self.path) as tag_file:
+            self.assertEqual(len(tag_file), 4)
+            # The long tag starting at 11 s still covers 36 s
+            self.assertEqual(tag_file.window(36.0, 45.0), [TAGS[2]])
+            self.assertEqual(tag_file.window(11.5, 30.0), [TAGS[1], TAGS[2], TAGS[0]])
+            self.assertEqual(tag_file.window(45.0, 60.0), [])
+            self.assertEqual(tag_file.category("Gol"), [TAGS[0], TAGS[3]])
+            self.assertEqual(tag_file.category("Tiro"), [])
+
+    def test_window_matches_a_scan(self):
+        rng = random.Random(3)
+        tags = []
+        for _ in range(2000):
+            start = round(rng.uniform(0, 5400), 3)
+            tags.append({"start": start, "end": round(start + rng.uniform(0, 60), 3), "category": rng.choice("ABC")})
+        write_tag_file(self.path, tags)
+        with TagFile(self.path) as tag_file:
+            for _ in range(50):
+                start = rng.uniform(0, 5400)
+                end = start + rng.uniform(0, 120)
+                expected = sorted((t for t in tags if t["start"] <= end and t["end"] >= start),
+                                  key=lambda t: t["start"])
+                self.assertEqual(sorted(tag_file.window(start, end), key=lambda t: t["start"]), expected)
+
+    def test_long_tag_does_not_slow_window(self):
+        tags = [{"start": 0.0, "end": 5400.0, "category": "Gol"}]
+        tags += [{"start": float(i), "end": i + 1.0, "category": "Falta"} for i in range(1, 5000)]
+        write_tag_file(self.path, tags)
+        visited = []
+
+        class Counting(list):
+            def __getitem__(self, i):
+                visited.append(i)
+                return super().__getitem__(i)
+        with TagFile(self.path) as tag_file:
+            tag_file._tree = Counting(tag_file._tree.tolist())
+            self.assertEqual(tag_file.window(2500.2, 2500.4), [tags[0], tags[2500]])
+        # A few tree levels per tag found, not one step per earlier tag
+        self.assertLess(len(visited), 100)
+
+    def test_empty_and_invalid_files(self):
+        write_tag_file(self.path, [])
+        self.assertEqual(len(read_tag_file(self.path)), 0)
+        with open(self.path, "r+b") as f:
+            f.seek(4)
+            f.write(struct.pack("<H", 2))
+        with self.assertRaises(ValueError):
+            TagFile(self.path)
+        with open(self.path, "wb") as f:
+            f.write(b"[]")
+        with self.assertRaises(ValueError):
+            TagFile(self.path)
+
+    def test_tag_manager_and_cli_convert(self):
+        json_path = os.path.join(self.tmp_dir, "tags.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(TAGS, f)
+        self.assertEqual(main(["convert", json_path, self.path]), 0)
+
+        manager = TagManager()
+        manager.load_tags(self.path)
+        self.assertEqual(manager.get_tags().to_dicts(), TAGS)
+        back_path = os.path.join(self.tmp_dir, "back.json")
+        manager.save_tags(back_path)
+        with open(back_path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), TAGS)
+
+if __name__ == '__main__':
+    unittest.main()
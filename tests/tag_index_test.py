@@ -0,0 +1,113 @@
+import random
+import unittest
+from src.tag_index import TagIndex
+from src.tag_manager import TagManager
+
+class TestTagIndex(unittest.TestCase):
+    def setUp(self):
+        self.manager = TagManager()
+        for start, end in [(10.0, 20.0), (15.0, 18.0), (30.0, 40.0), (50.0, 55.0)]:
+            self.manager.add_start(start)
+            self.manager.add_end(end)
+
+    def test_point_queries(self):
+        self.assertEqual(self.manager.tags_at(16.0), [0, 1])
+        self.assertEqual(self.manager.tags_at(19.0), [0])
+        self.assertEqual(self.manager.tags_at(25.0), [])
+        self.assertEqual(self.manager.tags_at(40.0), [2])
+
+    def test_range_and_overlap_queries(self):
+        self.assertEqual(self.manager.tags_in_range(19.0, 31.0), [0, 2])
+        self.assertEqual(self.manager.tags_in_range(41.0, 49.0), [])
+        self.assertEqual(self.manager.overlapping_tags(0), [1])
+        self.assertEqual(self.manager.overlapping_tags(3), [])
+
+    def test_navigation(self):
+        self.assertEqual(self.manager.next_tag(10.0), 1)
+        self.assertEqual(self.manager.next_tag(0.0), 0)
+        self.assertIsNone(self.manager.next_tag(50.0))
+        self.assertEqual(self.manager.previous_tag(30.0), 1)
+        self.assertIsNone(self.manager.previous_tag(10.0))
+
+    def test_open_tag_covers_no_time(self):
+        self.manager.add_start(60.0)
+        self.assertEqual(self.manager.tags_at(60.0), [])
+        self.assertEqual(self.manager.next_tag(55.0), 4)
+        self.manager.add_end(70.0)
+        self.assertEqual(self.manager.tags_at(65.0), [4])
+
+    def test_index_follows_out_of_order_changes(self):
+        self.manager.add_start(5.0)
+        self.manager.add_end(12.0)
+        self.assertEqual(self.manager.tags_at(11.0), [4, 0])
+        self.manager.remove_tag(0)
+        self.assertEqual(self.manager.tags_at(11.0), [3])
+        self.manager.add_tags([(100.0, 110.0)])
+        self.assertEqual(self.manager.tags_at(105.0), [4])
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(7)
+        manager = TagManager()
+        for _ in range(2000):
+            start = rng.uniform(0, 5400)
+            manager.add_start(start)
+            manager.add_end(start + rng.uniform(1, 60))
+        tags = manager.get_tags()
+        for _ in range(200):
+            a = rng.uniform(0, 5400)
+            b = a + rng.uniform(0, 120)
+            expected = sorted((i for i, t in enumerate(tags) if t["start"] <= b and t["end"] >= a),
+                              key=lambda i: tags[i]["start"])
+            self.assertEqual(manager.tags_in_range(a, b), expected)
+
+    def test_index_over_a_plain_list(self):
+        index = TagIndex()
+        index.rebuild([{"start": 10.0, "end": 20.0}, {"start": 0.0, "end": 5.0}, {"start": 12.0, "end": None}])
+        self.assertEqual(index.at(12.0), [0])
+        self.assertEqual(index.overlapping(4.0, 11.0), [1, 0])
+        self.assertEqual(index.next_after(11.0), 2)
+
+    def test_edits_update_the_index_in_place(self):
+        rng = random.Random(3)
+        manager = TagManager()
+        manager.add_tags([(s, s + rng.uniform(1, 30)) for s in (rng.uniform(0, 600) for _ in range(300))])
+        manager.tags_at(0.0)
+        for _ in range(100):
+            edit = rng.choice(["add", "remove", "start", "end"])
+            tags = manager.get_tags()
+            i = rng.randrange(len(tags))
+            if edit == "add":
+                start = rng.uniform(0, 600)
+                manager.add_tags([(start, start + 5.0), (start, start + 1.0)])
+            elif edit == "remove":
+                manager.remove_tag(i)
+            elif edit == "start":
+                manager.update_tag(i, start=max(0.0, tags[i]["start"] - rng.uniform(0, 20)))
+            else:
+                manager.update_tag(i, end=tags[i]["end"] + rng.uniform(-0.5, 20))
+            self.assertFalse(manager.index._stale)
+            t = rng.uniform(0, 600)
+            expected = sorted((i for i, tag in enumerate(tags) if tag["start"] <= t <= tag["end"]),
+                              key=lambda i: (tags[i]["start"], i))
+            self.assertEqual(manager.tags_at(t), expected)
+
+    def test_long_tag_does_not_slow_other_queries(self):
+        manager = TagManager()
+        manager.add_tags([(0.0, 5400.0)] + [(float(i), i + 1.0) for i in range(1, 5000)], "Jugada")
+        index = manager.index
+        index.ensure(manager.get_tags())
+        visited = []
+
+        class Counting(list):
+            def __getitem__(self, i):
+                visited.append(i)
+                return super().__getitem__(i)
+        for name, value in vars(index).items():
+            if isinstance(value, list):
+                setattr(index, name, Counting(value))
+        self.assertEqual(manager.tags_at(2500.5), [0, 2500])
+        # Two matches: a few tree levels per match, not one step per earlier tag
+        self.assertLess(len(visited), 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from src.tag_journal import JOURNAL_NAME, SNAPSHOT_NAME, TagJournal
+from src.tag_manager import TagManager
+
+class TestTagJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def session(self, compact_every=500):
+        manager = TagManager()
+        journal = TagJournal(self.directory, compact_every)
+        restored = manager.set_journal(journal)
+        return manager, journal, restored
+
+    def test_changes_survive_a_crash(self):
+        manager, journal, restored = self.session()
+        self.assertEqual(restored, 0)
+        manager.add_start(10.0, "Gol")
+        manager.add_end(15.0)
+        manager.add_tags([(1.0, 2.0), (3.0, 4.0)], "Falta")
+        manager.remove_tag(0)
+        manager.update_tag(0, category="Tiro", end=2.5)
+        manager.shift_tags(1.0, "Gol")
+        manager.add_start(30.0, "Gol")
+        # No close(): only what was flushed is on disk, as after a crash
+        journal.flush()
+        expected = manager.get_tags().to_dicts()
+
+        manager, journal, restored = self.session()
+        self.assertEqual(restored, 3)
+        self.assertEqual(manager.get_tags().to_dicts(), expected)
+        # The open tag is still the one add_end closes
+        manager.add_end(35.0)
+        self.assertEqual(manager.get_tags()[-1]["end"], 35.0)
+        journal.close()
+
+    def test_journal_is_compacted(self):
+        manager, journal, _ = self.session(compact_every=10)
+        for i in range(23):
+            manager.add_start(float(i))
+            manager.add_end(i + 0.5)
+        journal.close()
+        with open(os.path.join(self.directory, JOURNAL_NAME), encoding="utf-8") as f:
+            # Header plus the 6 changes made since the last snapshot (46 changes in all)
+            self.assertEqual(len(f.readlines()), 7)
+
+        manager, journal, restored = self.session()
+        self.assertEqual(restored, 23)
+        self.assertEqual(manager.get_tags()[-1]["end"], 22.5)
+        journal.close()
+
+    def test_stale_journal_is_not_replayed(self):
+        manager, journal, _ = self.session()
+        manager.add_start(5.0)
+        manager.add_end(6.0)
+        journal.close()
+        # Crash right after a snapshot was written, before its journal was started
+        with open(os.path.join(self.directory, SNAPSHOT_NAME), encoding="utf-8") as f:
+            snapshot = json.load(f)
+        snapshot["generation"] += 1
+        snapshot["tags"] = [{"start": 5.0, "end": 6.0, "category": "General"}]
+        with open(os.path.join(self.directory, SNAPSHOT_NAME), "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+
+        manager, journal, restored = self.session()
+        self.assertEqual(restored, 1)
+        journal.close()
+
+    def test_half_written_line_is_ignored(self):
+        manager, journal, _ = self.session()
+        manager.add_start(5.0)
+        manager.add_end(6.0)
+        journal.close()
+        with open(os.path.join(self.directory, JOURNAL_NAME), "a", encoding="utf-8") as f:
+            f.write('{"op": "add", "at": 1, "ta')
+
+        manager, journal, restored = self.session()
+        self.assertEqual(manager.get_tags().to_dicts(), [{"start": 5.0, "end": 6.0, "category": "General"}])
+        journal.close()
+
+    def test_loading_a_file_replaces_the_autosave(self):
+        manager, journal, _ = self.session()
+        manager.add_start(5.0)
+        path = os.path.join(self.directory, "match.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([{"start": 1.0, "end": 2.0, "category": "Gol"}], f)
+        manager.load_tags(path)
+        journal.close()
+
+        manager, journal, restored = self.session()
+        self.assertEqual(manager.get_tags().to_dicts(), [{"start": 1.0, "end": 2.0, "category": "Gol"}])
+        journal.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+from PyQt5.QtCore import Qt
+from src.tag_manager import TagManager
+from src.ui.tag_list_model import TagListModel
+
+
+def record_signals(model):
+    events = []
+    model.rowsInserted.connect(lambda parent, first, last: events.append(("insert", first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: events.append(("remove", first, last)))
+    model.dataChanged.connect(lambda first, last, roles: events.append(("change", first.row(), last.row())))
+    model.modelReset.connect(lambda: events.append(("reset",)))
+    return events
+
+
+def rows(model):
+    return [model.data(model.index(i)) for i in range(model.rowCount())]
+
+
+def test_rows_follow_tag_changes(qapp):
+    manager = TagManager()
+    model = TagListModel(manager)
+    events = record_signals(model)
+
+    manager.add_start(10.0, "Gol")
+    assert events == [("insert", 0, 0)]
+    assert rows(model) == ["1. Gol (10.0s - ...s)"]
+    assert model.data(model.index(0), Qt.ToolTipRole) is not None
+
+    manager.add_end(12.5)
+    assert events[-1] == ("change", 0, 0)
+    assert rows(model) == ["1. Gol (10.0s - 12.5s)"]
+
+    # Inserted before the tag still open: later rows are renumbered, nothing is rebuilt
+    manager.add_start(20.0, "Falta")
+    manager.add_tags([(1.0, 2.0)], "Tiro")
+    assert events[-2:] == [("insert", 1, 1), ("change", 2, 2)]
+    assert rows(model) == ["1. Gol (10.0s - 12.5s)", "2. Tiro (1.0s - 2.0s)", "3. Falta (20.0s - ...s)"]
+
+    manager.remove_tag(0)
+    assert events[-2:] == [("remove", 0, 0), ("change", 0, 1)]
+    assert model.rowCount() == 2
+    assert ("reset",) not in events
+
+
+def test_load_resets_the_model(qapp, tmp_path):
+    manager = TagManager()
+    model = TagListModel(manager)
+    path = tmp_path / "tags.json"
+    path.write_text('[{"start": 1.0, "end": 2.0, "category": "Gol"}, {"start": 3.0, "end": 4.0, "category": "Gol"}]')
+    events = record_signals(model)
+    manager.load_tags(str(path))
+    assert events == [("reset",)]
+    assert model.rowCount() == 2
+
+
+def test_edits_by_negative_index_change_their_row(qapp):
+    manager = TagManager()
+    manager.add_tags([(1.0, 2.0), (3.0, 4.0)], "Gol")
+    model = TagListModel(manager)
+    events = record_signals(model)
+    manager.update_tag(-1, category="Falta")
+    assert events == [("change", 1, 1)]
+    assert rows(model)[1] == "2. Falta (3.0s - 4.0s)"
@@ -28,6 +28,15 @@ class TestTagManager(unittest.TestCase):
         self.manager.add_start(5.0)
         self.assertEqual(self.manager.get_tags()[0]['start'], 4.0)
 
+    def test_add_tags_keeps_open_tag_last(self):
+        self.manager.add_start(50.0, "Gol")
+        added = self.manager.add_tags([(10.0, 20.0), (30.0, 35.0)], "Falta")
+        self.assertEqual(added, 2)
+        self.manager.add_end(55.0)
+        tags = self.manager.get_tags()
+        self.assertEqual([(t['start'], t['end'], t['category']) for t in tags],
+                         [(10.0, 20.0, "Falta"), (30.0, 35.0, "Falta"), (50.0, 55.0, "Gol")])
+
 
 if __name__ == '__main__':
     unittest.main()
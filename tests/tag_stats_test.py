@@ -0,0 +1,92 @@
+import csv
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from src.tag_manager import TagManager
+from src.tag_stats import TagStats
+
+class TestTagStats(unittest.TestCase):
+    def setUp(self):
+        self.manager = TagManager()
+        self.stats = TagStats(self.manager, second_half=50 * 60)
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def rows(self):
+        return {row["category"]: row for row in self.stats.summary()}
+
+    def assert_matches_recompute(self):
+        fresh = TagStats(self.manager, second_half=self.stats.second_half)
+        self.assertEqual(self.stats.summary(), fresh.summary())
+
+    def test_incremental_updates(self):
+        self.manager.add_start(100.0, "Gol")
+        self.assertEqual(self.rows()["Gol"]["count"], 1)
+        self.assertEqual(self.rows()["Gol"]["finished"], 0)
+        self.assertIsNone(self.rows()["Gol"]["average_seconds"])
+
+        self.manager.add_end(110.0)
+        self.manager.add_tags([(400.0, 430.0), (3100.0, 3110.0)], "Falta")
+        rows = self.rows()
+        self.assertEqual((rows["Gol"]["total_seconds"], rows["Gol"]["average_seconds"]), (10.0, 10.0))
+        self.assertEqual(rows["Falta"]["average_seconds"], 20.0)
+        self.assertEqual((rows["Falta"]["first_half"], rows["Falta"]["second_half"]), (1, 1))
+        self.assertEqual(rows["Falta"]["buckets"][1], 1)
+        self.assertEqual(self.stats.bucket_count(), 11)
+
+        self.manager.update_tag(1, category="Gol", end=405.0)
+        self.manager.remove_tag(2)
+        rows = self.rows()
+        self.assertNotIn("Falta", rows)
+        self.assertEqual((rows["Gol"]["count"], rows["Gol"]["total_seconds"]), (2, 15.0))
+        self.assert_matches_recompute()
+
+    def test_random_edits_match_recompute(self):
+        rng = random.Random(5)
+        for _ in range(300):
+            action = rng.random()
+            tags = self.manager.get_tags()
+            if action < 0.4:
+                self.manager.add_start(rng.uniform(0, 5400), rng.choice("ABC"))
+            elif action < 0.7:
+                self.manager.add_end(rng.uniform(0, 5400))
+            elif action < 0.85 and len(tags):
+                self.manager.remove_tag(rng.randrange(len(tags)))
+            elif len(tags):
+                self.manager.update_tag(rng.randrange(len(tags)), start=rng.uniform(0, 5400), category=rng.choice("ABCD"))
+        self.assert_matches_recompute()
+        self.manager.shift_tags(-30.0)
+        self.assert_matches_recompute()
+
+    def test_listeners_and_second_half(self):
+        calls = []
+        self.stats.add_listener(lambda: calls.append(1))
+        self.manager.add_tags([(1000.0, 1010.0)], "Gol")
+        self.assertEqual(len(calls), 1)
+        self.stats.set_second_half(10 * 60)
+        self.assertEqual(self.rows()["Gol"]["second_half"], 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_dumps(self):
+        self.manager.add_tags([(10.0, 20.0), (310.0, 315.0)], "Balón parado")
+        csv_path = os.path.join(self.tmp_dir, "stats.csv")
+        json_path = os.path.join(self.tmp_dir, "stats.json")
+        self.stats.write(csv_path)
+        self.stats.write(json_path)
+
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0][-2:], ["min 0-5", "min 5-10"])
+        self.assertEqual(rows[1], ["Balón parado", "2", "2", "15.0", "7.5", "2", "0", "1", "1"])
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(data["buckets"], ["0-5", "5-10"])
+        self.assertEqual(data["categories"][0]["total_seconds"], 15.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.tag_manager import TagManager
+from src.tag_store import Tag, TagStore
+
+class TestTagStore(unittest.TestCase):
+    def setUp(self):
+        self.store = TagStore([
+            {"start": 10.0, "end": 20.5, "category": "Gol"},
+            {"start": 30.0, "end": 32.0, "category": "Falta"},
+            {"start": 40.0, "end": None, "category": "Gol"},
+        ])
+
+    def test_views_behave_like_dicts(self):
+        tag = self.store[0]
+        self.assertIsInstance(tag, Tag)
+        self.assertEqual(tag["start"], 10.0)
+        self.assertEqual(tag.get("category"), "Gol")
+        self.assertIsNone(self.store[-1]["end"])
+        self.assertEqual(dict(tag), {"start": 10.0, "end": 20.5, "category": "Gol"})
+        self.assertEqual(tag, {"start": 10.0, "end": 20.5, "category": "Gol"})
+        self.assertEqual(tag.get("video_path", "match.mp4"), "match.mp4")
+        with self.assertRaises(AttributeError):
+            tag.extra = 1  # __slots__: views carry no per-tag dict
+
+        self.store[-1]["end"] = 45.0
+        self.assertEqual(self.store[2]["end"], 45.0)
+
+    def test_times_are_integer_milliseconds(self):
+        self.store.append({"start": 0.1 + 0.2, "end": 0.6, "category": "Gol"})
+        self.assertEqual(self.store[-1]["start"], 0.3)
+        self.assertEqual(self.store.starts_ms.dtype, np.int64)
+        self.assertEqual(self.store.categories, ["Gol", "Falta"])
+
+    def test_insert_pop_and_growth(self):
+        self.store.insert_many(1, [{"start": 25.0, "end": 26.0, "category": "Tiro"}])
+        self.assertEqual([t["category"] for t in self.store], ["Gol", "Tiro", "Falta", "Gol"])
+        self.assertEqual(self.store.pop(0)["start"], 10.0)
+        self.assertEqual(len(self.store), 3)
+        self.store.extend({"start": float(i), "end": i + 1.0, "category": "Gol"} for i in range(500))
+        self.assertEqual(len(self.store), 503)
+        self.assertEqual(self.store[-1]["start"], 499.0)
+        with self.assertRaises(IndexError):
+            self.store[503]
+
+    def test_bulk_operations(self):
+        self.assertEqual(self.store.total_duration(), 12.5)
+        self.assertEqual(self.store.total_duration(self.store.category_mask("Gol")), 10.5)
+        self.assertFalse(self.store.category_mask("Tiro").any())
+
+        self.assertEqual(self.store.shift(-15.0), 3)
+        self.assertEqual([(t["start"], t["end"]) for t in self.store], [(0.0, 10.5), (15.0, 17.0), (25.0, None)])
+
+    def test_json_roundtrip(self):
+        data = json.loads(json.dumps(self.store.to_dicts()))
+        self.assertEqual(TagStore(data).to_dicts(), self.store.to_dicts())
+
+    def test_extra_keys_are_kept(self):
+        self.store.insert_many(1, [{"start": 25.0, "end": 26.0, "category": "Tiro", "note": "al palo",
+                                    "video_path": "b.mp4"}])
+        self.store[3]["note"] = "abierto"
+        self.assertEqual(self.store[1], {"start": 25.0, "end": 26.0, "category": "Tiro", "note": "al palo",
+                                         "video_path": "b.mp4"})
+        self.assertEqual(self.store[1].get("video_path", "match.mp4"), "b.mp4")
+        self.assertNotIn("note", self.store[0])
+
+        copy = self.store.copy()
+        self.assertEqual(self.store.pop(0)["category"], "Gol")
+        self.assertEqual([t.get("note") for t in self.store], ["al palo", None, "abierto"])
+        self.assertEqual([t.get("note") for t in copy], [None, "al palo", None, "abierto"])
+        self.store.assign(copy)
+        self.assertEqual(self.store.to_dicts(), copy.to_dicts())
+        self.assertEqual(TagStore(json.loads(json.dumps(copy.to_dicts()))).to_dicts(), copy.to_dicts())
+
+class TestTagManagerStore(unittest.TestCase):
+    def test_load_keeps_the_same_store(self):
+        manager = TagManager()
+        shared = manager.get_tags()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "tags.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([{"start": 1.0, "end": 2.0, "category": "Gol"}], f)
+            manager.load_tags(path)
+            self.assertIs(manager.get_tags(), shared)
+            self.assertEqual(len(shared), 1)
+            self.assertEqual(manager.tags_at(1.5), [0])
+
+            manager.save_tags(path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f), [{"start": 1.0, "end": 2.0, "category": "Gol"}])
+
+    def test_bulk_helpers(self):
+        manager = TagManager()
+        manager.add_tags([(10.0, 20.0), (30.0, 35.0)], "Gol")
+        manager.add_tags([(50.0, 51.0)], "Falta")
+        self.assertEqual(manager.tags_of_category("Gol"), [0, 1])
+        self.assertEqual(manager.total_duration(), 16.0)
+        self.assertEqual(manager.shift_tags(2.0, "Falta"), 1)
+        self.assertEqual(manager.tags_at(52.5), [2])
+
+if __name__ == '__main__':
+    unittest.main()
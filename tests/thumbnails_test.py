@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from src.media.thumbnails import ThumbnailCache, ThumbnailExtractor, build_thumbnail_command, sample_times
+
+class TestSampleTimes(unittest.TestCase):
+    def test_density_follows_width(self):
+        times, step = sample_times(600.0, 640, 64)
+        self.assertEqual(step, 60)
+        self.assertEqual(times, [i * 60 for i in range(10)])
+
+        times, step = sample_times(600.0, 1280, 64)
+        self.assertEqual(step, 30)
+        self.assertEqual(len(times), 20)
+
+    def test_visible_range(self):
+        times, step = sample_times(600.0, 640, 64, start=95.0, end=195.0)
+        self.assertEqual(step, 10)
+        self.assertEqual(times[0], 90)
+        self.assertLess(times[-1], 195.0)
+
+    def test_long_videos_and_empty_strips(self):
+        times, step = sample_times(5 * 3600.0, 64, 64)
+        self.assertEqual((times, step), ([0], 18000))
+        self.assertEqual(sample_times(0, 640, 64), ([], 0))
+
+    def test_command_writes_jpeg_to_stdout(self):
+        command = build_thumbnail_command("match.mp4", 12.5, height=36)
+        self.assertIn("12.500", command)
+        self.assertIn("scale=-2:36", command)
+        self.assertEqual(command[-1], "-")
+
+class TestThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_lru_evicts_oldest_and_keeps_disk_copy(self):
+        cache = ThumbnailCache(max_entries=2, cache_dir=self.tmp_dir)
+        cache.put(("abc", 36, 0), b"a")
+        cache.put(("abc", 36, 1000), b"b")
+        cache.get_memory(("abc", 36, 0))
+        cache.put(("abc", 36, 2000), b"c")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get_memory(("abc", 36, 1000)))
+        self.assertEqual(cache.get_memory(("abc", 36, 0)), b"a")
+
+        # Evicted entries and new cache instances are served from disk
+        self.assertEqual(cache.get(("abc", 36, 1000)), b"b")
+        self.assertEqual(ThumbnailCache(cache_dir=self.tmp_dir).get(("abc", 36, 2000)), b"c")
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, "abc", "36_2000.jpg")))
+
+class TestThumbnailExtractor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def extract(self, video_path, seconds, height):
+        self.calls.append(seconds)
+        return None if seconds < 0 else f"{seconds}".encode()
+
+    def test_extracts_in_background_then_serves_from_memory(self):
+        extractor = ThumbnailExtractor(ThumbnailCache(cache_dir=self.tmp_dir), extract=self.extract)
+        done = threading.Event()
+        results = []
+
+        def callback(seconds, data):
+            results.append((seconds, data))
+            done.set()
+
+        self.assertIsNone(extractor.request("match.mp4", "abc", 5.0, callback))
+        self.assertTrue(done.wait(5))
+        self.assertEqual(results, [(5.0, b"5.0")])
+        self.assertEqual(extractor.request("match.mp4", "abc", 5.0, callback), b"5.0")
+        self.assertEqual(self.calls, [5.0])
+        extractor.shutdown()
+
+    def test_failed_extraction_reports_none(self):
+        extractor = ThumbnailExtractor(ThumbnailCache(cache_dir=self.tmp_dir), extract=self.extract)
+        done = threading.Event()
+        results = []
+        extractor.request("match.mp4", "abc", -1.0, lambda s, d: (results.append(d), done.set()))
+        self.assertTrue(done.wait(5))
+        self.assertEqual(results, [None])
+        extractor.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
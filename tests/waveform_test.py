@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from src.media.waveform import BIN_SAMPLES, Waveform, bin_stats, merge_pairs
+
+class TestWaveform(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_bin_stats(self):
+        samples = np.concatenate([np.full(BIN_SAMPLES, 0.5), np.linspace(-1, 1, BIN_SAMPLES),
+                                  np.full(10, -0.25)]).astype(np.float32)
+        stats = bin_stats(samples)
+        self.assertEqual(stats.shape, (3, 3))
+        np.testing.assert_allclose(stats[0], [0.5, 0.5, 0.5], atol=1e-6)
+        np.testing.assert_allclose(stats[1, :2], [-1, 1], atol=1e-6)
+        np.testing.assert_allclose(stats[2], [-0.25, -0.25, 0.25], atol=1e-6)
+
+    def test_pyramid_levels(self):
+        bins = np.array([[-0.1, 0.1, 0.1], [-0.5, 0.3, 0.3], [-0.2, 0.9, 0.5]], dtype=np.float32)
+        merged = merge_pairs(bins)
+        np.testing.assert_allclose(merged[0], [-0.5, 0.3, np.sqrt(0.05)], atol=1e-6)
+        np.testing.assert_allclose(merged[1], bins[2])
+
+        waveform = Waveform(np.zeros((1000, 3)))
+        self.assertEqual([len(level) for level in waveform.levels],
+                         [1000, 500, 250, 125, 63, 32, 16, 8, 4, 2, 1])
+
+    def test_level_matches_pixels_per_second(self):
+        waveform = Waveform(np.zeros((72000, 3)), bin_seconds=0.05)  # One hour
+        self.assertEqual(waveform.level_for(20.0), 0)    # 50 ms per pixel
+        self.assertEqual(waveform.level_for(800 / 3600), 6)  # 3.2 s bins for 4.5 s per pixel
+        self.assertEqual(waveform.level_for(100.0), 0)
+
+    def test_columns(self):
+        bins = np.zeros((400, 3), dtype=np.float32)
+        bins[100] = [-0.8, 0.9, 0.6]
+        waveform = Waveform(bins, bin_seconds=0.05)  # 20 seconds
+        columns = waveform.columns(100)
+        self.assertEqual(columns.shape, (100, 3))
+        # Bin 100 starts at 5 s, under column 25
+        np.testing.assert_allclose(columns[25, :2], [-0.8, 0.9])
+        self.assertAlmostEqual(float(columns[25, 2]), 0.6 / np.sqrt(4), places=5)
+        self.assertEqual(float(np.abs(np.delete(columns, 25, axis=0)).max()), 0.0)
+
+        # Zoomed in further than the finest level, and past the end of the audio
+        zoomed = waveform.columns(100, 4.9, 5.2)  # 3 ms per column, bin 100 under columns 33-49
+        self.assertAlmostEqual(float(zoomed[40, 1]), 0.9, places=5)
+        self.assertFalse(waveform.columns(10, 0, 40)[6:].any())
+
+    def test_cache_roundtrip(self):
+        bins = np.random.default_rng(1).uniform(-1, 1, (1001, 3)).astype(np.float32)
+        bins[:, 2] = np.abs(bins[:, 2])
+        path = os.path.join(self.tmp_dir, "abc.vtwf")
+        Waveform(bins).save(path)
+        self.assertEqual(os.path.getsize(path), 14 + 1001 * 6)
+        loaded = Waveform.load(path)
+        np.testing.assert_allclose(loaded.levels[0], bins, atol=1e-4)
+        self.assertEqual(len(loaded.levels), len(Waveform(bins).levels))
+
+        with open(path, "wb") as f:
+            f.write(b"garbage")
+        self.assertIsNone(Waveform.load(path))
+        self.assertIsNone(Waveform.load(os.path.join(self.tmp_dir, "missing.vtwf")))
+
+if __name__ == '__main__':
+    unittest.main()